@@ -1,11 +1,21 @@
+import sys
+from pathlib import Path
+
 import speech_recognition as sr
 import pyttsx3
-from pythonosc import udp_client
+
+# Shared command grammar and OSC sender (2025-11-26_super_taller_cv/python/mediapipe_voice/)
+sys.path.append(str(Path(__file__).resolve().parents[4] / "2025-11-26_super_taller_cv" / "python" / "mediapipe_voice"))
+from command_grammar import CommandGrammar
+from osc_sender import AsyncOscSender
 
 # ---- OSC CONFIGURATION ----
 OSC_IP = "127.0.0.1"
 OSC_PORT = 12000   # Receiver port in Processing
-client = udp_client.SimpleUDPClient(OSC_IP, OSC_PORT)
+OSC_TARGETS = [(OSC_IP, OSC_PORT)]  # add more (host, port) pairs to fan out
+# Sends happen on a background thread: commands are queued and bundled,
+# each message carries the decision timestamp as its last argument
+client = AsyncOscSender(OSC_TARGETS).start()
 
 # ---- VOICE ----
 engine = pyttsx3.init()
@@ -24,6 +34,8 @@ comandos = {
     "derecha": "/derecha",
     "detener": "/detener"
 }
+# Compiled once: accent/case-insensitive, whole words, several commands per phrase
+gramatica = CommandGrammar(comandos)
 
 # ---- RECOGNITION ----
 r = sr.Recognizer()
@@ -37,15 +49,12 @@ with sr.Microphone() as source:
             texto = r.recognize_google(audio, language="es-ES")
             print(f"Command detected: {texto}")
 
-            enviado = False
-            for palabra, ruta in comandos.items():
-                if palabra in texto.lower():
-                    client.send_message(ruta, 1)
-                    hablar(f"Executing command {palabra}")
-                    enviado = True
-                    break
+            coincidencias = gramatica.parse(texto)
+            for m in coincidencias:
+                client.send(m.command, 1)
+                hablar(f"Executing command {m.phrase}")
 
-            if not enviado:
+            if not coincidencias:
                 hablar("I did not recognize that command.")
 
         except sr.UnknownValueError:
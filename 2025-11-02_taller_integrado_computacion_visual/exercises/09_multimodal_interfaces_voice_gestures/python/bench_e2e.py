@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark extremo a extremo: evento inyectado en el EventBus -> paquete OSC recibido.
+
+A diferencia de bench_logic.py, aquí corre el LogicWorker real (con su
+AsyncOscSender) y las acciones se capturan en un receptor UDP local, así que la
+medida incluye la decisión, la cola de envío y el socket. Por cada mensaje:
+- decisión:   instante esperado -> timestamp de decisión que viaja en el mensaje.
+- transporte: timestamp de decisión -> recepción del paquete.
+- total:      instante esperado -> recepción.
+El instante esperado es el evento que dispara la acción ("detener", combo) o el
+vencimiento de COMBO_HOLD (solo voz / solo gesto).
+
+Escenarios:
+- voz:     "adelante" sola            -> /adelante al vencer COMBO_HOLD
+- gesto:   "mano_arriba" solo         -> /saludo al vencer COMBO_HOLD
+- combo:   "adelante" + gesto a los --combo-gap s -> /adelante_rapido (o /adelante si el gesto llega tarde)
+- detener: "detener"                  -> /detener inmediato
+- rafaga:  --burst "detener" seguidos cada --burst-interval s; mide acciones/s
+           y cuántas se come ACTION_COOLDOWN
+
+--combo-hold y --cooldown aceptan varios valores y se prueba cada combinación,
+para tener números al ajustar COMBO_HOLD / ACTION_COOLDOWN.
+
+Uso:
+    python bench_e2e.py --trials 10 --combo-hold 0.8 1.2 --json e2e.json
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import platform
+import random
+import subprocess
+import time
+
+import numpy as np
+
+import multimodal_control as mc
+from osc_sender import AsyncOscSender, OscReceiver
+
+SCENARIOS = ("voz", "gesto", "combo", "detener", "rafaga")
+
+
+class UdpLogicWorker(mc.LogicWorker):
+    """LogicWorker real cuyo OSC va al receptor local del benchmark."""
+
+    def __init__(self, bus, address):
+        super().__init__(bus)
+        self.osc = AsyncOscSender([address], queue_size=mc.OSC_QUEUE_SIZE)
+
+
+def _wait_messages(receiver, start, count, timeout):
+    """Espera a que el receptor tenga `count` mensajes nuevos desde `start`."""
+    deadline = time.monotonic() + timeout
+    while len(receiver.received) < start + count and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return receiver.received[start:]
+
+
+def _stats(samples):
+    if not samples:
+        return None
+    a = np.asarray(samples) * 1000.0
+    return {
+        "n": int(a.size),
+        "mean_ms": float(a.mean()),
+        "p50_ms": float(np.percentile(a, 50)),
+        "p95_ms": float(np.percentile(a, 95)),
+        "p99_ms": float(np.percentile(a, 99)),
+        "max_ms": float(a.max()),
+    }
+
+
+def run_trial(worker, bus, receiver, scenario, combo_gap):
+    """Un disparo de un escenario simple. Devuelve (dirección o None, esperado, recepción, decisión)."""
+    worker.last_action = None
+    start = len(receiver.received)
+    hold = mc.COMBO_HOLD
+    if scenario == "voz":
+        expected = bus.publish("voice", "adelante").wall + hold
+    elif scenario == "gesto":
+        expected = bus.publish("gesture", "mano_arriba").wall + hold
+    elif scenario == "detener":
+        expected = bus.publish("voice", "detener").wall
+    else:  # combo
+        voice = bus.publish("voice", "adelante")
+        time.sleep(combo_gap)
+        gesture = bus.publish("gesture", "mano_arriba")
+        # Si el gesto llega después del HOLD ya salió /adelante: eso es lo que se mide
+        expected = gesture.wall if combo_gap < hold else voice.wall + hold
+    got = _wait_messages(receiver, start, 1, hold + 1.0)
+    if scenario == "combo" and combo_gap >= hold:
+        # El gesto tardío dispara además su propio /saludo: que no caiga en el siguiente disparo
+        _wait_messages(receiver, start, 2, hold + 1.0)
+    # Margen para que no se cuele nada en el siguiente disparo; el jitter evita
+    # alinear siempre los eventos con la misma fase del hilo de envío
+    time.sleep(0.05 + random.uniform(0.0, 0.05))
+    if not got:
+        return None, expected, None, None
+    address, recv, stamp = got[0]
+    return address, expected, recv, stamp
+
+
+def run_burst(worker, bus, receiver, n, interval):
+    """Ráfaga de "detener": mide acciones entregadas por segundo y las suprimidas por el cooldown."""
+    worker.last_action = None
+    start = len(receiver.received)
+    t0 = time.time()
+    for _ in range(n):
+        bus.publish("voice", "detener")
+        time.sleep(interval)
+    duration = time.time() - t0
+    got = _wait_messages(receiver, start, n, 0.5)
+    delivered = len(got)
+    # Con cooldown c y eventos cada `interval` s caben como mucho duration / max(c, interval) + 1
+    ideal = min(n, int(duration // max(mc.ACTION_COOLDOWN, interval)) + 1)
+    return {
+        "injected": n,
+        "delivered": delivered,
+        "suppressed": n - delivered,
+        "expected_delivered": ideal,
+        "duration_s": duration,
+        "actions_per_s": delivered / duration if duration > 0 else 0.0,
+        "events_per_s": n / duration if duration > 0 else 0.0,
+        "transport": _stats([recv - stamp for _, recv, stamp in got if stamp is not None]),
+    }
+
+
+EXPECTED = {"voz": "/adelante", "gesto": "/saludo", "detener": "/detener", "combo": "/adelante_rapido"}
+
+
+def run_config(args, receiver):
+    bus = mc.EventBus()
+    worker = UdpLogicWorker(bus, receiver.address)
+    worker.start()
+    time.sleep(0.1)
+    results = {}
+    for scenario in args.scenarios:
+        if scenario == "rafaga":
+            results[scenario] = run_burst(worker, bus, receiver, args.burst, args.burst_interval)
+            time.sleep(mc.ACTION_COOLDOWN)
+            continue
+        decision, transport, total, addresses = [], [], [], {}
+        t0 = time.perf_counter()
+        for _ in range(args.trials):
+            address, expected, recv, stamp = run_trial(worker, bus, receiver, scenario, args.combo_gap)
+            addresses[address or "perdido"] = addresses.get(address or "perdido", 0) + 1
+            if address is None or stamp is None:
+                continue
+            decision.append(stamp - expected)
+            transport.append(recv - stamp)
+            total.append(recv - expected)
+        elapsed = time.perf_counter() - t0
+        results[scenario] = {
+            "trials": args.trials,
+            "expected_address": EXPECTED[scenario],
+            "hits": addresses.get(EXPECTED[scenario], 0),
+            "addresses": addresses,
+            "actions_per_s": sum(n for a, n in addresses.items() if a != "perdido") / elapsed,
+            "decision": _stats(decision),
+            "transport": _stats(transport),
+            "total": _stats(total),
+        }
+    bus.request_stop()
+    worker.join(timeout=1.0)
+    results["lost_events"] = worker.lost_events
+    return results
+
+
+def _fmt(stats, key):
+    return f"{stats[key]:>9.2f}" if stats else f"{'-':>9}"
+
+
+def print_report(combo_hold, cooldown, results):
+    print(f"\n[COMBO_HOLD={combo_hold:.2f} s, ACTION_COOLDOWN={cooldown:.2f} s]")
+    print(f"{'escenario':<10}{'ok':>7}{'total p50':>11}{'p95':>9}{'p99':>9}{'decisión p95':>14}{'UDP p95':>10}{'acc/s':>8}")
+    for scenario, r in results.items():
+        if scenario == "lost_events" or scenario == "rafaga":
+            continue
+        ok = f"{r['hits']}/{r['trials']}"
+        print(f"{scenario:<10}{ok:>7}{_fmt(r['total'], 'p50_ms'):>11}{_fmt(r['total'], 'p95_ms')}"
+              f"{_fmt(r['total'], 'p99_ms')}{_fmt(r['decision'], 'p95_ms'):>14}{_fmt(r['transport'], 'p95_ms'):>10}"
+              f"{r['actions_per_s']:>8.2f}")
+        if r["hits"] != r["trials"]:
+            print(f"{'':<10}salidas: {r['addresses']}")
+    if "rafaga" in results:
+        b = results["rafaga"]
+        print(f"rafaga    {b['injected']} eventos a {b['events_per_s']:.1f}/s -> {b['delivered']} acciones "
+              f"({b['actions_per_s']:.2f}/s, esperadas ~{b['expected_delivered']}), "
+              f"{b['suppressed']} suprimidas por cooldown")
+    if results.get("lost_events"):
+        print(f"eventos perdidos en el bus: {results['lost_events']}")
+
+
+def _commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latencia extremo a extremo: EventBus -> LogicWorker -> OSC/UDP.")
+    parser.add_argument("--trials", type=int, default=10, help="repeticiones por escenario")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--combo-hold", type=float, nargs="+", default=[mc.COMBO_HOLD], help="valores de COMBO_HOLD (s)")
+    parser.add_argument("--cooldown", type=float, nargs="+", default=[mc.ACTION_COOLDOWN], help="valores de ACTION_COOLDOWN (s)")
+    parser.add_argument("--combo-gap", type=float, default=0.3, help="segundos entre voz y gesto en el combo")
+    parser.add_argument("--burst", type=int, default=50, help="eventos de la ráfaga")
+    parser.add_argument("--burst-interval", type=float, default=0.05, help="separación entre eventos de la ráfaga (s)")
+    parser.add_argument("--json", help="guarda los resultados en este fichero (JSON)")
+    parser.add_argument("--verbose", action="store_true", help="muestra las acciones que imprime el LogicWorker")
+    args = parser.parse_args()
+
+    receiver = OscReceiver().start()
+    runs = []
+    try:
+        for combo_hold, cooldown in itertools.product(args.combo_hold, args.cooldown):
+            mc.COMBO_HOLD = combo_hold
+            mc.ACTION_COOLDOWN = cooldown
+            quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+            with quiet:
+                results = run_config(args, receiver)
+            print_report(combo_hold, cooldown, results)
+            runs.append({"combo_hold": combo_hold, "action_cooldown": cooldown, "scenarios": results})
+    finally:
+        receiver.close()
+
+    if args.json:
+        report = {
+            "benchmark": "multimodal_e2e",
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": {
+                "trials": args.trials,
+                "combo_gap": args.combo_gap,
+                "burst": args.burst,
+                "burst_interval": args.burst_interval,
+                "voice_window": mc.VOICE_WINDOW_SEC,
+                "gesture_window": mc.GESTURE_WINDOW_SEC,
+            },
+            "runs": runs,
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nResultados en {args.json}")
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de latencia del LogicWorker: sondeo cada 50 ms vs. dirigido por eventos.
+
+Inyecta eventos directamente en el EventBus (sin cámara ni micrófono) y mide
+cuánto tarda en salir la acción respecto al instante en que debería salir:
+- "detener": inmediato tras el evento de voz.
+- "adelante" / "saludo": justo al vencer COMBO_HOLD.
+- "adelante_rapido": inmediato tras el segundo evento del combo.
+Además mide el CPU consumido por el hilo de lógica con el bus en reposo.
+
+Uso:
+    python bench_logic.py --trials 10
+"""
+import argparse
+import random
+import statistics
+import threading
+import time
+
+import multimodal_control as mc
+
+
+class RecordingLogicWorker(mc.LogicWorker):
+    """LogicWorker que en vez de enviar OSC anota (acción, instante)."""
+
+    def __init__(self, bus, poll_interval=None):
+        super().__init__(bus, poll_interval=poll_interval)
+        self.fired = []
+        self.fired_event = threading.Event()
+
+    def send_action(self, action: str):
+        self.fired.append((action, time.monotonic()))
+        self.fired_event.set()
+
+
+def _expect(worker, action, timeout):
+    if not worker.fired_event.wait(timeout):
+        return None
+    name, t = worker.fired[-1]
+    return t if name == action else None
+
+
+def run_scenario(worker, bus, scenario):
+    """Ejecuta un escenario y devuelve la latencia (s) respecto al instante esperado."""
+    worker.fired_event.clear()
+    worker.last_action = None
+    if scenario == "detener":
+        bus.set_voice("detener")
+        expected = bus.sent_at["voice"]
+        t = _expect(worker, "detener", 1.0)
+    elif scenario == "adelante":
+        bus.set_voice("adelante")
+        expected = bus.sent_at["voice"] + mc.COMBO_HOLD
+        t = _expect(worker, "adelante", mc.COMBO_HOLD + 1.0)
+    elif scenario == "saludo":
+        bus.set_gesture("mano_arriba")
+        expected = bus.sent_at["gesture"] + mc.COMBO_HOLD
+        t = _expect(worker, "saludo", mc.COMBO_HOLD + 1.0)
+    else:  # combo: voz y, antes del HOLD, el gesto
+        bus.set_voice("adelante")
+        time.sleep(0.3)
+        bus.set_gesture("mano_arriba")
+        expected = bus.sent_at["gesture"]
+        t = _expect(worker, "adelante_rapido", 1.0)
+    # Deja que la lógica consuma el estado antes del siguiente escenario; el
+    # jitter evita que los eventos caigan siempre en la misma fase del sondeo
+    time.sleep(0.1 + random.uniform(0.0, 0.05))
+    return None if t is None else t - expected
+
+
+class TimedBus(mc.EventBus):
+    """EventBus que recuerda el instante (monotónico) del último evento por modalidad."""
+
+    def __init__(self):
+        super().__init__()
+        self.sent_at = {}
+
+    def publish(self, modality, value):
+        event = super().publish(modality, value)
+        self.sent_at[modality] = event.t
+        return event
+
+
+def idle_cpu(poll_interval, seconds):
+    bus = TimedBus()
+    worker = RecordingLogicWorker(bus, poll_interval=poll_interval)
+    cpu = {}
+
+    def measure():
+        # CPU del propio hilo de lógica, medido desde dentro con thread_time
+        t0 = time.thread_time()
+        worker.run()
+        cpu["seconds"] = time.thread_time() - t0
+
+    th = threading.Thread(target=measure, daemon=True)
+    th.start()
+    time.sleep(seconds)
+    bus.request_stop()
+    th.join()
+    return cpu["seconds"]
+
+
+def bench(mode, poll_interval, trials, idle_seconds):
+    bus = TimedBus()
+    worker = RecordingLogicWorker(bus, poll_interval=poll_interval)
+    worker.start()
+    time.sleep(0.1)
+    results = {}
+    for scenario in ("detener", "adelante", "saludo", "combo"):
+        samples = []
+        for _ in range(trials):
+            latency = run_scenario(worker, bus, scenario)
+            if latency is not None:
+                samples.append(latency * 1000.0)
+        results[scenario] = samples
+    bus.request_stop()
+    worker.join(timeout=1.0)
+
+    print(f"\n[{mode}]")
+    print(f"{'escenario':<12}{'n':>4}{'media ms':>11}{'p95 ms':>10}{'máx ms':>10}")
+    for scenario, samples in results.items():
+        if not samples:
+            print(f"{scenario:<12}{0:>4}{'-':>11}{'-':>10}{'-':>10}")
+            continue
+        ordered = sorted(samples)
+        p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+        print(f"{scenario:<12}{len(samples):>4}{statistics.mean(samples):>11.2f}{p95:>10.2f}{max(samples):>10.2f}")
+    cpu = idle_cpu(poll_interval, idle_seconds)
+    print(f"CPU en reposo: {cpu * 1000:.2f} ms en {idle_seconds:.0f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latencia del LogicWorker: sondeo vs. eventos + deadlines.")
+    parser.add_argument("--trials", type=int, default=5, help="repeticiones por escenario")
+    parser.add_argument("--poll", type=float, default=0.05, help="intervalo del modo sondeo (s)")
+    parser.add_argument("--idle", type=float, default=3.0, help="segundos de reposo para medir CPU")
+    args = parser.parse_args()
+
+    bench("sondeo", args.poll, args.trials, args.idle)
+    bench("eventos", None, args.trials, args.idle)
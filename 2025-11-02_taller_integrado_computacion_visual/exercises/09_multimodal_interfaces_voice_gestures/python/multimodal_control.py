@@ -1,30 +1,64 @@
 # -*- coding: utf-8 -*-
+import heapq
+import sys
 import threading
 import time
-from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
+from pathlib import Path
 import cv2
 import mediapipe as mp
+import numpy as np
 import speech_recognition as sr
 import pyttsx3
-from pythonosc import udp_client
+
+# Gramática de comandos, filtros de gestos, envío OSC y calidad adaptativa compartidos con el
+# resto de front-ends (2025-11-26_super_taller_cv/python/mediapipe_voice/: command_grammar.py,
+# gesture_filters.py, osc_sender.py, qos.py)
+sys.path.append(str(Path(__file__).resolve().parents[4] / "2025-11-26_super_taller_cv" / "python" / "mediapipe_voice"))
+from command_grammar import CommandGrammar
+from gesture_filters import OneEuroFilter, MajorityWindow, Hysteresis
+from gestures import landmark_motion, landmarks_roi, roi_input_scale
+from osc_sender import AsyncOscSender
+from qos import QualityController
 
 # =========================
 # CONFIG
 # =========================
 OSC_HOST = "127.0.0.1"
 OSC_PORT = 12000
+OSC_TARGETS = [(OSC_HOST, OSC_PORT)]  # Añade más (host, puerto) para varios consumidores
+OSC_QUEUE_SIZE = 256          # Acciones pendientes de enviar antes de descartar
 
 CAM_INDEX = 0                 # Índice de cámara
 GESTURE_FRAMES_ON = 2         # Nº de frames "ON" requeridos para confirmar gesto
 GESTURE_WINDOW = 6            # Ventana deslizante de verificación
+GESTURE_FRAMES_OFF = 0        # Votos a los que se suelta el gesto (histéresis de la ventana)
 GESTURE_MIN_INTERVAL = 1.0    # Segundos mínimos entre gestos confirmados
+HAND_UP_ON = 0.35             # center_y por debajo de esto = mano arriba (tercio superior aprox)
+HAND_UP_OFF = 0.40            # y no se suelta hasta bajar de aquí (histéresis)
+SMOOTH_MIN_CUTOFF = 1.0       # One-Euro sobre las landmarks: Hz con la mano quieta
+SMOOTH_BETA = 1.0             # One-Euro: aumento del corte con la velocidad
+
+GESTURE_TRACKING = True       # Inferir sobre el recorte de la mano (ROI) en vez del frame completo
+ROI_MARGIN = 0.3              # Margen alrededor del bounding box (fracción del lado)
+ROI_SCALE = 0.5               # Reducción del recorte antes de MediaPipe
+STABILITY_THRESHOLD = 0.01    # Desplazamiento medio normalizado para considerar la mano quieta
+MAX_SKIP_FRAMES = 3           # Frames seguidos sin inferencia con la mano quieta
+REDETECT_EVERY = 30           # Cada N frames se fuerza detección en el frame completo
+
+QOS_ENABLED = True            # Ajustar modelo / resolución / cadencia al tiempo por frame
+QOS_TARGET_FPS = 30.0         # Presupuesto por frame = 1 / fps
+QOS_START_LEVEL = 3           # Nivel inicial en qos.QUALITY_LEVELS ("alto" = modelo 0 a resolución completa)
 
 VOICE_PHRASE_LIMIT = 3.0      # Duración máx. de frase (seg)
 VOICE_TIMEOUT = 1.5           # Timeout para listen no bloqueante
+VOICE_LANGUAGES = ("es-CO", "es-ES")  # Variantes que se consultan en paralelo (gana la primera)
+VOICE_RECOGNIZERS = 2         # Frases que se pueden estar reconociendo a la vez
 VOICE_WINDOW_SEC   = 4.0      # ← antes 2.0
 GESTURE_WINDOW_SEC = 4.0      # ← antes 2.0
 ACTION_COOLDOWN    = 0.8      # ← antes 1.5
+BUS_HISTORY        = 256      # Eventos que guarda cada modalidad en el bus (ring buffer)
 USE_TTS            = False
 DEBUG_LOG = False
 # CONFIG …
@@ -43,6 +77,8 @@ ALLOWED_VOICE = {
     "pausa": "detener",
     "stop": "detener",
 }
+VOICE_FUZZY_EDITS = 0         # Ediciones toleradas al buscar comandos (0 = exacto)
+VOICE_GRAMMAR = CommandGrammar(ALLOWED_VOICE, max_edits=VOICE_FUZZY_EDITS)
 
 # =========================
 # EVENT BUS
@@ -52,43 +88,165 @@ class LastEvent:
     value: str | None
     t: float
 
+
+@dataclass(frozen=True)
+class BusEvent:
+    seq: int          # secuencia dentro de su modalidad (0, 1, 2…)
+    modality: str
+    value: str
+    t: float          # time.monotonic() al publicar
+    wall: float       # time.time() al publicar (para logs / OSC)
+
+
+class ModalityRing:
+    """Ring buffer de un solo productor para una modalidad.
+
+    El productor escribe el slot y después avanza `head`; los lectores no toman
+    ningún lock: leen desde su cursor hasta `head` y comprueban la secuencia de
+    cada slot, así detectan si el productor les dio la vuelta (eventos perdidos).
+    """
+
+    def __init__(self, name: str, capacity: int = BUS_HISTORY):
+        self.name = name
+        self.capacity = capacity
+        self.slots: list[BusEvent | None] = [None] * capacity
+        self.head = 0  # secuencia del próximo evento (= eventos publicados)
+
+    def publish(self, value: str) -> BusEvent:
+        event = BusEvent(self.head, self.name, value, time.monotonic(), time.time())
+        self.slots[event.seq % self.capacity] = event
+        self.head = event.seq + 1
+        return event
+
+    def read_since(self, cursor: int) -> tuple[list[BusEvent], int, int]:
+        """Eventos con seq >= cursor. Devuelve (eventos, nuevo_cursor, perdidos)."""
+        head = self.head
+        start = max(cursor, head - self.capacity)
+        events = []
+        for seq in range(start, head):
+            event = self.slots[seq % self.capacity]
+            if event is not None and event.seq == seq:
+                events.append(event)
+        lost = (start - cursor) + (head - start - len(events))
+        return events, head, lost
+
+    def latest(self) -> BusEvent | None:
+        head = self.head
+        return self.slots[(head - 1) % self.capacity] if head else None
+
+
 class EventBus:
-    def __init__(self):
+    """Bus de eventos con un ring buffer por modalidad.
+
+    - Cada productor publica en su modalidad (voz, gesto, …) sin pisar a los demás.
+    - Cada consumidor guarda sus cursores y lee todo lo nuevo con read_since().
+    - history() da los últimos eventos de una modalidad (combos, diagnóstico).
+    - changed/version solo sirven para despertar a quien espera (LogicWorker).
+    """
+
+    def __init__(self, modalities=("voice", "gesture"), capacity: int = BUS_HISTORY):
+        self.capacity = capacity
+        self.rings: dict[str, ModalityRing] = {m: ModalityRing(m, capacity) for m in modalities}
         self.lock = threading.Lock()
-        self.voice = LastEvent(None, 0.0)
-        self.gesture = LastEvent(None, 0.0)
+        # Avisa a quien espera (LogicWorker) cada vez que llega un evento
+        self.changed = threading.Condition(self.lock)
+        self.version = 0
         self.stop_event = threading.Event()
 
-    def set_voice(self, value: str):
+    def add_modality(self, name: str) -> ModalityRing:
         with self.lock:
-            self.voice = LastEvent(value, time.time())
+            if name not in self.rings:
+                self.rings = {**self.rings, name: ModalityRing(name, self.capacity)}
+            return self.rings[name]
 
-    def set_gesture(self, value: str):
+    def publish(self, modality: str, value: str) -> BusEvent:
+        ring = self.rings.get(modality) or self.add_modality(modality)
+        event = ring.publish(value)
         with self.lock:
-            self.gesture = LastEvent(value, time.time())
+            self.version += 1
+            self.changed.notify_all()
+        return event
+
+    def set_voice(self, value: str):
+        self.publish("voice", value)
+
+    def set_gesture(self, value: str):
+        self.publish("gesture", value)
+
+    def read_since(self, modality: str, cursor: int) -> tuple[list[BusEvent], int, int]:
+        ring = self.rings.get(modality)
+        if ring is None:
+            return [], cursor, 0
+        return ring.read_since(cursor)
+
+    def history(self, modality: str, n: int | None = None) -> list[BusEvent]:
+        ring = self.rings.get(modality)
+        if ring is None:
+            return []
+        n = ring.capacity if n is None else min(n, ring.capacity)
+        return ring.read_since(max(0, ring.head - n))[0]
+
+    def cursors(self) -> dict[str, int]:
+        """Cursores actuales (para empezar a leer solo lo que llegue después)."""
+        return {name: ring.head for name, ring in self.rings.items()}
 
     def snapshot(self):
+        # Último valor y su instante (monotónico) de voz y gesto, como antes
+        v = self.rings["voice"].latest()
+        g = self.rings["gesture"].latest()
+        return (v.value if v else None, v.t if v else 0.0,
+                g.value if g else None, g.t if g else 0.0)
+
+    def wait_for_change(self, seen_version: int, timeout: float | None = None) -> int:
+        """Bloquea hasta que haya un evento posterior a seen_version, se pida parar
+        o venza el timeout. Devuelve la versión actual."""
         with self.lock:
-            return (self.voice.value, self.voice.t, self.gesture.value, self.gesture.t)
+            self.changed.wait_for(
+                lambda: self.version != seen_version or self.stop_event.is_set(),
+                timeout=timeout,
+            )
+            return self.version
 
     def should_stop(self) -> bool:
         return self.stop_event.is_set()
 
     def request_stop(self):
         self.stop_event.set()
+        with self.lock:
+            self.changed.notify_all()
 
 # =========================
 # VOICE WORKER
 # =========================
 class VoiceWorker(threading.Thread):
+    """Captura continua + reconocimiento en paralelo.
+
+    El hilo mantiene abierto un único stream de micrófono y solo corta frases
+    (listen); cada frase se entrega a un pool que consulta todas las variantes
+    de VOICE_LANGUAGES a la vez y se queda con la primera que responda. Así no
+    se pierde lo que se dice mientras se reconoce la frase anterior, y los
+    comandos se publican en el orden en que se hablaron.
+    """
+
     def __init__(self, bus: EventBus):
         super().__init__(daemon=True)
         self.bus = bus
         self.rec = sr.Recognizer()
         self.tts = pyttsx3.init()
-        with sr.Microphone() as source:
+        self.mic = sr.Microphone()
+        with self.mic as source:
             self.rec.adjust_for_ambient_noise(source, duration=1.0)
 
+        self.pool = ThreadPoolExecutor(max_workers=VOICE_RECOGNIZERS, thread_name_prefix="voice")
+        self.lang_pool = ThreadPoolExecutor(
+            max_workers=VOICE_RECOGNIZERS * len(VOICE_LANGUAGES), thread_name_prefix="voice-lang"
+        )
+        # Publicación en orden: resultados que llegan antes que los de frases previas esperan aquí
+        self.publish_lock = threading.Lock()
+        self.next_seq = 0
+        self.next_publish = 0
+        self.done_results = {}
+
     def speak(self, text: str):
         if not USE_TTS:
             return
@@ -98,51 +256,73 @@ class VoiceWorker(threading.Thread):
         except Exception:
             pass
 
+    def recognize(self, audio):
+        # Todas las variantes a la vez; la primera transcripción no vacía gana
+        futures = [
+            self.lang_pool.submit(self.rec.recognize_google, audio, language=lang)
+            for lang in VOICE_LANGUAGES
+        ]
+        for future in as_completed(futures):
+            try:
+                txt = future.result()
+            except Exception:
+                continue
+            if txt:
+                for other in futures:
+                    other.cancel()
+                return txt
+        return None
+
+    def handle_text(self, txt):
+        if not txt:
+            return
+        # Normaliza a comandos permitidos (tildes, mayúsculas, varios comandos por frase)
+        matches = VOICE_GRAMMAR.parse(txt)
+
+        if matches:
+            for m in matches:
+                print(f"🎤 Voz: {m.command}  (raw: «{txt}»)")
+                self.bus.set_voice(m.command)
+            self.speak(f"Comando {matches[-1].command}")
+        else:
+            # Para depurar qué viene
+            print(f"🎤 Voz (sin comando): «{txt}»")
+
+    def on_recognized(self, seq, future):
+        try:
+            txt = None if future.cancelled() else future.result()
+        except Exception as e:
+            print(f"🎤 VoiceWorker error: {e}")
+            txt = None
+        with self.publish_lock:
+            self.done_results[seq] = txt
+            while self.next_publish in self.done_results:
+                self.handle_text(self.done_results.pop(self.next_publish))
+                self.next_publish += 1
+
     def run(self):
         print("🎤 VoiceWorker: listo (di 'adelante' / 'detener').")
         while not self.bus.should_stop():
             try:
-                with sr.Microphone() as source:
-                    audio = self.rec.listen(source, timeout=VOICE_TIMEOUT, phrase_time_limit=VOICE_PHRASE_LIMIT)
-
-                # 1) Intento con es-CO, 2) fallback a es-ES
-                txt = None
-                for lang in ("es-CO", "es-ES"):
-                    try:
-                        txt = self.rec.recognize_google(audio, language=lang)
-                        break
-                    except Exception:
-                        continue
-                if not txt:
-                    continue
-
-                txt = txt.lower().strip()
-                # Normaliza a comandos permitidos
-                cmd = None
-                if txt in ALLOWED_VOICE:
-                    cmd = ALLOWED_VOICE[txt]
-                else:
-                    for k in ALLOWED_VOICE:
-                        if k in txt:
-                            cmd = ALLOWED_VOICE[k]
-                            break
-
-                if cmd:
-                    print(f"🎤 Voz: {cmd}  (raw: «{txt}»)")
-                    self.bus.set_voice(cmd)
-                    self.speak(f"Comando {cmd}")
-                else:
-                    # Para depurar qué viene
-                    print(f"🎤 Voz (sin comando): «{txt}»")
-
-            except sr.WaitTimeoutError:
-                continue
-            except sr.UnknownValueError:
-                continue
+                # Un solo stream abierto mientras dure la sesión; solo se reabre tras un error
+                with self.mic as source:
+                    while not self.bus.should_stop():
+                        try:
+                            audio = self.rec.listen(source, timeout=VOICE_TIMEOUT,
+                                                    phrase_time_limit=VOICE_PHRASE_LIMIT)
+                        except sr.WaitTimeoutError:
+                            continue
+                        seq = self.next_seq
+                        self.next_seq += 1
+                        future = self.pool.submit(self.recognize, audio)
+                        future.add_done_callback(lambda f, seq=seq: self.on_recognized(seq, f))
             except Exception as e:
                 print(f"🎤 VoiceWorker error: {e}")
                 time.sleep(0.2)
 
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.lang_pool.shutdown(wait=False, cancel_futures=True)
+
 
 # =========================
 # GESTURE WORKER (MediaPipe Hands)
@@ -153,57 +333,137 @@ class GestureWorker(threading.Thread):
         self.bus = bus
         self.cap = None
         self.last_emit = 0.0
-        self.hist = deque(maxlen=GESTURE_WINDOW)
-        self.threshold = 0.35  # ← UMBRAL: tercio superior aprox (ajústalo 0.33–0.45)
+        # Filtros en streaming (sin listas por frame): suavizado, votación O(1) e histéresis
+        self.smoother = OneEuroFilter(SMOOTH_MIN_CUTOFF, SMOOTH_BETA)
+        self.votes = MajorityWindow(GESTURE_WINDOW, GESTURE_FRAMES_ON, GESTURE_FRAMES_OFF)
+        self.hand_up = Hysteresis(HAND_UP_ON, HAND_UP_OFF)
+        self.threshold = HAND_UP_ON  # ← UMBRAL: tercio superior aprox (ajústalo 0.33–0.45)
+        # Estado del modo tracking (ROI + salto de frames estables)
+        self.roi = None
+        self.prev_pts = None
+        self.skip_left = 0
+        self.frames_since_full = 0
+        # Calidad adaptativa (el nivel se publica en el bus como modalidad "qos")
+        self.qos = QualityController(QOS_TARGET_FPS, start_level=QOS_START_LEVEL) if QOS_ENABLED else None
+        self.last_pts = None
+        self.since_inference = 0
+        if self.qos is not None:
+            self.qos.on_change(lambda index, level: self.bus.publish("qos", level.name))
+
+    def make_hands(self, model_complexity: int):
+        return mp.solutions.hands.Hands(
+            model_complexity=model_complexity,
+            max_num_hands=1,
+            min_detection_confidence=0.6,
+            min_tracking_confidence=0.5,
+        )
 
-    def hand_center_y(self, lm) -> float:
+    def hand_center_y(self, pts) -> float:
         # Promedio de todas las landmarks (y normalizado 0..1; menor = más alto)
-        return sum(p.y for p in lm) / len(lm)
+        return float(pts[:, 1].mean())
+
+    def detect(self, hands, frame):
+        # Ejecuta MediaPipe (frame completo o ROI reducida) y devuelve landmarks (21, 2)
+        # normalizados al frame completo, o None si no hay mano.
+        h, w = frame.shape[:2]
+        x0, y0, x1, y1 = 0, 0, w, h
+        image = frame
+        scale = self.qos.level.input_scale if self.qos is not None else 1.0
+        if GESTURE_TRACKING and self.roi is not None and self.frames_since_full < REDETECT_EVERY:
+            x0, y0, x1, y1 = self.roi
+            image = frame[y0:y1, x0:x1]
+            scale = roi_input_scale(self.roi, scale * ROI_SCALE)
+            self.frames_since_full += 1
+        else:
+            self.frames_since_full = 0
+        if scale < 1.0:
+            image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        res = hands.process(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+        if not res.multi_hand_landmarks:
+            self.roi = None
+            self.prev_pts = None
+            self.last_pts = None
+            self.skip_left = 0
+            return None
+
+        pts = np.array([(p.x, p.y) for p in res.multi_hand_landmarks[0].landmark], dtype=np.float32)
+        pts *= (x1 - x0, y1 - y0)
+        pts += (x0, y0)
+        pts /= (w, h)
+
+        if GESTURE_TRACKING:
+            motion = None
+            if self.prev_pts is not None:
+                motion = landmark_motion(pts, self.prev_pts)
+            self.skip_left = MAX_SKIP_FRAMES if motion is not None and motion < STABILITY_THRESHOLD else 0
+            self.prev_pts = pts
+            self.roi = landmarks_roi(pts, w, h, ROI_MARGIN)
+        self.last_pts = pts
+        return pts
 
     def run(self):
         print("✋ GestureWorker: inicializando cámara…")
-        mp_hands = mp.solutions.hands
         self.cap = cv2.VideoCapture(CAM_INDEX)
         if not self.cap.isOpened():
             print("❌ No se pudo abrir la cámara.")
             self.bus.request_stop()
             return
 
-        with mp_hands.Hands(
-            model_complexity=0,
-            max_num_hands=1,
-            min_detection_confidence=0.6,
-            min_tracking_confidence=0.5,
-        ) as hands:
+        complexity = self.qos.level.model_complexity if self.qos is not None else 0
+        hands = self.make_hands(complexity)
+        try:
             print("✋ GestureWorker: listo (ESC para salir).")
             while not self.bus.should_stop():
                 ok, frame = self.cap.read()
                 if not ok:
                     continue
+                t0 = time.perf_counter()
                 frame = cv2.flip(frame, 1)
                 h, w = frame.shape[:2]
 
-                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                res = hands.process(rgb)
+                level = self.qos.level if self.qos is not None else None
+                if level is not None and level.model_complexity != complexity:
+                    # Cambio de modelo pedido por el control de calidad
+                    hands.close()
+                    complexity = level.model_complexity
+                    hands = self.make_hands(complexity)
+                    self.roi = None
+                    self.prev_pts = None
+                    self.skip_left = 0
+                detect_every = level.detect_every if level is not None else 1
+
+                if (GESTURE_TRACKING and self.prev_pts is not None and self.skip_left > 0
+                        and self.frames_since_full < REDETECT_EVERY):
+                    # Mano quieta: reutilizamos las últimas landmarks sin inferir
+                    self.skip_left -= 1
+                    self.frames_since_full += 1
+                    self.since_inference += 1
+                    pts = self.prev_pts
+                elif self.since_inference + 1 < detect_every:
+                    # Fuera de cadencia (calidad baja): reutilizamos la última inferencia
+                    self.since_inference += 1
+                    pts = self.last_pts
+                else:
+                    self.since_inference = 0
+                    pts = self.detect(hands, frame)
+                if self.qos is not None:
+                    self.qos.observe(time.perf_counter() - t0)
 
+                now = time.time()
                 center_y = None
-                hand_up_now = False
-
-                if res.multi_hand_landmarks:
-                    hand = res.multi_hand_landmarks[0]
-                    center_y = self.hand_center_y(hand.landmark)
-
-                    # Regla robusta: mano "arriba" si el centro está por encima del umbral
-                    hand_up_now = center_y < self.threshold
+                if pts is not None:
+                    # Suavizado solo para la decisión; ROI y estabilidad usan los crudos
+                    center_y = self.hand_center_y(self.smoother(pts, now))
+                else:
+                    self.smoother.reset()
 
-                # Debounce: mayoría en ventana
-                self.hist.append(1 if hand_up_now else 0)
-                confirmed = sum(self.hist) >= GESTURE_FRAMES_ON
+                # Regla robusta: mano "arriba" con histéresis sobre el centro suavizado
+                hand_up_now = self.hand_up.update(center_y)
 
-                # Rising edge
-                now = time.time()
-                prev_confirmed = sum(list(self.hist)[:-1]) >= GESTURE_FRAMES_ON
-                if confirmed and not prev_confirmed and (now - self.last_emit) > GESTURE_MIN_INTERVAL:
+                # Debounce: mayoría en ventana (conteo incremental) + flanco de subida
+                confirmed, rising = self.votes.push(hand_up_now)
+                if rising and (now - self.last_emit) > GESTURE_MIN_INTERVAL:
                     print("✋ Gesto: mano_arriba (confirmado)")
                     self.bus.set_gesture("mano_arriba")
                     self.last_emit = now
@@ -213,6 +473,11 @@ class GestureWorker(threading.Thread):
                 y_line = int(self.threshold * h)
                 cv2.line(frame, (0, y_line), (w, y_line), (0, 255, 255), 2)
 
+                # ROI de tracking
+                if GESTURE_TRACKING and self.roi is not None:
+                    rx0, ry0, rx1, ry1 = self.roi
+                    cv2.rectangle(frame, (rx0, ry0), (rx1, ry1), (255, 128, 0), 1)
+
                 # Texto estado
                 status = "CONFIRMADO" if confirmed else "buscando"
                 cv2.putText(frame, f"umbral y={self.threshold:.2f}", (10, 25),
@@ -223,11 +488,16 @@ class GestureWorker(threading.Thread):
                 cv2.putText(frame, f"mano_arriba={int(hand_up_now)}  {status}", (10, 85),
                             cv2.FONT_HERSHEY_SIMPLEX, 0.8,
                             (0, 255, 0) if confirmed else (0, 0, 255), 2)
+                if self.qos is not None:
+                    cv2.putText(frame, f"calidad={level.name}  carga={self.qos.state()['load']:.2f}", (10, 115),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 200, 0), 2)
 
                 cv2.imshow("Gestures", frame)
                 if cv2.waitKey(1) & 0xFF == 27:  # ESC
                     self.bus.request_stop()
                     break
+        finally:
+            hands.close()
 
         try:
             self.cap.release()
@@ -240,14 +510,34 @@ class GestureWorker(threading.Thread):
 # LOGIC WORKER
 # =========================
 class LogicWorker(threading.Thread):
-    def __init__(self, bus: EventBus):
+    """Lógica multimodal dirigida por eventos.
+
+    En vez de revisar el bus cada 50 ms, duerme hasta que llega un evento
+    (EventBus.changed) o hasta el próximo vencimiento pendiente: fin del
+    COMBO_HOLD o de la ventana de voz/gesto. Los vencimientos se guardan en
+    un heap, así la acción "simple" sale justo cuando expira el HOLD.
+
+    poll_interval != None recupera el sondeo periódico original (referencia
+    para bench_logic.py).
+    """
+
+    def __init__(self, bus: EventBus, poll_interval: float | None = None):
         super().__init__(daemon=True)
         self.bus = bus
-        self.client = udp_client.SimpleUDPClient(OSC_HOST, OSC_PORT)
+        # Envío asíncrono: la lógica solo encola; bundles + timestamp de decisión
+        self.osc = AsyncOscSender(OSC_TARGETS, queue_size=OSC_QUEUE_SIZE)
         self.last_action = None
         self.last_action_t = 0.0
         self._last_debug = 0.0
         self.combo_lockout_until = 0.0
+        self.poll_interval = poll_interval
+        self.deadlines: list[float] = []  # heap de instantes (time.monotonic()) a re-evaluar
+        self._scheduled: set[float] = set()
+        # Estado propio: qué voz/gesto siguen pendientes de consumir (el bus no se toca)
+        self.cursors = bus.cursors()
+        self.voice = LastEvent(None, 0.0)
+        self.gesture = LastEvent(None, 0.0)
+        self.lost_events = 0
 
 
     def send_action(self, action: str):
@@ -255,72 +545,126 @@ class LogicWorker(threading.Thread):
         if self.last_action == action and (now - self.last_action_t) < ACTION_COOLDOWN:
             return
         print(f"➡️ Acción: {action}")
-        try:
-            self.client.send_message(f"/{action}", 1)
-        except Exception as e:
-            print(f"OSC error: {e}")
+        if not self.osc.send(f"/{action}", 1, timestamp=now):
+            print("OSC: cola llena, acción descartada")
         self.last_action = action
         self.last_action_t = now
 
-    def run(self):
-        print("🧠 LogicWorker: ejecutando lógica multimodal…")
-        while not self.bus.should_stop():
-            v_val, v_t, g_val, g_t = self.bus.snapshot()
-            now = time.time()
-
-            voice_age = now - v_t if v_t else 999
-            gest_age  = now - g_t if g_t else 999
-
-            if now < self.combo_lockout_until:
-                # durante el lockout ignoramos gestos
-                gesture_active = False
-
-
-            voice_active   = v_val is not None and voice_age <= VOICE_WINDOW_SEC
-            gesture_active = g_val is not None and gest_age  <= GESTURE_WINDOW_SEC
-
-            # Debug cada 0.5 s
-            if DEBUG_LOG and (now - self._last_debug > 0.5):
-                print(f"🧪 estado: voice=({voice_active},{v_val},{voice_age:.1f}s)  "
-                    f"gest=({gesture_active},{g_val},{gest_age:.1f}s)")
-                self._last_debug = now
-
-
-            action = None
+    def schedule(self, deadline: float):
+        if deadline not in self._scheduled:
+            self._scheduled.add(deadline)
+            heapq.heappush(self.deadlines, deadline)
+
+    def pull_events(self, now: float):
+        """Lee todo lo publicado desde los cursores y lo aplica en orden de llegada;
+        cada evento se evalúa, así dos comandos seguidos no se pisan."""
+        new_events = []
+        for modality in ("voice", "gesture"):
+            events, self.cursors[modality], lost = self.bus.read_since(modality, self.cursors.get(modality, 0))
+            new_events += events
+            self.lost_events += lost
+        new_events.sort(key=lambda e: e.t)
+        for event in new_events:
+            if event.modality == "voice":
+                self.voice = LastEvent(event.value, event.t)
+            else:
+                self.gesture = LastEvent(event.value, event.t)
+            self.evaluate(now)
+        if not new_events:
+            self.evaluate(now)
+
+    def evaluate(self, now: float):
+        """Aplica las reglas sobre la voz/gesto pendientes y programa los
+        vencimientos que podrían cambiar la decisión."""
+        v_val, v_t, g_val, g_t = self.voice.value, self.voice.t, self.gesture.value, self.gesture.t
+
+        voice_age = now - v_t if v_t else 999
+        gest_age  = now - g_t if g_t else 999
+
+        if now < self.combo_lockout_until:
+            # durante el lockout ignoramos gestos
+            gesture_active = False
+
+
+        voice_active   = v_val is not None and voice_age <= VOICE_WINDOW_SEC
+        gesture_active = g_val is not None and gest_age  <= GESTURE_WINDOW_SEC
+
+        # Debug cada 0.5 s
+        if DEBUG_LOG and (now - self._last_debug > 0.5):
+            print(f"🧪 estado: voice=({voice_active},{v_val},{voice_age:.1f}s)  "
+                f"gest=({gesture_active},{g_val},{gest_age:.1f}s)")
+            self._last_debug = now
+
+
+        action = None
+
+        # ====== 1) Combinada (prioridad máxima) ======
+        if voice_active and gesture_active and v_val == "adelante" and g_val == "mano_arriba":
+            action = "adelante_rapido"
+            self.combo_lockout_until = now + 0.6  # opcional: tregua corta post-combo
+            # Consumimos ambas para no caer luego en "solo gesto" o "solo voz"
+            self.voice = LastEvent(None, 0.0)
+            self.gesture = LastEvent(None, 0.0)
+
+        # ====== 2) Solo VOZ, pero con HOLD para dar chance al gesto ======
+        elif voice_active and not gesture_active:
+            # Si es 'detener', no conviene esperar: aplica inmediato
+            if v_val == "detener":
+                action = "detener"
+                self.voice = LastEvent(None, 0.0)
+            else:
+                # Para 'adelante' esperamos COMBO_HOLD antes de disparar simple
+                if voice_age >= COMBO_HOLD:
+                    action = "adelante"
+                    self.voice = LastEvent(None, 0.0)
+                else:
+                    # Aún "esperando combo": despertamos justo cuando vence el HOLD
+                    self.schedule(v_t + COMBO_HOLD)
 
-            # ====== 1) Combinada (prioridad máxima) ======
-            if voice_active and gesture_active and v_val == "adelante" and g_val == "mano_arriba":
-                action = "adelante_rapido"
-                self.combo_lockout_until = now + 0.6  # opcional: tregua corta post-combo
-                # Consumimos ambas para no caer luego en "solo gesto" o "solo voz"
-                self.bus.set_voice(None)
-                self.bus.set_gesture(None)
+        # ====== 3) Solo GESTO, con HOLD simétrico para dar chance a la voz ======
+        elif gesture_active and not voice_active:
+            if gest_age >= COMBO_HOLD:
+                action = "saludo"  # tu Processing ya maneja /saludo
+                self.gesture = LastEvent(None, 0.0)
+            else:
+                self.schedule(g_t + COMBO_HOLD)
 
-            # ====== 2) Solo VOZ, pero con HOLD para dar chance al gesto ======
-            elif voice_active and not gesture_active:
-                # Si es 'detener', no conviene esperar: aplica inmediato
-                if v_val == "detener":
-                    action = "detener"
-                    self.bus.set_voice(None)
-                else:
-                    # Para 'adelante' esperamos COMBO_HOLD antes de disparar simple
-                    if voice_age >= COMBO_HOLD:
-                        action = "adelante"
-                        self.bus.set_voice(None)
-                    # Si aún no pasó el HOLD, NO dispares nada: estás "esperando combo"
+        # Cuando una ventana expira puede habilitarse otra regla (p.ej. solo gesto)
+        if voice_active and gesture_active:
+            self.schedule(v_t + VOICE_WINDOW_SEC)
+            self.schedule(g_t + GESTURE_WINDOW_SEC)
 
-            # ====== 3) Solo GESTO, con HOLD simétrico para dar chance a la voz ======
-            elif gesture_active and not voice_active:
-                if gest_age >= COMBO_HOLD:
-                    action = "saludo"  # tu Processing ya maneja /saludo
-                    self.bus.set_gesture(None)
-                # Si aún no pasó el HOLD, NO dispares: estás "esperando combo"
+        if action:
+            self.send_action(action)
 
+    def run(self):
+        print("🧠 LogicWorker: ejecutando lógica multimodal…")
+        self.osc.start()
+        try:
+            self.loop()
+        finally:
+            self.osc.close()
 
-            if action:
-                self.send_action(action)
+    def loop(self):
+        if self.poll_interval is not None:
+            while not self.bus.should_stop():
+                self.pull_events(time.monotonic())
+                time.sleep(self.poll_interval)
+            return
 
-            time.sleep(0.05)
+        while not self.bus.should_stop():
+            # La versión se lee antes de evaluar: un evento que llegue mientras
+            # evaluamos nos despierta de inmediato en vez de perderse
+            seen = self.bus.version
+            now = time.monotonic()
+            while self.deadlines and self.deadlines[0] <= now:
+                self._scheduled.discard(heapq.heappop(self.deadlines))
+            self.pull_events(now)
+
+            timeout = self.deadlines[0] - time.monotonic() if self.deadlines else None
+            if timeout is not None and timeout <= 0:
+                continue
+            self.bus.wait_for_change(seen, timeout)
 
 # =========================
 # MAIN
@@ -0,0 +1,274 @@
+"""
+Análisis por lotes de registros EEG (fuera de memoria)
+Descripción:
+    Procesa registros largos (.npy, .raw y EDF) sin cargarlos en RAM: el fichero
+    se abre con memmap y se lee por bloques de CHUNK_WINDOWS ventanas. Para cada
+    ventana de WINDOW_SEC calcula la energía de cada banda EEG (media de los
+    canales, filtros IIR con estado continuo entre bloques), las energías alpha/beta
+    normalizadas y la etiqueta de classify_mental_state, y lo guarda en formato
+    columnar (.npz por defecto; .parquet si hay pyarrow; .csv). Varios ficheros
+    se reparten entre un pool de procesos.
+
+    A diferencia del motor en tiempo real (que reclasifica cada 1.5 s), aquí se
+    etiqueta cada ventana.
+
+Uso:
+    python bci_batch.py sesiones/*.npy --out resultados/ --workers 4
+    python bci_batch.py registro.raw --raw-channels 32 --raw-dtype int16 --fs 500
+    python bci_batch.py --make-demo demo/ --hours 1 --channels 8 --demo-files 4
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+
+from bci_engine import MENTAL_STATES, SAMPLING_FREQ, WINDOW_SEC, EEGGenerator, SignalProcessor
+from eeg_filterbank import FilterBankEngine
+
+CHUNK_WINDOWS = 64          # Ventanas leídas por bloque
+OUTPUT_FORMAT = 'npz'       # 'npz', 'parquet' o 'csv'
+
+
+# ==================== LECTORES ====================
+class ArrayRecording:
+    """Registro en disco con forma (muestras, canales): .npy o binario crudo (.raw)"""
+    def __init__(self, data, fs, channel_names=None):
+        if data.ndim == 1:
+            data = data[:, None]
+        self.data = data
+        self.fs = fs
+        self.n_samples, self.n_channels = data.shape
+        self.channel_names = channel_names or [f"ch{i}" for i in range(self.n_channels)]
+
+    @classmethod
+    def open_npy(cls, path, fs):
+        return cls(np.load(path, mmap_mode='r'), fs)
+
+    @classmethod
+    def open_raw(cls, path, fs, dtype='float32', channels=1):
+        data = np.memmap(path, dtype=dtype, mode='r')
+        usable = data.size - data.size % channels
+        return cls(data[:usable].reshape(-1, channels), fs)
+
+    def read(self, start, stop):
+        """Muestras [start, stop) como (canales, muestras) float64"""
+        return np.asarray(self.data[start:stop], dtype=float).T
+
+
+class EDFRecording:
+    """Lector EDF sencillo (EDF/EDF+ continuo, enteros de 16 bits).
+
+    Solo se usan las señales con la frecuencia de muestreo más común (se
+    descartan las anotaciones); los registros de datos se mapean con memmap y
+    cada read() convierte a unidades físicas solo el tramo pedido.
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            fixed = f.read(256)
+            header_bytes = int(fixed[184:192])
+            n_records = int(fixed[236:244])
+            record_sec = float(fixed[244:252])
+            ns = int(fixed[252:256])
+            fields = f.read(256 * ns)
+
+        def column(offset, width):
+            start = offset * ns
+            return [fields[start + i * width:start + (i + 1) * width].decode('latin-1').strip()
+                    for i in range(ns)]
+
+        labels = column(0, 16)
+        phys_min = np.array(column(16 + 80 + 8, 8), dtype=float)
+        phys_max = np.array(column(16 + 80 + 16, 8), dtype=float)
+        dig_min = np.array(column(16 + 80 + 24, 8), dtype=float)
+        dig_max = np.array(column(16 + 80 + 32, 8), dtype=float)
+        per_record = np.array(column(16 + 80 + 40 + 80, 8), dtype=int)
+
+        record_len = int(per_record.sum())
+        if n_records < 0:  # duración desconocida en la cabecera
+            n_records = (os.path.getsize(path) - header_bytes) // (2 * record_len)
+        self.records = np.memmap(path, dtype='<i2', mode='r', offset=header_bytes,
+                                 shape=(n_records, record_len))
+
+        signals = [i for i, label in enumerate(labels) if label != 'EDF Annotations']
+        spr = np.bincount(per_record[signals]).argmax()
+        self.channels = [i for i in signals if per_record[i] == spr]
+        offsets = np.concatenate(([0], np.cumsum(per_record)))
+        self.columns = np.concatenate([np.arange(offsets[i], offsets[i] + spr) for i in self.channels])
+        self.spr = int(spr)
+        self.fs = spr / record_sec
+        self.n_channels = len(self.channels)
+        self.n_samples = n_records * self.spr
+        self.channel_names = [labels[i] for i in self.channels]
+        sel = np.array(self.channels)
+        self.gain = ((phys_max[sel] - phys_min[sel]) / (dig_max[sel] - dig_min[sel]))[:, None]
+        self.offset = (phys_min[sel] - dig_min[sel] * self.gain[:, 0])[:, None]
+
+    def read(self, start, stop):
+        r0, r1 = start // self.spr, -(-stop // self.spr)
+        digital = self.records[r0:r1][:, self.columns]
+        digital = digital.reshape(r1 - r0, self.n_channels, self.spr).transpose(1, 0, 2)
+        block = digital.reshape(self.n_channels, -1) * self.gain + self.offset
+        skip = start - r0 * self.spr
+        return block[:, skip:skip + (stop - start)]
+
+
+def open_recording(path, fs=SAMPLING_FREQ, raw_dtype='float32', raw_channels=1):
+    suffix = Path(path).suffix.lower()
+    if suffix == '.npy':
+        return ArrayRecording.open_npy(path, fs)
+    if suffix == '.raw':
+        return ArrayRecording.open_raw(path, fs, raw_dtype, raw_channels)
+    if suffix == '.edf':
+        return EDFRecording(path)
+    raise ValueError(f"unsupported recording format: {path}")
+
+
+# ==================== SALIDA COLUMNAR ====================
+def write_columns(path, columns, fmt=OUTPUT_FORMAT):
+    """Guarda {nombre: array 1-D} en `path` + extensión del formato; devuelve la ruta escrita"""
+    path = Path(f"{path}.{fmt}")
+    if fmt == 'npz':
+        np.savez(path, **columns)
+    elif fmt == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        pq.write_table(pa.table({name: np.asarray(col) for name, col in columns.items()}), path)
+    elif fmt == 'csv':
+        names = list(columns)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(','.join(names) + '\n')
+            for row in zip(*(columns[name] for name in names)):
+                f.write(','.join(str(v) for v in row) + '\n')
+    else:
+        raise ValueError("fmt must be 'npz', 'parquet' or 'csv'")
+    return path
+
+
+# ==================== ANÁLISIS ====================
+def analyze_recording(path, out_dir, fs=SAMPLING_FREQ, window_sec=WINDOW_SEC, raw_dtype='float32',
+                      raw_channels=1, fmt=OUTPUT_FORMAT):
+    """Analiza un registro por bloques y escribe sus columnas. Devuelve un resumen."""
+    t0 = time.perf_counter()
+    recording = open_recording(path, fs, raw_dtype, raw_channels)
+    fs = recording.fs
+    window = int(window_sec * fs)
+    n_windows = recording.n_samples // window
+    engine = FilterBankEngine(fs, method='iir')
+    if 'alpha' not in engine.band_names or 'beta' not in engine.band_names:
+        raise ValueError(f"fs={fs} Hz is too low for the alpha/beta bands the classifier needs")
+    alpha_i, beta_i = engine.band_names.index('alpha'), engine.band_names.index('beta')
+
+    energies = np.empty((n_windows, len(engine.band_names)))
+    for w0 in range(0, n_windows, CHUNK_WINDOWS):
+        w1 = min(n_windows, w0 + CHUNK_WINDOWS)
+        block = recording.read(w0 * window, w1 * window)
+        # (ventanas, canales, bandas) -> media de canales
+        energies[w0:w1] = engine.iir_powers(block, window=window).mean(axis=1)
+
+    total = energies[:, alpha_i] + energies[:, beta_i]
+    safe = np.where(total > 0, total, 1.0)
+    alpha_norm = np.where(total > 0, energies[:, alpha_i] / safe, 0.5)
+    beta_norm = np.where(total > 0, energies[:, beta_i] / safe, 0.5)
+    states = np.array([SignalProcessor.classify_state(a, b) for a, b in zip(alpha_norm, beta_norm)], dtype=np.int8)
+
+    columns = {'t_start': np.arange(n_windows) * window_sec}
+    for i, band in enumerate(engine.band_names):
+        columns[band] = energies[:, i]
+    columns['alpha_norm'] = alpha_norm
+    columns['beta_norm'] = beta_norm
+    columns['state'] = states
+    columns['label'] = np.array([MENTAL_STATES[s][0] for s in states])
+
+    out = write_columns(Path(out_dir) / (Path(path).stem + '.bands'), columns, fmt)
+    elapsed = time.perf_counter() - t0
+    signal_sec = n_windows * window_sec
+    return {
+        'file': str(path),
+        'output': str(out),
+        'channels': recording.n_channels,
+        'windows': n_windows,
+        'signal_sec': signal_sec,
+        'elapsed_sec': elapsed,
+        'speedup': signal_sec / elapsed if elapsed > 0 else float('inf'),
+        'states': np.bincount(states, minlength=len(MENTAL_STATES)).tolist(),
+    }
+
+
+def analyze_many(paths, out_dir, workers=None, **kwargs):
+    """Reparte los ficheros entre un pool de procesos; devuelve los resúmenes a medida que terminan"""
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(analyze_recording, p, out_dir, **kwargs): p for p in paths}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as exc:
+                yield {'file': str(futures[future]), 'error': repr(exc)}
+
+
+# ==================== DEMO ====================
+def make_demo(out_dir, files, hours, channels, fs=SAMPLING_FREQ, chunk_sec=60):
+    """Escribe registros .npy sintéticos por bloques (sin tenerlos enteros en memoria)"""
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    n = int(hours * 3600 * fs)
+    chunk = int(chunk_sec * fs)
+    modes = ('normal', 'relaxed', 'active')
+    paths = []
+    for k in range(files):
+        path = Path(out_dir) / f"demo_{k:02d}.npy"
+        data = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=(n, channels))
+        gen = EEGGenerator(fs)
+        for start in range(0, n, chunk):
+            # El modo cambia cada bloque para que haya de todos los estados
+            for _ in range(int(chunk_sec * 30)):
+                gen.update_amplitudes(modes[(start // chunk + k) % len(modes)])
+            t = np.arange(start, min(n, start + chunk)) / fs
+            for c in range(channels):
+                data[start:start + len(t), c] = gen.generate_signal(t)
+        data.flush()
+        del data
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Análisis por lotes de registros EEG fuera de memoria.")
+    parser.add_argument("files", nargs="*", help="registros .npy (muestras, canales), .raw o .edf")
+    parser.add_argument("--out", default="bci_batch_out", help="carpeta de salida")
+    parser.add_argument("--workers", type=int, default=None, help="procesos (por defecto, núcleos)")
+    parser.add_argument("--fs", type=float, default=SAMPLING_FREQ, help="Hz para .npy/.raw (EDF lo trae)")
+    parser.add_argument("--window", type=float, default=WINDOW_SEC, help="segundos por ventana")
+    parser.add_argument("--raw-dtype", default="float32")
+    parser.add_argument("--raw-channels", type=int, default=1)
+    parser.add_argument("--format", choices=("npz", "parquet", "csv"), default=OUTPUT_FORMAT)
+    parser.add_argument("--make-demo", metavar="DIR", help="genera registros sintéticos en DIR y los analiza")
+    parser.add_argument("--hours", type=float, default=1.0, help="duración de cada registro de demo")
+    parser.add_argument("--channels", type=int, default=8, help="canales de los registros de demo")
+    parser.add_argument("--demo-files", type=int, default=4, help="registros de demo")
+    args = parser.parse_args()
+
+    files = list(args.files)
+    if args.make_demo:
+        print(f"Generando {args.demo_files} registros de {args.hours:g} h x {args.channels} canales en {args.make_demo}…")
+        files += [str(p) for p in make_demo(args.make_demo, args.demo_files, args.hours, args.channels, int(args.fs))]
+    if not files:
+        parser.error("no input files")
+
+    t0 = time.perf_counter()
+    total_signal = 0.0
+    for summary in analyze_many(files, args.out, args.workers, fs=args.fs, window_sec=args.window,
+                                raw_dtype=args.raw_dtype, raw_channels=args.raw_channels, fmt=args.format):
+        if 'error' in summary:
+            print(f"❌ {summary['file']}: {summary['error']}")
+            continue
+        total_signal += summary['signal_sec']
+        states = ", ".join(f"{label} {n}" for (label, _, _), n in zip(MENTAL_STATES, summary['states']))
+        print(f"✔ {summary['file']}: {summary['windows']} ventanas x {summary['channels']} canales "
+              f"en {summary['elapsed_sec']:.1f} s ({summary['speedup']:.0f}x tiempo real) -> {summary['output']}")
+        print(f"    {states}")
+    wall = time.perf_counter() - t0
+    print(f"\nTotal: {total_signal / 3600:.2f} h de señal en {wall:.1f} s ({total_signal / wall:.0f}x tiempo real)")
@@ -0,0 +1,464 @@
+"""
+Motor BCI sin interfaz (EEG sintético, filtrado y clasificación)
+Descripción:
+    Generación de EEG sintético, filtrado pasa banda en streaming, energía por
+    banda y clasificación del estado mental, sin depender de pygame.
+    run_engine() corre en su propio proceso al ritmo de la señal y publica cada
+    actualización en un anillo de memoria compartida (EngineRing) que la interfaz
+    lee a su ritmo. Ejecutado como script hace un benchmark sin pantalla.
+"""
+
+import argparse
+import time
+from functools import lru_cache
+from multiprocessing import shared_memory
+
+import numpy as np
+from scipy.signal import butter, sosfilt, sosfilt_zi
+
+from eeg_filterbank import EEG_BANDS, FilterBankEngine
+
+# Parámetros EEG
+SAMPLING_FREQ = 250  # Hz
+WINDOW_SEC = 1.0     # Ventana deslizante para la energía de cada banda
+
+# Motor
+ENGINE_UPDATE_HZ = 125      # Bloques procesados por segundo (2 muestras por bloque a 250 Hz)
+AMPLITUDE_UPDATE_HZ = 30    # Ritmo de deriva de amplitudes (el de la interfaz original)
+CLASSIFY_INTERVAL = 1.5     # Segundos entre clasificaciones del estado mental
+RING_CAPACITY = 1024        # Actualizaciones que guarda el anillo compartido
+
+# Colores de cada estado mental
+ALPHA_COLOR = (0, 150, 255)
+BETA_COLOR = (255, 60, 60)
+BALANCED_COLOR = (255, 215, 0)
+
+# Estados mentales: código -> (etiqueta, color, radio del círculo)
+MENTAL_STATES = (
+    ("Equilibrado", BALANCED_COLOR, 105),
+    ("Relajado (Alpha)", ALPHA_COLOR, 140),
+    ("Activo (Beta)", BETA_COLOR, 70),
+)
+MODES = ('normal', 'relaxed', 'active')
+
+# ==================== FILTROS ====================
+@lru_cache(maxsize=None)
+def butter_bandpass(lowcut, highcut, fs, order=4):
+    """Crea un filtro pasa banda Butterworth en secciones de segundo orden (SOS).
+    El diseño se cachea: cada banda se diseña una sola vez."""
+    nyq = 0.5 * fs
+    low = lowcut / nyq
+    high = highcut / nyq
+    return butter(order, [low, high], btype='band', output='sos')
+
+def apply_bandpass_filter(data, lowcut, highcut, fs):
+    """Aplica filtro pasa banda a una ventana completa (estado inicial en cero)"""
+    return sosfilt(butter_bandpass(lowcut, highcut, fs), data)
+
+class BandFilterBank:
+    """Banco de filtros pasa banda en streaming.
+
+    Cada banda se diseña una vez (SOS) y guarda su estado `zi` entre bloques,
+    así que process() solo filtra las muestras nuevas y la salida es continua
+    (sin el transitorio de arrancar desde cero en cada ventana).
+    """
+    def __init__(self, bands, fs, order=4):
+        self.fs = fs
+        self.bands = dict(bands)
+        self.sos = {name: butter_bandpass(low, high, fs, order) for name, (low, high) in self.bands.items()}
+        self.zi = {}
+
+    def reset(self):
+        """Olvida el estado de los filtros (p.ej. al cambiar de fuente de señal)"""
+        self.zi = {}
+
+    def process(self, chunk):
+        """Filtra un bloque de muestras nuevas; devuelve {banda: bloque filtrado}"""
+        chunk = np.asarray(chunk, dtype=float)
+        out = {}
+        if chunk.size == 0:
+            return {name: chunk for name in self.sos}
+        for name, sos in self.sos.items():
+            if name not in self.zi:
+                # Estado estacionario para el primer valor: evita el escalón inicial
+                self.zi[name] = sosfilt_zi(sos) * chunk[0]
+            out[name], self.zi[name] = sosfilt(sos, chunk, zi=self.zi[name])
+        return out
+
+# ==================== BUFFERS ====================
+class RingBuffer:
+    """Buffer circular preasignado: extend() cuesta O(muestras nuevas)"""
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = np.zeros(capacity)
+        self.pos = 0
+        self.count = 0
+
+    def extend(self, values):
+        """Escribe las muestras nuevas y devuelve las que quedaron fuera de la ventana"""
+        values = np.asarray(values, dtype=float)
+        n = len(values)
+        if n >= self.capacity:
+            evicted = np.concatenate((self.view(), values[:-self.capacity]))
+            self.data[:] = values[-self.capacity:]
+            self.pos = 0
+            self.count = self.capacity
+            return evicted
+        free = self.capacity - self.count
+        idx = (self.pos + np.arange(n)) % self.capacity
+        evicted = self.data[idx[free:]].copy() if n > free else self.data[:0]
+        self.data[idx] = values
+        self.pos = (self.pos + n) % self.capacity
+        self.count = min(self.capacity, self.count + n)
+        return evicted
+
+    def view(self):
+        """Contenido de la más antigua a la más reciente (copia)"""
+        start = (self.pos - self.count) % self.capacity
+        return np.roll(self.data, -start)[:self.count]
+
+class RunningEnergy:
+    """Energía media (x²) sobre una ventana deslizante con suma acumulada.
+
+    Cada update() suma los cuadrados nuevos y resta los que salen de la ventana;
+    la suma se recalcula entera cada `capacity` muestras para que no derive.
+    """
+    def __init__(self, window_size):
+        self.squares = RingBuffer(window_size)
+        self.total = 0.0
+        self._since_resync = 0
+
+    def update(self, block):
+        sq = np.square(block)
+        evicted = self.squares.extend(sq)
+        self._since_resync += len(sq)
+        if self._since_resync >= self.squares.capacity:
+            self.total = float(self.squares.data[:self.squares.count].sum())
+            self._since_resync = 0
+        else:
+            self.total += float(sq.sum() - evicted.sum())
+        return self.energy
+
+    @property
+    def energy(self):
+        return max(self.total, 0.0) / self.squares.count if self.squares.count else 0.0
+
+# ==================== GENERACIÓN DE SEÑAL EEG ====================
+class EEGGenerator:
+    def __init__(self, fs=SAMPLING_FREQ):
+        self.fs = fs
+        self.alpha_amp = 1.0
+        self.beta_amp = 0.8
+        self.noise_level = 0.2
+        self.sample_index = 0  # Muestras emitidas por stream()
+        
+    def generate_signal(self, t):
+        """Genera señal EEG sintética con componentes alpha, beta y ruido"""
+        alpha_component = self.alpha_amp * np.sin(2 * np.pi * 10 * t)
+        beta_component = self.beta_amp * np.sin(2 * np.pi * 20 * t)
+        noise = self.noise_level * np.random.randn(len(t))
+        
+        return alpha_component + beta_component + noise
+    
+    def stream(self, elapsed, max_samples=None):
+        """Emite solo las muestras transcurridas hasta `elapsed` segundos (eje de tiempo
+        continuo). Si el retraso supera max_samples, se salta hasta las más recientes."""
+        target = int(elapsed * self.fs)
+        if max_samples is not None and target - self.sample_index > max_samples:
+            self.sample_index = target - max_samples
+        t = np.arange(self.sample_index, target) / self.fs
+        self.sample_index = max(self.sample_index, target)
+        return self.generate_signal(t)
+    
+    def update_amplitudes(self, mode='normal'):
+        """Actualiza amplitudes según el modo de simulación"""
+        if mode == 'relaxed':
+            self.alpha_amp = min(1.8, self.alpha_amp + 0.05)
+            self.beta_amp = max(0.3, self.beta_amp - 0.02)
+        elif mode == 'active':
+            self.beta_amp = min(1.8, self.beta_amp + 0.05)
+            self.alpha_amp = max(0.3, self.alpha_amp - 0.02)
+        else:  # normal
+            # Variaciones aleatorias pequeñas
+            self.alpha_amp += np.random.uniform(-0.01, 0.01)
+            self.beta_amp += np.random.uniform(-0.01, 0.01)
+            self.alpha_amp = np.clip(self.alpha_amp, 0.5, 1.5)
+            self.beta_amp = np.clip(self.beta_amp, 0.5, 1.5)
+
+# ==================== PROCESAMIENTO DE SEÑALES ====================
+class SignalProcessor:
+    def __init__(self, fs, window_sec=WINDOW_SEC):
+        self.fs = fs
+        self.alpha_range = EEG_BANDS['alpha']
+        self.beta_range = EEG_BANDS['beta']
+        self.window_size = int(window_sec * fs)
+        self.engines = {}  # FilterBankEngine multicanal por método, creados al primer uso
+        self.filter_bank = BandFilterBank({'alpha': self.alpha_range, 'beta': self.beta_range}, fs)
+        self.band_energy = {name: RunningEnergy(self.window_size) for name in self.filter_bank.bands}
+    
+    def extract_band_energy(self, signal, band_type):
+        """Extrae y calcula la energía de una banda específica (ventana suelta, sin estado)"""
+        if band_type == 'alpha':
+            filtered = apply_bandpass_filter(signal, *self.alpha_range, self.fs)
+        elif band_type == 'beta':
+            filtered = apply_bandpass_filter(signal, *self.beta_range, self.fs)
+        else:
+            raise ValueError("Band type must be 'alpha' or 'beta'")
+        
+        energy = np.mean(filtered ** 2)
+        return energy, filtered
+    
+    def band_powers(self, block, method='welch'):
+        """Potencias delta..gamma de un bloque (canales, muestras) en una sola pasada.
+        Devuelve (array (canales, bandas), nombres de banda)."""
+        if method not in self.engines:
+            self.engines[method] = FilterBankEngine(self.fs, method=method, nperseg=self.window_size)
+        engine = self.engines[method]
+        return engine.band_powers(block), engine.band_names
+    
+    def update(self, new_samples):
+        """Procesa solo las muestras nuevas: las filtra (con estado) y actualiza
+        la energía deslizante de cada banda.
+        Devuelve {banda: energía}; el coste es proporcional a len(new_samples)."""
+        return {
+            name: self.band_energy[name].update(block)
+            for name, block in self.filter_bank.process(new_samples).items()
+        }
+    
+    @staticmethod
+    def classify_state(alpha_energy, beta_energy):
+        """Código del estado mental (índice en MENTAL_STATES) según el ratio alpha/beta"""
+        ratio = alpha_energy / (beta_energy + 1e-6)
+        
+        if ratio > 1.3:
+            return 1
+        elif ratio < 0.7:
+            return 2
+        else:
+            return 0
+    
+    def classify_mental_state(self, alpha_energy, beta_energy):
+        """Clasifica el estado mental basado en las energías de las bandas"""
+        return MENTAL_STATES[self.classify_state(alpha_energy, beta_energy)]
+
+
+# ==================== MEMORIA COMPARTIDA ====================
+RECORD_DTYPE = np.dtype([
+    ('seq', 'i8'),          # número de actualización (0, 1, 2…)
+    ('t', 'f8'),            # segundos de señal desde el arranque del motor
+    ('alpha', 'f8'),        # energía de cada banda sobre la ventana
+    ('beta', 'f8'),
+    ('alpha_norm', 'f8'),   # energías normalizadas (alpha + beta = 1)
+    ('beta_norm', 'f8'),
+    ('alpha_amp', 'f8'),    # amplitudes actuales del generador
+    ('beta_amp', 'f8'),
+    ('state', 'i8'),        # índice en MENTAL_STATES
+    ('samples', 'i8'),      # muestras nuevas en esta actualización
+    ('sample_index', 'i8'), # muestras generadas en total
+    ('proc_us', 'f8'),      # coste de procesarlas (µs)
+])
+_HEAD, _MODE, _STOP, _CAPACITY = range(4)
+_HEADER_BYTES = 64
+
+
+class EngineRing:
+    """Anillo de un solo productor (el motor) en memoria compartida.
+
+    El motor escribe el registro completo y después avanza `head`; los lectores
+    no toman ningún lock: latest() copia el último registro y comprueba su
+    secuencia, read_since() devuelve todo lo nuevo desde un cursor (y cuántos
+    registros se perdieron si el lector se quedó atrás más de `capacity`).
+    La cabecera lleva además el modo de simulación (lo escribe la interfaz) y
+    la orden de parada.
+    """
+    def __init__(self, name=None, capacity=RING_CAPACITY, create=False):
+        size = _HEADER_BYTES + capacity * RECORD_DTYPE.itemsize
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        self.header = np.ndarray((_HEADER_BYTES // 8,), dtype=np.int64, buffer=self.shm.buf)
+        if create:
+            self.header[:] = 0
+            self.header[_CAPACITY] = capacity
+        self.capacity = int(self.header[_CAPACITY])
+        self.records = np.ndarray((self.capacity,), dtype=RECORD_DTYPE, buffer=self.shm.buf,
+                                  offset=_HEADER_BYTES)
+
+    @classmethod
+    def create(cls, capacity=RING_CAPACITY):
+        return cls(capacity=capacity, create=True)
+
+    @classmethod
+    def attach(cls, name):
+        return cls(name=name)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def head(self):
+        return int(self.header[_HEAD])
+
+    @property
+    def mode(self):
+        return int(self.header[_MODE])
+
+    @mode.setter
+    def mode(self, value):
+        self.header[_MODE] = value
+
+    def request_stop(self):
+        self.header[_STOP] = 1
+
+    def should_stop(self):
+        return bool(self.header[_STOP])
+
+    def publish(self, **fields):
+        seq = self.head
+        record = self.records[seq % self.capacity]
+        for key, value in fields.items():
+            record[key] = value
+        record['seq'] = seq
+        self.header[_HEAD] = seq + 1
+
+    def latest(self):
+        """Copia del último registro publicado (None si aún no hay ninguno)"""
+        for _ in range(3):
+            head = self.head
+            if head == 0:
+                return None
+            record = self.records[(head - 1) % self.capacity].copy()
+            # Válido si es el que esperábamos y el motor no ha dado la vuelta mientras copiábamos
+            if record['seq'] == head - 1 and self.head - head < self.capacity - 1:
+                return record
+        return None
+
+    def read_since(self, cursor):
+        """(registros nuevos desde `cursor`, nuevo cursor, perdidos)"""
+        head = self.head
+        lost = max(0, head - cursor - (self.capacity - 1))
+        start = cursor + lost
+        records = self.records[np.arange(start, head) % self.capacity].copy()
+        # Descarta lo que el motor haya sobrescrito durante la copia
+        records = records[records['seq'] >= self.head - (self.capacity - 1)]
+        return records, head, lost + (head - start - len(records))
+
+    def close(self):
+        self.header = None
+        self.records = None
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+# ==================== MOTOR ====================
+def run_engine(ring_name, fs=SAMPLING_FREQ, update_hz=ENGINE_UPDATE_HZ, duration=None, realtime=True):
+    """Bucle del motor: genera, filtra y clasifica al ritmo de la señal y publica
+    cada bloque en el anillo. Con realtime=False usa un reloj simulado y corre
+    tan rápido como puede (para benchmarks)."""
+    ring = EngineRing.attach(ring_name)
+    eeg_gen = EEGGenerator(fs)
+    processor = SignalProcessor(fs)
+    period = 1.0 / update_hz
+    amp_period = 1.0 / AMPLITUDE_UPDATE_HZ
+    
+    state = 0
+    alpha_norm = beta_norm = 0.5
+    next_amp = 0.0
+    last_classify = 0.0
+    start = time.perf_counter()
+    k = 0
+    try:
+        while not ring.should_stop():
+            elapsed = time.perf_counter() - start if realtime else k * period
+            if duration is not None and elapsed >= duration:
+                break
+            
+            # Deriva de amplitudes al ritmo original, independiente de update_hz
+            if elapsed - next_amp > 1.0:
+                next_amp = elapsed
+            while elapsed >= next_amp:
+                eeg_gen.update_amplitudes(MODES[ring.mode])
+                next_amp += amp_period
+            
+            c0 = time.perf_counter()
+            samples = eeg_gen.stream(elapsed, max_samples=processor.window_size)
+            energies = processor.update(samples)
+            alpha, beta = energies['alpha'], energies['beta']
+            total = alpha + beta
+            if total > 0:
+                alpha_norm, beta_norm = alpha / total, beta / total
+            if elapsed - last_classify > CLASSIFY_INTERVAL:
+                state = processor.classify_state(alpha_norm, beta_norm)
+                last_classify = elapsed
+            proc_us = (time.perf_counter() - c0) * 1e6
+            
+            ring.publish(t=elapsed, alpha=alpha, beta=beta, alpha_norm=alpha_norm, beta_norm=beta_norm,
+                         alpha_amp=eeg_gen.alpha_amp, beta_amp=eeg_gen.beta_amp, state=state,
+                         samples=len(samples), sample_index=eeg_gen.sample_index, proc_us=proc_us)
+            k += 1
+            if realtime:
+                time.sleep(max(0.0, start + k * period - time.perf_counter()))
+    finally:
+        ring.close()
+
+
+def _bench(seconds, realtime, reader_hz):
+    import multiprocessing as mp
+    
+    ring = EngineRing.create()
+    try:
+        if realtime:
+            # Motor en su propio proceso; este proceso lee como lo haría la interfaz
+            engine = mp.get_context('spawn').Process(target=run_engine, args=(ring.name,),
+                                                     kwargs={'duration': seconds}, daemon=True)
+            engine.start()
+            cursor, lost, records, reads = 0, 0, [], 0
+            while engine.is_alive():
+                ring.latest()
+                reads += 1
+                new, cursor, dropped = ring.read_since(cursor)
+                records.append(new)
+                lost += dropped
+                time.sleep(1.0 / reader_hz)
+            engine.join()
+            new, cursor, dropped = ring.read_since(cursor)
+            records.append(new)
+            lost += dropped
+            records = np.concatenate(records)
+            wall = seconds
+        else:
+            t0 = time.perf_counter()
+            run_engine(ring.name, duration=seconds, realtime=False)
+            wall = time.perf_counter() - t0
+            # Nadie lee mientras corre: el anillo solo conserva los últimos registros
+            records, cursor, lost = ring.read_since(0)
+            reads = 0
+        
+        n = ring.head
+        last = ring.latest()
+        samples = int(last['sample_index']) if last is not None else 0
+        print(f"{'tiempo real' if realtime else 'máxima velocidad'}: {seconds:.1f} s de señal en {wall:.2f} s "
+              f"({seconds / wall:.1f}x tiempo real)")
+        print(f"  actualizaciones: {n} ({n / wall:.1f}/s), muestras: {samples} ({samples / wall:.0f}/s)")
+        if len(records):
+            proc = records['proc_us']
+            print(f"  coste por actualización: p50 {np.percentile(proc, 50):.0f} µs, p99 {np.percentile(proc, 99):.0f} µs")
+            counts = np.bincount(records['state'], minlength=len(MENTAL_STATES))
+            print("  estados: " + ", ".join(f"{label} {c}" for (label, _, _), c in zip(MENTAL_STATES, counts)))
+        if realtime:
+            print(f"  lector a {reader_hz} Hz: {reads} lecturas, {lost} registros perdidos")
+        else:
+            print(f"  coste y estados de los últimos {len(records)} registros ({lost} sobrescritos en el anillo)")
+    finally:
+        ring.close()
+        ring.unlink()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Motor BCI sin pantalla: benchmark del procesamiento.")
+    parser.add_argument("--seconds", type=float, default=5.0, help="segundos de señal a procesar")
+    parser.add_argument("--fast", action="store_true", help="reloj simulado, tan rápido como se pueda")
+    parser.add_argument("--reader-hz", type=float, default=30.0, help="ritmo del lector (como la interfaz)")
+    args = parser.parse_args()
+    _bench(args.seconds, not args.fast, args.reader_hz)
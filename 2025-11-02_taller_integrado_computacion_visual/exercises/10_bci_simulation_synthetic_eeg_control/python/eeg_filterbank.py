@@ -0,0 +1,196 @@
+"""
+Banco de filtros EEG multicanal y multibanda (vectorizado)
+Descripción:
+    Calcula la potencia de delta/theta/alpha/beta/gamma para un bloque
+    (canales, muestras) en una sola pasada:
+    - 'welch': FFT por segmentos con ventana y máscaras de frecuencia precalculadas.
+    - 'iir':   filtros Butterworth en SOS por banda, vectorizados sobre canales,
+               con estado zi entre bloques (para streaming).
+    Ejecutado como script hace un benchmark de canales x bandas por segundo.
+"""
+
+import argparse
+import time
+import warnings
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import butter, get_window, lfilter, sosfilt, sosfilt_zi
+
+# Bandas clásicas de EEG (Hz)
+EEG_BANDS = {
+    'delta': (1, 4),
+    'theta': (4, 8),
+    'alpha': (8, 12),
+    'beta': (13, 30),
+    'gamma': (30, 45),
+}
+
+# Borde superior máximo de una banda, como fracción de Nyquist (butter exige < 1)
+MAX_NYQUIST_FRACTION = 0.95
+
+
+def fit_bands_to_nyquist(bands, fs):
+    """Ajusta las bandas a lo que fs puede representar.
+
+    Una banda que cruza el límite se recorta a MAX_NYQUIST_FRACTION * Nyquist y una
+    que empieza por encima se descarta, avisando en ambos casos. Si no queda
+    ninguna banda lanza ValueError.
+    """
+    top = MAX_NYQUIST_FRACTION * 0.5 * fs
+    fitted, clipped, dropped = {}, [], []
+    for name, (lo, hi) in bands.items():
+        if lo >= top:
+            dropped.append(name)
+        elif hi > top:
+            fitted[name] = (lo, top)
+            clipped.append(name)
+        else:
+            fitted[name] = (lo, hi)
+    if not fitted:
+        raise ValueError(f"fs={fs} Hz is too low for every band (Nyquist {0.5 * fs:g} Hz)")
+    if clipped or dropped:
+        warnings.warn(f"fs={fs} Hz: bands above {top:g} Hz clipped {clipped}, dropped {dropped}",
+                      stacklevel=3)
+    return fitted
+
+
+class FilterBankEngine:
+    """Potencia por banda para bloques (canales, muestras).
+
+    Todo lo que depende solo de fs / tamaño de segmento (ventana, escala,
+    máscaras de banda, diseños SOS) se calcula una vez en el constructor.
+    Las bandas se ajustan a Nyquist con fit_bands_to_nyquist(), así que
+    self.band_names puede tener menos bandas que `bands` con fs bajas.
+    band_powers() devuelve un array (canales, bandas) en el orden de self.band_names.
+    """
+    def __init__(self, fs, bands=EEG_BANDS, method='welch', nperseg=None, overlap=0.5,
+                 window='hann', order=4):
+        if method not in ('welch', 'iir'):
+            raise ValueError("method must be 'welch' or 'iir'")
+        self.fs = fs
+        self.method = method
+        bands = fit_bands_to_nyquist(bands, fs)
+        self.band_names = list(bands)
+        self.band_ranges = np.array([bands[name] for name in self.band_names], dtype=float)
+
+        # Welch: ventana, paso entre segmentos y máscaras (bandas, frecuencias)
+        self.nperseg = int(nperseg or fs)
+        self.step = max(1, int(self.nperseg * (1 - overlap)))
+        self.window = get_window(window, self.nperseg)
+        self.scale = 1.0 / (fs * np.sum(self.window ** 2))  # densidad espectral (V²/Hz)
+        self.freqs = np.fft.rfftfreq(self.nperseg, 1.0 / fs)
+        self.df = self.freqs[1] - self.freqs[0]
+        low, high = self.band_ranges[:, :1], self.band_ranges[:, 1:]
+        self.masks = ((self.freqs >= low) & (self.freqs < high)).astype(float)
+        # Factor one-sided (x2 salvo DC y Nyquist), incluido en la escala
+        self.one_sided = np.full(self.freqs.size, 2.0)
+        self.one_sided[0] = 1.0
+        if self.nperseg % 2 == 0:
+            self.one_sided[-1] = 1.0
+        self.scale = self.scale * self.one_sided
+        self.band_weights = self.masks.T * self.df  # (frecuencias, bandas)
+
+        # IIR: un diseño SOS por banda y su estado por canal (solo si se usa)
+        self.sos = []
+        if method == 'iir':
+            nyq = 0.5 * fs
+            self.sos = [butter(order, [lo / nyq, hi / nyq], btype='band', output='sos')
+                        for lo, hi in self.band_ranges]
+        self.zi = None
+
+    def reset(self):
+        """Olvida el estado de los filtros IIR"""
+        self.zi = None
+
+    def band_powers(self, block):
+        """Potencia de cada banda para un bloque (canales, muestras) -> (canales, bandas)"""
+        block = np.atleast_2d(np.asarray(block, dtype=float))
+        if self.method == 'welch':
+            return self.welch_powers(block)
+        return self.iir_powers(block)
+
+    def psd(self, block):
+        """PSD de Welch one-sided (canales, frecuencias) para todos los canales a la vez"""
+        block = np.atleast_2d(np.asarray(block, dtype=float))
+        if block.shape[-1] < self.nperseg:
+            raise ValueError(f"block needs at least {self.nperseg} samples per channel")
+        segments = sliding_window_view(block, self.nperseg, axis=-1)[..., ::self.step, :]
+        segments = segments - segments.mean(axis=-1, keepdims=True)
+        spectrum = np.fft.rfft(segments * self.window, axis=-1)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        return power.mean(axis=-2) * self.scale
+
+    def welch_powers(self, block):
+        # Integral de la PSD dentro de cada banda como un único producto matricial
+        return self.psd(block) @ self.band_weights
+
+    def iir_powers(self, block, window=None):
+        """Media de x² de la señal filtrada por banda; mantiene zi entre bloques.
+        Con `window` (muestras) devuelve la potencia de cada ventana consecutiva
+        del bloque como (ventanas, canales, bandas); el bloque debe ser múltiplo."""
+        if self.method != 'iir':
+            raise ValueError("iir_powers() needs an engine created with method='iir'")
+        block = np.atleast_2d(np.asarray(block, dtype=float))
+        if self.zi is None or self.zi[0].shape[1] != block.shape[0]:
+            # Estado estacionario para la primera muestra de cada canal
+            self.zi = [sosfilt_zi(sos)[:, None, :] * block[None, :, :1] for sos in self.sos]
+        channels, samples = block.shape
+        if window is None:
+            powers = np.empty((channels, len(self.sos)))
+        else:
+            if samples % window:
+                raise ValueError("block length must be a multiple of window")
+            powers = np.empty((samples // window, channels, len(self.sos)))
+        for i, sos in enumerate(self.sos):
+            filtered, self.zi[i] = sosfilt(sos, block, axis=-1, zi=self.zi[i])
+            squared = np.square(filtered, out=filtered)
+            if window is None:
+                powers[:, i] = squared.mean(axis=-1)
+            else:
+                powers[:, :, i] = squared.reshape(channels, -1, window).mean(axis=-1).T
+        return powers
+
+
+def _per_band_per_channel(block, fs, bands):
+    """Referencia: el enfoque anterior (diseño + lfilter por banda y por canal)"""
+    nyq = 0.5 * fs
+    powers = np.empty((block.shape[0], len(bands)))
+    for c, channel in enumerate(block):
+        for i, (lo, hi) in enumerate(bands.values()):
+            b, a = butter(4, [lo / nyq, hi / nyq], btype='band')
+            powers[c, i] = np.mean(lfilter(b, a, channel) ** 2)
+    return powers
+
+
+def _bench(fs, seconds, channels_list, repeats):
+    rng = np.random.default_rng(0)
+    bands = fit_bands_to_nyquist(EEG_BANDS, fs)
+    n_bands = len(bands)
+    print(f"fs={fs} Hz, bloques de {seconds:.1f} s, {n_bands} bandas")
+    print(f"{'canales':>8}{'método':>14}{'ms/bloque':>12}{'canal·banda/s':>16}{'x tiempo real':>15}")
+    for channels in channels_list:
+        block = rng.standard_normal((channels, int(fs * seconds)))
+        runners = {
+            'por_canal': lambda b: _per_band_per_channel(b, fs, bands),
+            'welch': FilterBankEngine(fs, bands, method='welch').band_powers,
+            'iir': FilterBankEngine(fs, bands, method='iir').band_powers,
+        }
+        for name, run in runners.items():
+            run(block)  # calentamiento
+            t0 = time.perf_counter()
+            for _ in range(repeats):
+                run(block)
+            per_block = (time.perf_counter() - t0) / repeats
+            print(f"{channels:>8}{name:>14}{per_block * 1000:>12.2f}"
+                  f"{channels * n_bands / per_block:>16.0f}{seconds / per_block:>15.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del banco de filtros EEG multicanal.")
+    parser.add_argument("--fs", type=int, default=250)
+    parser.add_argument("--seconds", type=float, default=2.0, help="duración de cada bloque")
+    parser.add_argument("--channels", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    _bench(args.fs, args.seconds, args.channels, args.repeats)
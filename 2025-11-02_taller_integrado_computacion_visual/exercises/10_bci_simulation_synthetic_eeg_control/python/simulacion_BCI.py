@@ -5,169 +5,168 @@ Descripción:
     Este programa simula un sistema BCI básico que genera señales EEG sintéticas,
     aplica filtros pasa banda (Alpha y Beta) y controla una interfaz visual
     mediante PyGame, donde el color o movimiento responde a la actividad cerebral.
+    La señal se procesa en un proceso aparte (bci_engine.py) al ritmo de muestreo;
+    esta interfaz solo lee su último resultado de memoria compartida a 30 fps.
 """
 
-import numpy as np
+import multiprocessing as mp
+
 import pygame
-import matplotlib.pyplot as plt
-from scipy.signal import butter, lfilter
-import time
+
+from bci_engine import MENTAL_STATES, MODES, SAMPLING_FREQ, EngineRing, RingBuffer, run_engine
 
 # ==================== CONFIGURACIÓN ====================
-pygame.init()
 WIDTH, HEIGHT = 1200, 700
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Simulación BCI - EEG Sintético")
-clock = pygame.time.Clock()
-
-# Parámetros EEG
-SAMPLING_FREQ = 250  # Hz
-dt = 1 / SAMPLING_FREQ
-time_window = np.linspace(0, 1, SAMPLING_FREQ, endpoint=False)
 
 # Colores
 BG_COLOR = (15, 15, 25)
 TEXT_COLOR = (255, 255, 255)
-ALPHA_COLOR = (0, 150, 255)
-BETA_COLOR = (255, 60, 60)
-BALANCED_COLOR = (255, 215, 0)
 
-# Fuentes
-font_title = pygame.font.SysFont("Arial", 32, bold=True)
-font_state = pygame.font.SysFont("Arial", 28, bold=True)
-font_info = pygame.font.SysFont("Arial", 20)
-font_small = pygame.font.SysFont("Arial", 16)
+# Pantalla y fuentes: se crean en init_display(), no al importar (el proceso
+# del motor importa este módulo al arrancar y no debe abrir ventana)
+screen = None
+clock = None
+font_title = font_state = font_info = font_small = None
 
-# ==================== FILTROS ====================
-def butter_bandpass(lowcut, highcut, fs, order=4):
-    """Crea un filtro pasa banda Butterworth"""
-    nyq = 0.5 * fs
-    low = lowcut / nyq
-    high = highcut / nyq
-    b, a = butter(order, [low, high], btype='band')
-    return b, a
+def init_display():
+    """Inicializa pygame, la ventana y las fuentes"""
+    global screen, clock, font_title, font_state, font_info, font_small
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Simulación BCI - EEG Sintético")
+    clock = pygame.time.Clock()
+    font_title = pygame.font.SysFont("Arial", 32, bold=True)
+    font_state = pygame.font.SysFont("Arial", 28, bold=True)
+    font_info = pygame.font.SysFont("Arial", 20)
+    font_small = pygame.font.SysFont("Arial", 16)
+
+# ==================== VISUALIZACIÓN ====================
+class Visualizer:
+    """Gráfico de energías alpha/beta dibujado directamente con pygame (modo retenido).
 
-def apply_bandpass_filter(data, lowcut, highcut, fs):
-    """Aplica filtro pasa banda a los datos"""
-    b, a = butter_bandpass(lowcut, highcut, fs)
-    return lfilter(b, a, data)
+    Ejes, rejilla y leyenda se renderizan una vez. Las trazas viven en una franja
+    que en cada frame se desplaza a la izquierda (Surface.scroll) y solo se dibuja
+    el segmento nuevo; el historial queda en buffers circulares de NumPy por si
+    hay que repintar la franja (p.ej. tras un salto de tiempo).
+    """
+    PLOT_BG = (26, 26, 46)
+    GRID_COLOR = (72, 72, 88)
+    ALPHA_LINE = (0, 150, 255)
+    BETA_LINE = (255, 60, 60)
 
-# ==================== GENERACIÓN DE SEÑAL EEG ====================
-class EEGGenerator:
-    def __init__(self):
-        self.alpha_amp = 1.0
-        self.beta_amp = 0.8
-        self.noise_level = 0.2
+    def __init__(self, size=(500, 350), span=30.0):
+        self.size = size
+        self.span = span  # segundos visibles (como el xlim de [t-30, t+1])
+        self.plot_rect = pygame.Rect(60, 15, size[0] - 75, size[1] - 65)
+        self.px_per_sec = self.plot_rect.width / (span + 1)
+        self.head_x = self.plot_rect.width - 1 - self.px_per_sec  # posición de "ahora"
+        self.font_tick = pygame.font.SysFont("Arial", 12)
         
-    def generate_signal(self, t):
-        """Genera señal EEG sintética con componentes alpha, beta y ruido"""
-        alpha_component = self.alpha_amp * np.sin(2 * np.pi * 10 * t)
-        beta_component = self.beta_amp * np.sin(2 * np.pi * 20 * t)
-        noise = self.noise_level * np.random.randn(len(t))
+        # Historial de datos (cubre toda la ventana visible a 30 fps)
+        self.max_points = int((span + 1) * 30)
+        self.alpha_history = RingBuffer(self.max_points)
+        self.beta_history = RingBuffer(self.max_points)
+        self.time_history = RingBuffer(self.max_points)
         
-        return alpha_component + beta_component + noise
+        self.background = self._render_static()
+        self.legend = self._render_legend()
+        self.traces = pygame.Surface(self.plot_rect.size, pygame.SRCALPHA)
+        self.surface = pygame.Surface(size)
+        self._last = None          # (t, y_alpha, y_beta) del último punto dibujado
+        self._scroll_rem = 0.0     # fracción de píxel pendiente de desplazar
     
-    def update_amplitudes(self, mode='normal'):
-        """Actualiza amplitudes según el modo de simulación"""
-        if mode == 'relaxed':
-            self.alpha_amp = min(1.8, self.alpha_amp + 0.05)
-            self.beta_amp = max(0.3, self.beta_amp - 0.02)
-        elif mode == 'active':
-            self.beta_amp = min(1.8, self.beta_amp + 0.05)
-            self.alpha_amp = max(0.3, self.alpha_amp - 0.02)
-        else:  # normal
-            # Variaciones aleatorias pequeñas
-            self.alpha_amp += np.random.uniform(-0.01, 0.01)
-            self.beta_amp += np.random.uniform(-0.01, 0.01)
-            self.alpha_amp = np.clip(self.alpha_amp, 0.5, 1.5)
-            self.beta_amp = np.clip(self.beta_amp, 0.5, 1.5)
-
-# ==================== PROCESAMIENTO DE SEÑALES ====================
-class SignalProcessor:
-    def __init__(self, fs):
-        self.fs = fs
-        self.alpha_range = (8, 12)
-        self.beta_range = (13, 30)
-    
-    def extract_band_energy(self, signal, band_type):
-        """Extrae y calcula la energía de una banda específica"""
-        if band_type == 'alpha':
-            filtered = apply_bandpass_filter(signal, *self.alpha_range, self.fs)
-        elif band_type == 'beta':
-            filtered = apply_bandpass_filter(signal, *self.beta_range, self.fs)
-        else:
-            raise ValueError("Band type must be 'alpha' or 'beta'")
+    def _render_static(self):
+        """Fondo, área del gráfico, rejilla, marcas y etiquetas (una sola vez)"""
+        surface = pygame.Surface(self.size)
+        surface.fill(BG_COLOR)
+        rect = self.plot_rect
+        pygame.draw.rect(surface, self.PLOT_BG, rect)
+        for i in range(6):  # energía 0.0 .. 1.0
+            y = rect.bottom - 1 - round(i * (rect.height - 1) / 5)
+            pygame.draw.line(surface, self.GRID_COLOR, (rect.left, y), (rect.right - 1, y))
+            label = self.font_tick.render(f"{i / 5:.1f}", True, TEXT_COLOR)
+            surface.blit(label, (rect.left - label.get_width() - 6, y - label.get_height() // 2))
+        for seconds in range(0, int(self.span) + 1, 5):  # segundos relativos a ahora
+            x = rect.left + round(self.head_x - seconds * self.px_per_sec)
+            pygame.draw.line(surface, self.GRID_COLOR, (x, rect.top), (x, rect.bottom - 1))
+            label = self.font_tick.render(f"{-seconds}", True, TEXT_COLOR)
+            surface.blit(label, (x - label.get_width() // 2, rect.bottom + 4))
+        pygame.draw.rect(surface, TEXT_COLOR, rect, 1)
         
-        energy = np.mean(filtered ** 2)
-        return energy, filtered
+        xlabel = font_small.render("Tiempo (s)", True, TEXT_COLOR)
+        surface.blit(xlabel, (rect.centerx - xlabel.get_width() // 2, rect.bottom + 22))
+        ylabel = pygame.transform.rotate(font_small.render("Energía Normalizada", True, TEXT_COLOR), 90)
+        surface.blit(ylabel, (6, rect.centery - ylabel.get_height() // 2))
+        return surface
     
-    def classify_mental_state(self, alpha_energy, beta_energy):
-        """Clasifica el estado mental basado en las energías de las bandas"""
-        ratio = alpha_energy / (beta_energy + 1e-6)
-        
-        if ratio > 1.3:
-            return "Relajado (Alpha)", ALPHA_COLOR, 140
-        elif ratio < 0.7:
-            return "Activo (Beta)", BETA_COLOR, 70
-        else:
-            return "Equilibrado", BALANCED_COLOR, 105
-
-# ==================== VISUALIZACIÓN ====================
-class Visualizer:
-    def __init__(self):
-        # Configurar matplotlib
-        plt.switch_backend('Agg')
-        self.fig, self.ax = plt.subplots(figsize=(5, 3.5))
-        self.fig.patch.set_facecolor('#0f0f19')
-        self.ax.set_facecolor('#1a1a2e')
-        
-        # Historial de datos
-        self.alpha_history = []
-        self.beta_history = []
-        self.time_history = []
-        self.max_points = 150
+    def _render_legend(self):
+        entries = [("Alpha (8-12 Hz)", self.ALPHA_LINE), ("Beta (13-30 Hz)", self.BETA_LINE)]
+        labels = [self.font_tick.render(text, True, TEXT_COLOR) for text, _ in entries]
+        legend = pygame.Surface((max(l.get_width() for l in labels) + 42, 18 * len(entries) + 8))
+        legend.fill(self.PLOT_BG)
+        pygame.draw.rect(legend, TEXT_COLOR, legend.get_rect(), 1)
+        for i, ((_, color), label) in enumerate(zip(entries, labels)):
+            y = 6 + i * 18
+            pygame.draw.line(legend, color, (8, y + 7), (30, y + 7), 2)
+            legend.blit(label, (36, y))
+        return legend
     
-    def update_history(self, alpha, beta, current_time):
-        """Actualiza el historial de datos"""
-        self.alpha_history.append(alpha)
-        self.beta_history.append(beta)
-        self.time_history.append(current_time)
-        
-        if len(self.time_history) > self.max_points:
-            self.alpha_history.pop(0)
-            self.beta_history.pop(0)
-            self.time_history.pop(0)
+    def _y(self, value):
+        return (1.0 - min(max(value, 0.0), 1.0)) * (self.plot_rect.height - 1)
     
-    def create_plot_surface(self):
-        """Crea superficie de pygame con el gráfico de matplotlib"""
-        self.ax.clear()
-        
-        if len(self.time_history) > 1:
-            self.ax.plot(self.time_history, self.alpha_history, 
-                        label="Alpha (8-12 Hz)", color="#0096ff", linewidth=2)
-            self.ax.plot(self.time_history, self.beta_history, 
-                        label="Beta (13-30 Hz)", color="#ff3c3c", linewidth=2)
-        
-        self.ax.legend(loc='upper left', facecolor='#1a1a2e', 
-                      edgecolor='white', fontsize=9)
-        self.ax.set_ylim(0, 1)
+    def update_history(self, alpha, beta, current_time):
+        """Actualiza el historial y dibuja solo el segmento nuevo"""
+        self.alpha_history.extend([alpha])
+        self.beta_history.extend([beta])
+        self.time_history.extend([current_time])
         
-        if len(self.time_history) > 0:
-            self.ax.set_xlim(max(0, self.time_history[-1] - 30), 
-                           self.time_history[-1] + 1)
+        point = (current_time, self._y(alpha), self._y(beta))
+        if self._last is None:
+            self._last = point
+            return
+        elapsed = current_time - self._last[0]
+        if elapsed < 0 or elapsed > self.span:
+            self._redraw_traces()
+            return
         
-        self.ax.set_xlabel("Tiempo (s)", color='white', fontsize=10)
-        self.ax.set_ylabel("Energía Normalizada", color='white', fontsize=10)
-        self.ax.tick_params(colors='white', labelsize=8)
-        self.ax.grid(True, alpha=0.2, color='white')
+        # Desplazar la franja los píxeles enteros acumulados
+        self._scroll_rem += elapsed * self.px_per_sec
+        shift = int(self._scroll_rem)
+        self._scroll_rem -= shift
+        if shift:
+            self.traces.scroll(-shift, 0)
+            width = self.plot_rect.width
+            self.traces.fill((0, 0, 0, 0), pygame.Rect(width - shift, 0, shift, self.plot_rect.height))
         
-        # Convertir a superficie de pygame
-        self.fig.canvas.draw()
-        plot_data = np.array(self.fig.canvas.buffer_rgba())
-        plot_data = np.flipud(np.rot90(plot_data[:, :, :3]))
-        return pygame.surfarray.make_surface(plot_data)
+        x0 = self.head_x - elapsed * self.px_per_sec
+        pygame.draw.line(self.traces, self.ALPHA_LINE, (x0, self._last[1]), (self.head_x, point[1]), 2)
+        pygame.draw.line(self.traces, self.BETA_LINE, (x0, self._last[2]), (self.head_x, point[2]), 2)
+        self._last = point
+    
+    def _redraw_traces(self):
+        """Repinta la franja entera desde el historial (solo ante saltos de tiempo)"""
+        self.traces.fill((0, 0, 0, 0))
+        self._scroll_rem = 0.0
+        times = self.time_history.view()
+        if times.size == 0:
+            self._last = None
+            return
+        xs = self.head_x - (times[-1] - times) * self.px_per_sec
+        for values, color in ((self.alpha_history.view(), self.ALPHA_LINE),
+                              (self.beta_history.view(), self.BETA_LINE)):
+            points = [(x, self._y(v)) for x, v in zip(xs, values)]
+            if len(points) > 1:
+                pygame.draw.lines(self.traces, color, False, points, 2)
+        self._last = (times[-1], self._y(self.alpha_history.view()[-1]), self._y(self.beta_history.view()[-1]))
+    
+    def create_plot_surface(self):
+        """Compone fondo estático + trazas + leyenda en una superficie reutilizada"""
+        self.surface.blit(self.background, (0, 0))
+        self.surface.blit(self.traces, self.plot_rect.topleft)
+        self.surface.blit(self.legend, (self.plot_rect.left + 8, self.plot_rect.top + 8))
+        return self.surface
 
-def draw_info_panel(screen, eeg_gen, alpha_energy, beta_energy):
+def draw_info_panel(screen, alpha_amp, beta_amp, alpha_energy, beta_energy):
     """Dibuja panel de información"""
     info_x = 50
     info_y = HEIGHT - 180
@@ -179,8 +178,8 @@ def draw_info_panel(screen, eeg_gen, alpha_energy, beta_energy):
     
     # Información
     info_texts = [
-        f"Amplitud Alpha: {eeg_gen.alpha_amp:.2f}",
-        f"Amplitud Beta: {eeg_gen.beta_amp:.2f}",
+        f"Amplitud Alpha: {alpha_amp:.2f}",
+        f"Amplitud Beta: {beta_amp:.2f}",
         f"Energía Alpha: {alpha_energy:.3f}",
         f"Energía Beta: {beta_energy:.3f}",
         f"Ratio A/B: {alpha_energy/(beta_energy+1e-6):.2f}"
@@ -215,104 +214,97 @@ def draw_controls(screen):
 
 # ==================== MAIN ====================
 def main():
-    # Inicialización
-    eeg_gen = EEGGenerator()
-    processor = SignalProcessor(SAMPLING_FREQ)
+    # Inicialización: el motor corre en su propio proceso al ritmo de la señal
+    # y la interfaz solo muestrea su último resultado a 30 fps
+    init_display()
+    ring = EngineRing.create()
+    engine = mp.get_context('spawn').Process(target=run_engine, args=(ring.name, SAMPLING_FREQ), daemon=True)
+    engine.start()
     visualizer = Visualizer()
     
     # Variables de estado
     running = True
-    start_time = time.time()
-    last_update = time.time()
     simulation_mode = 'normal'
+    last_seq = -1
     
-    mental_state = "Equilibrado"
-    circle_color = BALANCED_COLOR
-    circle_radius = 105
+    mental_state, circle_color, circle_radius = MENTAL_STATES[0]
     
     alpha_energy_norm = 0.5
     beta_energy_norm = 0.5
+    alpha_amp = beta_amp = 0.0
     
-    while running:
-        current_time = time.time() - start_time
-        
-        # Eventos
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
+    try:
+        while running:
+            # Eventos
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
                     running = False
-                elif event.key == pygame.K_r:
-                    simulation_mode = 'relaxed'
-                elif event.key == pygame.K_a:
-                    simulation_mode = 'active'
-                elif event.key == pygame.K_SPACE:
-                    simulation_mode = 'normal'
-        
-        # Actualizar amplitudes
-        eeg_gen.update_amplitudes(simulation_mode)
-        
-        # Generar señal EEG
-        eeg_signal = eeg_gen.generate_signal(time_window)
-        
-        # Procesar bandas
-        alpha_energy, _ = processor.extract_band_energy(eeg_signal, 'alpha')
-        beta_energy, _ = processor.extract_band_energy(eeg_signal, 'beta')
-        
-        # Normalizar energías
-        total_energy = alpha_energy + beta_energy
-        if total_energy > 0:
-            alpha_energy_norm = alpha_energy / total_energy
-            beta_energy_norm = beta_energy / total_energy
-        
-        # Clasificar estado mental cada 1.5 segundos
-        if time.time() - last_update > 1.5:
-            mental_state, circle_color, circle_radius = processor.classify_mental_state(
-                alpha_energy_norm, beta_energy_norm
-            )
-            last_update = time.time()
-        
-        # Actualizar historial
-        visualizer.update_history(alpha_energy_norm, beta_energy_norm, current_time)
-        
-        # ==================== RENDERIZADO ====================
-        screen.fill(BG_COLOR)
-        
-        # Título
-        title_text = font_title.render("Simulación BCI - Interfaz Cerebro-Computadora", 
-                                       True, TEXT_COLOR)
-        screen.blit(title_text, (WIDTH // 2 - title_text.get_width() // 2, 20))
-        
-        # Círculo principal (estado mental)
-        circle_pos = (300, HEIGHT // 2 - 50)
-        pygame.draw.circle(screen, circle_color, circle_pos, circle_radius)
-        pygame.draw.circle(screen, TEXT_COLOR, circle_pos, circle_radius, 3)
-        
-        state_text = font_state.render(mental_state, True, TEXT_COLOR)
-        state_rect = state_text.get_rect(center=circle_pos)
-        screen.blit(state_text, state_rect)
-        
-        # Indicador de modo actual
-        mode_text = font_info.render(f"Modo: {simulation_mode.upper()}", True, (255, 255, 100))
-        screen.blit(mode_text, (circle_pos[0] - mode_text.get_width() // 2, 
-                                circle_pos[1] + circle_radius + 20))
-        
-        # Gráfico
-        plot_surface = visualizer.create_plot_surface()
-        screen.blit(plot_surface, (WIDTH - plot_surface.get_width() - 30, 80))
-        
-        # Paneles de información
-        draw_info_panel(screen, eeg_gen, alpha_energy_norm, beta_energy_norm)
-        draw_controls(screen)
-        
-        pygame.display.flip()
-        clock.tick(30)
-    
-    pygame.quit()
-    plt.close('all')
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_ESCAPE:
+                        running = False
+                    elif event.key == pygame.K_r:
+                        simulation_mode = 'relaxed'
+                    elif event.key == pygame.K_a:
+                        simulation_mode = 'active'
+                    elif event.key == pygame.K_SPACE:
+                        simulation_mode = 'normal'
+            ring.mode = MODES.index(simulation_mode)
+            
+            # Último resultado del motor
+            record = ring.latest()
+            if record is not None and record['seq'] != last_seq:
+                last_seq = record['seq']
+                alpha_energy_norm = float(record['alpha_norm'])
+                beta_energy_norm = float(record['beta_norm'])
+                alpha_amp, beta_amp = float(record['alpha_amp']), float(record['beta_amp'])
+                mental_state, circle_color, circle_radius = MENTAL_STATES[int(record['state'])]
+                
+                # Actualizar historial
+                visualizer.update_history(alpha_energy_norm, beta_energy_norm, float(record['t']))
+            elif not engine.is_alive():
+                print("El motor BCI terminó inesperadamente")
+                running = False
+            
+            # ==================== RENDERIZADO ====================
+            screen.fill(BG_COLOR)
+            
+            # Título
+            title_text = font_title.render("Simulación BCI - Interfaz Cerebro-Computadora", 
+                                           True, TEXT_COLOR)
+            screen.blit(title_text, (WIDTH // 2 - title_text.get_width() // 2, 20))
+            
+            # Círculo principal (estado mental)
+            circle_pos = (300, HEIGHT // 2 - 50)
+            pygame.draw.circle(screen, circle_color, circle_pos, circle_radius)
+            pygame.draw.circle(screen, TEXT_COLOR, circle_pos, circle_radius, 3)
+            
+            state_text = font_state.render(mental_state, True, TEXT_COLOR)
+            state_rect = state_text.get_rect(center=circle_pos)
+            screen.blit(state_text, state_rect)
+            
+            # Indicador de modo actual
+            mode_text = font_info.render(f"Modo: {simulation_mode.upper()}", True, (255, 255, 100))
+            screen.blit(mode_text, (circle_pos[0] - mode_text.get_width() // 2, 
+                                    circle_pos[1] + circle_radius + 20))
+            
+            # Gráfico
+            plot_surface = visualizer.create_plot_surface()
+            screen.blit(plot_surface, (WIDTH - plot_surface.get_width() - 30, 80))
+            
+            # Paneles de información
+            draw_info_panel(screen, alpha_amp, beta_amp, alpha_energy_norm, beta_energy_norm)
+            draw_controls(screen)
+            
+            pygame.display.flip()
+            clock.tick(30)
+    finally:
+        ring.request_stop()
+        engine.join(timeout=2.0)
+        if engine.is_alive():
+            engine.terminate()
+        ring.close()
+        ring.unlink()
+        pygame.quit()
 
 if __name__ == "__main__":
     main()
-
-
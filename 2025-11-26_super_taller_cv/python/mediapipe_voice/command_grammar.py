@@ -0,0 +1,239 @@
+# command_grammar.py
+
+import unicodedata
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class CommandMatch:
+    """
+    Coincidencia de una frase del vocabulario dentro del texto reconocido.
+    start/end son posiciones en el texto ORIGINAL (text[start:end] es lo que coincidió).
+    """
+    command: str
+    phrase: str
+    start: int
+    end: int
+    distance: int = 0  # 0 = exacta; >0 = ediciones en modo difuso
+
+    @property
+    def fuzzy(self) -> bool:
+        return self.distance > 0
+
+
+def normalize_text(text: str) -> str:
+    """
+    Minúsculas, sin tildes/diacríticos y con cualquier separador reducido a un espacio.
+    "¡Atrás, POR favor!" -> "atras por favor"
+    """
+    return _normalize_with_map(text)[0]
+
+
+def _normalize_with_map(text: str) -> Tuple[str, List[int]]:
+    """
+    Normaliza y devuelve además, por cada carácter normalizado, su índice en el texto original.
+    """
+    chars: List[str] = []
+    index: List[int] = []
+    prev_space = True
+    for i, ch in enumerate(text):
+        for c in unicodedata.normalize("NFKD", ch):
+            if unicodedata.combining(c):
+                continue
+            for cc in c.casefold():
+                if cc.isalnum():
+                    chars.append(cc)
+                    index.append(i)
+                    prev_space = False
+                elif not prev_space:
+                    chars.append(" ")
+                    index.append(i)
+                    prev_space = True
+    if chars and chars[-1] == " ":
+        chars.pop()
+        index.pop()
+    return "".join(chars), index
+
+
+def _edit_distance(a: str, b: str, max_edits: int) -> int:
+    """
+    Levenshtein acotado: devuelve max_edits + 1 en cuanto se supera el límite.
+    """
+    if abs(len(a) - len(b)) > max_edits:
+        return max_edits + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * len(b)
+        row_min = i
+        for j, cb in enumerate(b, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            row_min = min(row_min, cur[j])
+        if row_min > max_edits:
+            return max_edits + 1
+        prev = cur
+    return prev[-1]
+
+
+def _deletes(text: str, max_edits: int) -> set:
+    """
+    El propio texto y todas sus variantes con hasta max_edits caracteres borrados.
+    """
+    variants = {text}
+    frontier = {text}
+    for _ in range(max_edits):
+        frontier = {v[:i] + v[i + 1:] for v in frontier for i in range(len(v))} - variants
+        variants |= frontier
+    return variants
+
+
+class CommandGrammar:
+    """
+    Vocabulario de comandos de voz compilado una sola vez en un autómata Aho–Corasick.
+
+    - Normaliza Unicode (tildes, mayúsculas, puntuación): "atrás" == "atras".
+    - Respeta límites de palabra: "para" no coincide dentro de "parar".
+    - Encuentra todos los comandos de una frase en una sola pasada, con su posición;
+      el coste por enunciado depende del largo del texto, no del tamaño del vocabulario.
+    - Opcionalmente acepta coincidencias difusas (hasta `max_edits` ediciones) para
+      frases de al menos `fuzzy_min_len` caracteres.
+
+    Uso:
+        grammar = CommandGrammar({"adelante": "/adelante", "atrás": "/atras"})
+        grammar.parse("adelante y luego atras")  # -> [CommandMatch(...), CommandMatch(...)]
+        grammar.first("vamos adelante")          # -> "/adelante"
+    """
+
+    def __init__(self, table: Dict[str, str], max_edits: int = 0, fuzzy_min_len: int = 5):
+        self.max_edits = max_edits
+        self.fuzzy_min_len = fuzzy_min_len
+        self._phrases: List[str] = []
+        self._commands: List[str] = []
+        for phrase, command in table.items():
+            normalized = normalize_text(phrase)
+            if normalized:
+                self._phrases.append(normalized)
+                self._commands.append(command)
+
+        self._build_automaton()
+
+        # Índice de borrados (estilo SymSpell) para el modo difuso:
+        # (nº de palabras, frase con hasta max_edits borrados) -> ids de frase.
+        # Si dist(a, b) <= k, a y b comparten alguna variante con <= k borrados,
+        # así que basta buscar las variantes del fragmento y verificar esos pocos candidatos.
+        self._fuzzy_index: Dict[Tuple[int, str], List[int]] = {}
+        word_counts = set()
+        if max_edits > 0:
+            for pid, phrase in enumerate(self._phrases):
+                if len(phrase) >= fuzzy_min_len:
+                    n_words = phrase.count(" ") + 1
+                    word_counts.add(n_words)
+                    for variant in _deletes(phrase, max_edits):
+                        self._fuzzy_index.setdefault((n_words, variant), []).append(pid)
+        self._fuzzy_word_counts = sorted(word_counts)
+
+    def _build_automaton(self):
+        # Las frases se rodean de espacios, así el propio autómata exige límites de palabra
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for pid, phrase in enumerate(self._phrases):
+            node = 0
+            for ch in f" {phrase} ":
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(pid)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            u = queue.popleft()
+            for ch, v in self._goto[u].items():
+                queue.append(v)
+                f = self._fail[u]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[v] = target if target != v else 0
+                self._out[v] = self._out[v] + self._out[self._fail[v]]
+
+    def _exact(self, padded: str, index: List[int]) -> List[CommandMatch]:
+        matches: List[CommandMatch] = []
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(padded):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for pid in out[node]:
+                phrase = self._phrases[pid]
+                # padded = " " + norm + " " y padded[i] es el espacio final del patrón,
+                # así que la frase ocupa norm[i - len(phrase) - 1 : i - 1]
+                s = i - len(phrase) - 1
+                e = i - 2
+                matches.append(CommandMatch(self._commands[pid], phrase, index[s], index[e] + 1))
+        return matches
+
+    def _fuzzy(self, norm: str, index: List[int]) -> List[CommandMatch]:
+        matches: List[CommandMatch] = []
+        words: List[Tuple[int, int]] = []
+        pos = 0
+        for word in norm.split(" "):
+            words.append((pos, pos + len(word)))
+            pos += len(word) + 1
+
+        for n_words in self._fuzzy_word_counts:
+            for w in range(len(words) - n_words + 1):
+                s, e = words[w][0], words[w + n_words - 1][1]
+                chunk = norm[s:e]
+                if len(chunk) + self.max_edits < self.fuzzy_min_len:
+                    continue
+                candidates = set()
+                for variant in _deletes(chunk, self.max_edits):
+                    candidates.update(self._fuzzy_index.get((n_words, variant), ()))
+                for pid in sorted(candidates, key=lambda p: (len(self._phrases[p]), p)):
+                    d = _edit_distance(chunk, self._phrases[pid], self.max_edits)
+                    if 0 < d <= self.max_edits:
+                        matches.append(CommandMatch(
+                            self._commands[pid], self._phrases[pid], index[s], index[e - 1] + 1, d
+                        ))
+        return matches
+
+    def find_all(self, text: str) -> List[CommandMatch]:
+        """
+        Todas las coincidencias (pueden solaparse), ordenadas por posición.
+        """
+        norm, index = _normalize_with_map(text)
+        if not norm:
+            return []
+        matches = self._exact(f" {norm} ", index)
+        if self.max_edits > 0:
+            matches += self._fuzzy(norm, index)
+        matches.sort(key=lambda m: (m.start, m.distance, m.start - m.end))
+        return matches
+
+    def parse(self, text: str) -> List[CommandMatch]:
+        """
+        Comandos de la frase en orden, sin solapes: en cada posición gana la
+        coincidencia exacta y, a igualdad, la más larga.
+        """
+        result: List[CommandMatch] = []
+        last_end = -1
+        for m in self.find_all(text):
+            if m.start >= last_end:
+                result.append(m)
+                last_end = m.end
+        return result
+
+    def first(self, text: str) -> Optional[str]:
+        """
+        Comando de la primera coincidencia, o None.
+        """
+        matches = self.parse(text)
+        return matches[0].command if matches else None
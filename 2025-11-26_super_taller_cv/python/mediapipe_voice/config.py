@@ -7,6 +7,26 @@ GESTURE_OPEN_NAME = "GESTURE_OPEN_HAND"
 GESTURE_FIST_NAME = "GESTURE_FIST"
 GESTURE_THUMBS_UP_NAME = "GESTURE_THUMBS_UP"
 
+# --- Hand tracking (ROI) configuration ---
+GESTURE_TRACKING_MODE = True     # inferencia sobre recorte de la mano en vez del frame completo
+GESTURE_ROI_MARGIN = 0.3         # margen alrededor del bounding box (fracción del lado)
+GESTURE_ROI_SCALE = 0.5          # factor de reducción del recorte antes de inferir
+GESTURE_STABILITY_THRESHOLD = 0.01  # desplazamiento medio normalizado para considerar la mano quieta
+GESTURE_MAX_SKIP_FRAMES = 3      # frames seguidos sin inferencia mientras la mano está quieta
+GESTURE_REDETECT_EVERY = 30      # cada N frames se fuerza una detección en el frame completo
+
+# --- Adaptive quality (ver qos.py) ---
+GESTURE_QOS_ENABLED = True       # ajustar modelo / resolución / cadencia según el tiempo por frame
+GESTURE_TARGET_FPS = 30.0        # presupuesto = 1 / fps
+
+# --- Gesture temporal filtering (ver gesture_filters.py) ---
+GESTURE_SMOOTHING = True         # One-Euro sobre los landmarks antes de clasificar
+GESTURE_FILTER_MIN_CUTOFF = 1.0  # Hz con la mano quieta (menor = más suave)
+GESTURE_FILTER_BETA = 1.0        # cuánto sube el corte con la velocidad (menor retraso al moverse)
+GESTURE_VOTE_WINDOW = 5          # frames en la ventana de votación por mano
+GESTURE_VOTE_ON = 3              # votos para confirmar un gesto
+GESTURE_VOTE_OFF = 1             # votos a los que se suelta (histéresis)
+
 # --- Voice commands configuration ---
 # Palabras en inglés para que funcionen bien con el reconocimiento "en-US".
 # Puedes cambiarlas a español si quieres y también ajustas el language en voice.py.
@@ -20,6 +40,11 @@ VOICE_KEYWORDS = {
     "slower": "CMD_SLOWER",
 }
 
+# Backend de reconocimiento: "google" (en línea) o "kws" (keyword spotting local, ver kws.py)
+VOICE_BACKEND = "google"
+VOICE_KWS_MAX_DISTANCE = 8.0  # distancia DTW máxima para aceptar una palabra
+VOICE_FUZZY_EDITS = 0         # ediciones toleradas al buscar comandos en el texto (0 = exacto)
+
 # --- EEG Simulation configuration ---
 EEG_MIN = 0.0
 EEG_MAX = 1.0
@@ -32,8 +57,26 @@ EEG_ALERT_THRESHOLD = 0.7
 INITIAL_STATE = "IDLE"
 VALID_STATES = ["IDLE", "RUNNING", "PAUSED"]
 
+# --- Headless server (server.py) ---
+SERVER_WORKERS = os.cpu_count() or 1  # sesiones de archivo simultáneas (las en vivo tienen proceso propio)
+SERVER_QUEUE_SIZE = 1024              # registros pendientes entre los workers y la salida
+SERVER_POLL_INTERVAL = 0.2            # s de espera en la cola antes de revisar procesos caídos
+SERVER_EXIT_GRACE = 1.0               # s que se espera el resumen de un proceso ya terminado
+
 # --- Logging paths ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 LOG_DIR = os.path.join(BASE_DIR, "logs")
 os.makedirs(LOG_DIR, exist_ok=True)
 LOG_PATH = os.path.join(LOG_DIR, "events_log.csv")
+# Perfilado por etapa del loop principal (ver profiler.py)
+PROFILE_WINDOW = 300          # muestras por etapa en el histograma deslizante
+PROFILE_DUMP_INTERVAL = 10.0  # segundos entre volcados JSON
+PROFILE_PATH = os.path.join(LOG_DIR, "profile.json")
+# Plantillas WAV para el backend de voz "kws": <palabra>_XX.wav, p.ej. start_01.wav
+VOICE_TEMPLATES_DIR = os.path.join(BASE_DIR, "voice_templates")
+LOG_FORMAT = "csv"            # "csv" o "binary" (registros de ancho fijo, ver event_logger.py)
+LOG_BINARY_PATH = os.path.join(LOG_DIR, "events_log.bin")
+LOG_QUEUE_SIZE = 4096         # eventos pendientes antes de descartar
+LOG_BATCH_SIZE = 256          # eventos por escritura
+LOG_MAX_BYTES = 50 * 1024 * 1024  # rotación por tamaño (None para desactivar)
+LOG_MAX_SECONDS = 3600        # rotación por tiempo (None para desactivar)
@@ -1,8 +1,9 @@
 # eeg_sim.py
 
-import random
 import time
-from typing import Dict
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
 
 from config import (
     EEG_MIN,
@@ -13,23 +14,79 @@ from config import (
     EEG_ALERT_THRESHOLD,
 )
 
+# Código de etiqueta -> nombre (ver label_codes)
+EEG_LABELS: Tuple[str, ...] = ("EEG_CALM", "EEG_NEUTRAL", "EEG_ALERT")
+
+ArrayLike = Union[float, np.ndarray]
+
+
+def label_codes(values: np.ndarray) -> np.ndarray:
+    """
+    Etiqueta vectorizada: 0 = CALM (< umbral calmo), 2 = ALERT (> umbral alerta), 1 = NEUTRAL.
+    """
+    return (values >= EEG_CALM_THRESHOLD).astype(np.int8) + (values > EEG_ALERT_THRESHOLD)
+
+
+def _clamped_walk(start: np.ndarray, steps: np.ndarray, lo: np.ndarray, hi: np.ndarray, max_passes: int = 64) -> np.ndarray:
+    """
+    Camino aleatorio acotado x[t] = clip(x[t-1] + d[t], lo, hi) para todos los canales a la vez.
+
+    Se parte de la suma acumulada y se aplican alternadamente las correcciones
+    de borde inferior y superior (mapa de Skorokhod) hasta que no queda ninguna
+    violación; el resultado coincide con el clip paso a paso. Si hiciera falta
+    más de `max_passes` pasadas se termina con el bucle explícito.
+    """
+    lo = lo[:, None]
+    hi = hi[:, None]
+    z = start[:, None] + np.cumsum(steps, axis=1)
+    for _ in range(max_passes):
+        z += np.maximum(np.maximum.accumulate(lo - z, axis=1), 0.0)
+        over = np.maximum(np.maximum.accumulate(z - hi, axis=1), 0.0)
+        z -= over
+        if not over.any() or (z >= lo).all():
+            return z
+
+    x = start.copy()
+    for t in range(steps.shape[1]):
+        x = np.clip(x + steps[:, t], lo[:, 0], hi[:, 0])
+        z[:, t] = x
+    return z
+
 
 class EEGSimulator:
     """
     Simulador sencillo de señal EEG entre 0 y 1 con:
     - Variaciones aleatorias pequeñas.
     - Ajustes manuales opcionales (p.ej. con teclas).
+    - Generación por bloques (canales, muestras) para pruebas de carga.
     """
 
-    def __init__(self, initial_value: float = 0.5):
+    def __init__(
+        self,
+        initial_value: float = 0.5,
+        channels: int = 1,
+        seed: Optional[int] = None,
+        channel_min: ArrayLike = EEG_MIN,
+        channel_max: ArrayLike = EEG_MAX,
+        channel_step: ArrayLike = EEG_RANDOM_STEP,
+    ):
         self.value = max(min(initial_value, EEG_MAX), EEG_MIN)
         self.last_label = None
+        self.rng = np.random.default_rng(seed)
+
+        # Estado multicanal (límites y paso por canal)
+        self.channels = channels
+        self.channel_min = np.broadcast_to(np.asarray(channel_min, dtype=np.float64), (channels,)).copy()
+        self.channel_max = np.broadcast_to(np.asarray(channel_max, dtype=np.float64), (channels,)).copy()
+        self.channel_step = np.broadcast_to(np.asarray(channel_step, dtype=np.float64), (channels,)).copy()
+        self.values = np.clip(np.full(channels, initial_value), self.channel_min, self.channel_max)
+        self.last_block: Optional[np.ndarray] = None
 
     def random_walk(self):
         """
         Aplica un pequeño cambio aleatorio a la señal.
         """
-        delta = random.uniform(-EEG_RANDOM_STEP, EEG_RANDOM_STEP)
+        delta = self.rng.uniform(-EEG_RANDOM_STEP, EEG_RANDOM_STEP)
         self.value = max(min(self.value + delta, EEG_MAX), EEG_MIN)
 
     def manual_adjust(self, steps: int):
@@ -38,6 +95,23 @@ class EEGSimulator:
         steps > 0 sube, steps < 0 baja.
         """
         self.value = max(min(self.value + steps * EEG_STEP, EEG_MAX), EEG_MIN)
+        self.values = np.clip(self.values + steps * EEG_STEP, self.channel_min, self.channel_max)
+
+    def generate_block(self, samples: int, dtype=np.float32) -> np.ndarray:
+        """
+        Genera un bloque (canales, muestras) continuando el camino aleatorio de cada canal.
+        """
+        steps = self.rng.uniform(-1.0, 1.0, size=(self.channels, samples)) * self.channel_step[:, None]
+        block = _clamped_walk(self.values, steps, self.channel_min, self.channel_max)
+        self.values = block[:, -1].copy()
+        self.last_block = block.astype(dtype, copy=False)
+        return self.last_block
+
+    def block_labels(self, block: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Códigos de etiqueta (ver EEG_LABELS) para cada muestra de un bloque.
+        """
+        return label_codes(self.last_block if block is None else block)
 
     def get_state(self) -> Dict:
         """
@@ -48,6 +122,8 @@ class EEGSimulator:
           "label": "EEG_NEUTRAL",
           "timestamp": ...
         }
+        Solo contiene tipos de Python (se serializa con json, p.ej. al grabar la
+        sesión); los resúmenes por canal del último bloque están en block_summary().
         """
         if self.value < EEG_CALM_THRESHOLD:
             label = "EEG_CALM"
@@ -57,9 +133,43 @@ class EEGSimulator:
             label = "EEG_NEUTRAL"
 
         self.last_label = label
-        return {
+        state = {
             "type": "eeg",
             "value": self.value,
             "label": label,
             "timestamp": time.time(),
         }
+        return state
+
+    def block_summary(self) -> Optional[Dict]:
+        """
+        Resúmenes por canal del último bloque generado (None si aún no hay ninguno).
+        Arrays de tamaño canales: "mean", "std", "min", "max", "labels" (código de
+        la última muestra) y "label_counts" (canales por etiqueta, en el orden de EEG_LABELS).
+        """
+        if self.last_block is None:
+            return None
+        block = self.last_block
+        codes = label_codes(block[:, -1])
+        return {
+            "channels": self.channels,
+            "mean": block.mean(axis=1),
+            "std": block.std(axis=1),
+            "min": block.min(axis=1),
+            "max": block.max(axis=1),
+            "labels": codes,
+            "label_counts": np.bincount(codes, minlength=len(EEG_LABELS)),
+        }
+
+
+if __name__ == "__main__":
+    # Prueba de carga: 64 canales x 1 kHz en bloques de 100 ms
+    sim = EEGSimulator(channels=64, seed=0)
+    n_blocks = 100
+    t0 = time.perf_counter()
+    for _ in range(n_blocks):
+        sim.generate_block(100)
+        sim.block_summary()
+    elapsed = time.perf_counter() - t0
+    rate = n_blocks * 100 * sim.channels / elapsed
+    print(f"{rate / 1e6:.2f} M muestras/s ({rate / (64 * 1000):.0f}x tiempo real para 64 canales a 1 kHz)")
@@ -0,0 +1,258 @@
+# event_logger.py
+
+import argparse
+import csv
+import os
+import queue
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+CSV_HEADER = ["timestamp", "event_type", "event_name", "state", "eeg_value"]
+
+# Registro binario de ancho fijo (un evento = LOG_DTYPE.itemsize bytes).
+# Los textos van en UTF-8, rellenos con ceros hasta el ancho del campo.
+LOG_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("event_type", "S16"),
+    ("event_name", "S32"),
+    ("state", "S16"),
+    ("eeg_value", "<f4"),
+])
+
+Record = Tuple[float, str, str, str, float]
+
+_TEXT_FIELDS = ("event_type", "event_name", "state")
+
+
+def _encode_field(value: str, width: int) -> Tuple[bytes, bool]:
+    """
+    Codifica en UTF-8 y recorta a `width` bytes sin partir un carácter.
+    Devuelve (bytes, recortado).
+    """
+    data = str(value).encode("utf-8")
+    if len(data) <= width:
+        return data, False
+    return data[:width].decode("utf-8", "ignore").encode("utf-8"), True
+
+
+class EventLogger:
+    """
+    Logger de eventos no bloqueante.
+
+    El loop de frames solo encola tuplas (timestamp, tipo, nombre, estado, eeg);
+    un hilo en segundo plano las escribe por lotes en CSV o en binario de ancho
+    fijo (LOG_DTYPE), rotando el archivo por tamaño y/o tiempo.
+
+    Uso:
+        logger = EventLogger(LOG_PATH)
+        logger.start()
+        logger.log("gesture", "GESTURE_FIST", "RUNNING", 0.42)
+        ...
+        logger.close()
+    """
+
+    def __init__(
+        self,
+        path: str,
+        fmt: str = "csv",
+        queue_size: int = 4096,
+        batch_size: int = 256,
+        flush_interval: float = 0.5,
+        max_bytes: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+    ):
+        if fmt not in ("csv", "binary"):
+            raise ValueError("fmt must be 'csv' or 'binary'")
+        self.path = path
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.dropped = 0
+        self.written = 0
+        self.truncated = 0  # eventos binarios con algún texto recortado al ancho del campo
+        self._queue: "queue.Queue[Optional[Record]]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._file = None
+        self._writer = None
+        self._opened_at = 0.0
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._open()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def log(self, event_type: str, event_name: str, state: str, eeg_value: float, timestamp: Optional[float] = None):
+        """
+        Encola un evento sin bloquear. Si la cola está llena el evento se descarta
+        (y se cuenta en `dropped`) para no frenar el loop de frames.
+        """
+        record = (time.time() if timestamp is None else timestamp, event_type, event_name, state, eeg_value)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout: float = 2.0):
+        """
+        Vacía la cola, escribe lo pendiente y cierra el archivo.
+        Si el hilo escritor ya murió no se espera por él: se cierra el archivo y listo.
+        """
+        if self._thread is None:
+            return
+        if self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                print("[logger] La cola no se vació a tiempo; se descartan los eventos pendientes")
+            self._thread.join(timeout)
+        if not self._thread.is_alive() and self._file is not None and not self._file.closed:
+            self._file.close()
+        self._thread = None
+
+    # ---------------- Hilo escritor ----------------
+
+    def _run(self):
+        batch: List[Record] = []
+        last_flush = time.monotonic()
+        running = True
+        while running:
+            timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                record = self._queue.get(timeout=timeout)
+                if record is None:
+                    running = False
+                else:
+                    batch.append(record)
+                    # Tomar lo que ya esté en la cola sin esperar
+                    while len(batch) < self.batch_size:
+                        record = self._queue.get_nowait()
+                        if record is None:
+                            running = False
+                            break
+                        batch.append(record)
+            except queue.Empty:
+                pass
+
+            if batch and (not running or len(batch) >= self.batch_size
+                          or time.monotonic() - last_flush >= self.flush_interval):
+                self._write_batch(batch)
+                batch = []
+                last_flush = time.monotonic()
+            elif not batch:
+                last_flush = time.monotonic()
+
+        if batch:
+            self._write_batch(batch)
+        self._file.close()
+
+    def _write_batch(self, batch: List[Record]):
+        try:
+            if self._should_rotate():
+                self._rotate()
+            if self.fmt == "csv":
+                self._writer.writerows(
+                    (f"{ts!r}", etype, name, state, f"{eeg:.3f}") for ts, etype, name, state, eeg in batch
+                )
+            else:
+                self._file.write(self._pack(batch).tobytes())
+            self._file.flush()
+            self.written += len(batch)
+        except Exception as e:
+            # Ni un fallo de disco ni un evento mal formado deben matar el hilo
+            # escritor; se pierde solo este lote.
+            self.dropped += len(batch)
+            print(f"[logger] Error escribiendo eventos: {e}")
+
+    def _pack(self, batch: List[Record]) -> np.ndarray:
+        """
+        Lote -> array LOG_DTYPE, con los textos en UTF-8 explícito (numpy los
+        codificaría como ASCII y fallaría con tildes o ñ).
+        """
+        records = np.zeros(len(batch), dtype=LOG_DTYPE)
+        widths = [LOG_DTYPE[name].itemsize for name in _TEXT_FIELDS]
+        for i, (ts, etype, name, state, eeg) in enumerate(batch):
+            cut = False
+            texts = []
+            for value, width in zip((etype, name, state), widths):
+                data, was_cut = _encode_field(value, width)
+                texts.append(data)
+                cut = cut or was_cut
+            records[i] = (ts, *texts, eeg)
+            self.truncated += cut
+        return records
+
+    # ---------------- Archivos y rotación ----------------
+
+    def _open(self):
+        if self.fmt == "csv":
+            self._file = open(self.path, mode="w", newline="", encoding="utf-8", buffering=1 << 16)
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(CSV_HEADER)
+        else:
+            self._file = open(self.path, mode="wb", buffering=1 << 16)
+        self._opened_at = time.time()
+
+    def _should_rotate(self) -> bool:
+        if self.max_bytes is not None and self._file.tell() >= self.max_bytes:
+            return True
+        if self.max_seconds is not None and time.time() - self._opened_at >= self.max_seconds:
+            return True
+        return False
+
+    def _rotate(self):
+        """
+        Cierra el archivo activo, lo renombra con la hora de apertura y abre uno nuevo.
+        """
+        self._file.close()
+        root, ext = os.path.splitext(self.path)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self._opened_at))
+        rotated = f"{root}.{stamp}{ext}"
+        suffix = 1
+        while os.path.exists(rotated):
+            rotated = f"{root}.{stamp}-{suffix}{ext}"
+            suffix += 1
+        os.replace(self.path, rotated)
+        self._open()
+
+
+def read_binary_log(path: str) -> np.ndarray:
+    """
+    Carga un log binario como array estructurado LOG_DTYPE (sin copiar a Python objetos).
+    """
+    return np.fromfile(path, dtype=LOG_DTYPE)
+
+
+def binary_to_csv(path: str, csv_path: Optional[str] = None) -> str:
+    """
+    Convierte un log binario (LOG_DTYPE) al CSV de siempre. Devuelve la ruta del CSV.
+    """
+    if csv_path is None:
+        csv_path = os.path.splitext(path)[0] + ".csv"
+    records = read_binary_log(path)
+    with open(csv_path, mode="w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+        for r in records:
+            writer.writerow([
+                repr(float(r["timestamp"])),
+                r["event_type"].decode("utf-8"),
+                r["event_name"].decode("utf-8"),
+                r["state"].decode("utf-8"),
+                f"{float(r['eeg_value']):.3f}",
+            ])
+    return csv_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convierte un log binario de eventos a CSV.")
+    parser.add_argument("binary_log")
+    parser.add_argument("csv_out", nargs="?")
+    args = parser.parse_args()
+    print(binary_to_csv(args.binary_log, args.csv_out))
@@ -1,70 +1,212 @@
 # fusion.py
 
-from typing import Optional, Dict, List
+import sys
+from types import MappingProxyType
+from typing import Optional, Dict, List, Mapping, Sequence, Tuple
 
+from config import (
+    GESTURE_OPEN_NAME,
+    GESTURE_FIST_NAME,
+    GESTURE_THUMBS_UP_NAME,
+    INITIAL_STATE,
+    VALID_STATES,
+    VOICE_KEYWORDS,
+)
 
-def fuse_events(
-    current_state: str,
-    gesture_event: Optional[Dict],
-    voice_event: Optional[Dict],
-    eeg_state: Dict,
-) -> Dict:
+# --- Acciones (constantes internadas: se comparan por identidad y no se recrean) ---
+ACTION_RESET = sys.intern("ACTION_RESET")
+ACTION_START = sys.intern("ACTION_START")
+ACTION_PAUSE = sys.intern("ACTION_PAUSE")
+ACTION_RESUME = sys.intern("ACTION_RESUME")
+ACTION_ALERT_ON = sys.intern("ACTION_ALERT_ON")
+ACTION_ALERT_OFF = sys.intern("ACTION_ALERT_OFF")
+ACTION_SET_COLOR_RED = sys.intern("ACTION_SET_COLOR_RED")
+ACTION_SET_COLOR_BLUE = sys.intern("ACTION_SET_COLOR_BLUE")
+ACTION_FASTER = sys.intern("ACTION_FASTER")
+ACTION_SLOWER = sys.intern("ACTION_SLOWER")
+
+_VOICE_EXTRA_ACTIONS = {
+    "CMD_RED": ACTION_SET_COLOR_RED,
+    "CMD_BLUE": ACTION_SET_COLOR_BLUE,
+    "CMD_FASTER": ACTION_FASTER,
+    "CMD_SLOWER": ACTION_SLOWER,
+}
+
+# Alfabetos de entrada de la tabla (índice 0 = sin evento)
+_STATES: Tuple[str, ...] = tuple(sys.intern(s) for s in VALID_STATES)
+_GESTURES: Tuple[Optional[str], ...] = (None, GESTURE_OPEN_NAME, GESTURE_FIST_NAME, GESTURE_THUMBS_UP_NAME)
+_VOICES: Tuple[Optional[str], ...] = (None,) + tuple(dict.fromkeys(VOICE_KEYWORDS.values()))
+
+
+def _fuse_rules(state: str, gesture_name: Optional[str], voice_name: Optional[str], eeg_label: str):
     """
-    Aplica reglas de fusión entre gesto, voz y EEG para actualizar el estado global
-    y producir acciones. Devuelve:
-    {
-      "state": "RUNNING",
-      "actions": ["ACTION_START"],
-      "alert": True/False
-    }
+    Reglas de fusión de referencia. Solo se evalúan al compilar la tabla
+    (y como respaldo para estados fuera de VALID_STATES). La salida es una vista
+    de solo lectura (MappingProxyType) porque se comparte entre llamadas.
     """
-
-    state = current_state
     actions: List[str] = []
 
-    gesture_name = gesture_event["name"] if gesture_event else None
-    voice_name = voice_event["name"] if voice_event else None
-    eeg_label = eeg_state.get("label", "EEG_NEUTRAL")
-
     # --- Regla global: RESET ---
     if voice_name == "CMD_RESET":
         state = "IDLE"
-        actions.append("ACTION_RESET")
+        actions.append(ACTION_RESET)
 
     # --- Cambios de estado según gesto/voz ---
     if state == "IDLE":
-        if gesture_name in ("GESTURE_THUMBS_UP",) or voice_name == "CMD_START":
+        if gesture_name == GESTURE_THUMBS_UP_NAME or voice_name == "CMD_START":
             state = "RUNNING"
-            actions.append("ACTION_START")
+            actions.append(ACTION_START)
 
     elif state == "RUNNING":
-        if gesture_name in ("GESTURE_OPEN_HAND", "GESTURE_FIST") or voice_name == "CMD_STOP":
+        if gesture_name in (GESTURE_OPEN_NAME, GESTURE_FIST_NAME) or voice_name == "CMD_STOP":
             state = "PAUSED"
-            actions.append("ACTION_PAUSE")
+            actions.append(ACTION_PAUSE)
 
     elif state == "PAUSED":
-        if gesture_name in ("GESTURE_THUMBS_UP",) or voice_name == "CMD_START":
+        if gesture_name == GESTURE_THUMBS_UP_NAME or voice_name == "CMD_START":
             state = "RUNNING"
-            actions.append("ACTION_RESUME")
+            actions.append(ACTION_RESUME)
 
     # --- Modo alerta basado en EEG ---
-    alert_mode = False
-    if eeg_label == "EEG_ALERT" and state == "RUNNING":
-        alert_mode = True
-        actions.append("ACTION_ALERT_ON")
-    else:
-        actions.append("ACTION_ALERT_OFF")
+    alert_mode = eeg_label == "EEG_ALERT" and state == "RUNNING"
+    actions.append(ACTION_ALERT_ON if alert_mode else ACTION_ALERT_OFF)
 
     # --- Ajustes visuales adicionales según comandos de voz ---
-    if voice_name in ("CMD_RED", "CMD_BLUE"):
-        # ACTION_SET_COLOR_RED o ACTION_SET_COLOR_BLUE
-        actions.append(f"ACTION_SET_COLOR_{voice_name.split('_')[-1]}")
-
-    if voice_name in ("CMD_FASTER", "CMD_SLOWER"):
-        actions.append(voice_name.replace("CMD_", "ACTION_"))
+    extra = _VOICE_EXTRA_ACTIONS.get(voice_name)
+    if extra:
+        actions.append(extra)
 
-    return {
-        "state": state,
-        "actions": actions,
+    return MappingProxyType({
+        "state": sys.intern(state),
+        "actions": tuple(actions),
         "alert": alert_mode,
+    })
+
+
+class FusionEngine:
+    """
+    Máquina de estados de fusión compilada a una tabla indexada por
+    (estado, gesto, voz, alerta EEG). Cada celda guarda la salida ya construida,
+    así fusionar un frame es un par de búsquedas en diccionarios y una indexación.
+
+    Si las entradas no cambian respecto a la llamada anterior se devuelve
+    directamente la salida cacheada.
+
+    Las salidas son compartidas entre llamadas, así que son de solo lectura
+    (MappingProxyType con "actions" como tupla): modificarlas lanza TypeError /
+    AttributeError. Para una copia modificable: dict(salida) y list(salida["actions"]).
+    """
+
+    def __init__(self):
+        self._state_idx = {s: i for i, s in enumerate(_STATES)}
+        self._gesture_idx = {g: i for i, g in enumerate(_GESTURES)}
+        self._voice_idx = {v: i for i, v in enumerate(_VOICES)}
+        self._n_gestures = len(_GESTURES)
+        self._n_voices = len(_VOICES)
+        self._table = tuple(
+            _fuse_rules(state, gesture, voice, "EEG_ALERT" if alert else "EEG_NEUTRAL")
+            for state in _STATES
+            for gesture in _GESTURES
+            for voice in _VOICES
+            for alert in (False, True)
+        )
+        self._last_key = None
+        self._last_output = None
+
+    def _lookup(self, state_i: int, gesture_i: int, voice_i: int, alert_i: int) -> Mapping:
+        return self._table[((state_i * self._n_gestures + gesture_i) * self._n_voices + voice_i) * 2 + alert_i]
+
+    def fuse(
+        self,
+        current_state: str,
+        gesture_name: Optional[str],
+        voice_name: Optional[str],
+        eeg_label: str,
+    ) -> Mapping:
+        key = (current_state, gesture_name, voice_name, eeg_label)
+        if key == self._last_key:
+            return self._last_output
+
+        state_i = self._state_idx.get(current_state)
+        if state_i is None:
+            output = _fuse_rules(current_state, gesture_name, voice_name, eeg_label)
+        else:
+            # Gestos/comandos desconocidos no disparan ninguna regla: equivalen a "sin evento"
+            output = self._lookup(
+                state_i,
+                self._gesture_idx.get(gesture_name, 0),
+                self._voice_idx.get(voice_name, 0),
+                1 if eeg_label == "EEG_ALERT" else 0,
+            )
+        self._last_key = key
+        self._last_output = output
+        return output
+
+    def fuse_stream(
+        self,
+        gesture_names: Sequence[Optional[str]],
+        voice_names: Sequence[Optional[str]],
+        eeg_labels: Sequence[str],
+        initial_state: str = INITIAL_STATE,
+    ) -> List[Mapping]:
+        """
+        Fusiona de una vez un flujo grabado (una entrada por frame, None = sin evento)
+        y devuelve la salida de cada frame encadenando el estado.
+        """
+        gesture_ids = [self._gesture_idx.get(g, 0) for g in gesture_names]
+        voice_ids = [self._voice_idx.get(v, 0) for v in voice_names]
+        alert_ids = [1 if label == "EEG_ALERT" else 0 for label in eeg_labels]
+
+        outputs: List[Mapping] = []
+        state = initial_state
+        state_i = self._state_idx.get(state)
+        for g, v, a in zip(gesture_ids, voice_ids, alert_ids):
+            if state_i is None:
+                output = _fuse_rules(state, _GESTURES[g], _VOICES[v], "EEG_ALERT" if a else "EEG_NEUTRAL")
+            else:
+                output = self._lookup(state_i, g, v, a)
+            outputs.append(output)
+            state = output["state"]
+            state_i = self._state_idx.get(state)
+        return outputs
+
+
+_engine = FusionEngine()
+
+
+def fuse_events(
+    current_state: str,
+    gesture_event: Optional[Dict],
+    voice_event: Optional[Dict],
+    eeg_state: Dict,
+) -> Mapping:
+    """
+    Aplica reglas de fusión entre gesto, voz y EEG para actualizar el estado global
+    y producir acciones. Devuelve una vista de solo lectura (MappingProxyType),
+    compartida entre llamadas:
+    {
+      "state": "RUNNING",
+      "actions": ("ACTION_START", "ACTION_ALERT_OFF"),
+      "alert": True/False
     }
+    Antes era un dict nuevo con "actions" como lista; quien necesite modificarla
+    debe copiarla: dict(salida), list(salida["actions"]).
+    """
+    return _engine.fuse(
+        current_state,
+        gesture_event["name"] if gesture_event else None,
+        voice_event["name"] if voice_event else None,
+        eeg_state.get("label", "EEG_NEUTRAL"),
+    )
+
+
+def fuse_event_stream(
+    gesture_names: Sequence[Optional[str]],
+    voice_names: Sequence[Optional[str]],
+    eeg_labels: Sequence[str],
+    initial_state: str = INITIAL_STATE,
+) -> List[Mapping]:
+    """
+    Versión por lotes de fuse_events para análisis offline de sesiones grabadas.
+    """
+    return _engine.fuse_stream(gesture_names, voice_names, eeg_labels, initial_state)
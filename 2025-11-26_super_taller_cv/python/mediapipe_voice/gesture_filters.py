@@ -0,0 +1,194 @@
+# gesture_filters.py
+
+import math
+from typing import Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+
+def _smoothing_factor(dt: float, cutoff) -> np.ndarray:
+    r = 2.0 * math.pi * cutoff * dt
+    return r / (r + 1.0)
+
+
+class OneEuroFilter:
+    """
+    Filtro One-Euro vectorizado: suaviza todas las coordenadas de un array a la vez
+    (p.ej. manos x 21 landmarks x 3).
+
+    - Con la mano quieta la frecuencia de corte es min_cutoff (mucho suavizado, sin jitter).
+    - Al moverse el corte sube con beta * |velocidad| (poco retraso en movimientos rápidos).
+
+    Si cambia la forma de la entrada (aparece o desaparece una mano) el filtro se reinicia.
+    El estado vive en arrays preasignados; filter() no crea listas por frame.
+    """
+
+    def __init__(self, min_cutoff: float = 1.0, beta: float = 1.0, d_cutoff: float = 1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self._x: Optional[np.ndarray] = None
+        self._dx: Optional[np.ndarray] = None
+        self._t: Optional[float] = None
+
+    def filter(self, x: np.ndarray, t: float) -> np.ndarray:
+        """
+        Devuelve x suavizado (array nuevo de la misma forma). `t` en segundos.
+        """
+        x = np.asarray(x, dtype=np.float32)
+        if self._x is None or self._x.shape != x.shape:
+            self._x = x.copy()
+            self._dx = np.zeros_like(x)
+            self._t = t
+            return self._x.copy()
+
+        dt = t - self._t
+        if dt <= 0:
+            return self._x.copy()
+        self._t = t
+
+        a_d = _smoothing_factor(dt, self.d_cutoff)
+        self._dx += a_d * ((x - self._x) / dt - self._dx)
+
+        cutoff = self.min_cutoff + self.beta * np.abs(self._dx)
+        a = _smoothing_factor(dt, cutoff)
+        self._x += a * (x - self._x)
+        return self._x.copy()
+
+    __call__ = filter
+
+
+class EMAFilter:
+    """
+    Media móvil exponencial vectorizada (alpha fijo, sin depender de dt).
+    """
+
+    def __init__(self, alpha: float = 0.5):
+        self.alpha = alpha
+        self.reset()
+
+    def reset(self):
+        self._x: Optional[np.ndarray] = None
+
+    def filter(self, x: np.ndarray, t: Optional[float] = None) -> np.ndarray:
+        x = np.asarray(x, dtype=np.float32)
+        if self._x is None or self._x.shape != x.shape:
+            self._x = x.copy()
+        else:
+            self._x += self.alpha * (x - self._x)
+        return self._x.copy()
+
+    __call__ = filter
+
+
+class MajorityWindow:
+    """
+    Votación binaria sobre los últimos `size` frames con conteo incremental (O(1) por frame).
+
+    Histéresis: se activa cuando hay al menos `on_count` votos y se desactiva
+    cuando quedan `off_count` o menos (off_count < on_count evita parpadeos).
+
+    push() devuelve (activo, flanco_de_subida).
+    """
+
+    def __init__(self, size: int, on_count: int, off_count: Optional[int] = None):
+        self.size = size
+        self.on_count = on_count
+        self.off_count = on_count - 1 if off_count is None else off_count
+        self._ring = bytearray(size)
+        self.reset()
+
+    def reset(self):
+        self._ring[:] = bytes(self.size)
+        self._pos = 0
+        self.count = 0
+        self.active = False
+
+    def push(self, vote: bool) -> Tuple[bool, bool]:
+        v = 1 if vote else 0
+        self.count += v - self._ring[self._pos]
+        self._ring[self._pos] = v
+        self._pos = (self._pos + 1) % self.size
+
+        was_active = self.active
+        if not was_active and self.count >= self.on_count:
+            self.active = True
+        elif was_active and self.count <= self.off_count:
+            self.active = False
+        return self.active, self.active and not was_active
+
+
+class LabelMajority:
+    """
+    Igual que MajorityWindow pero para etiquetas (p.ej. nombres de gesto; None = nada).
+
+    La etiqueta confirmada es la que reúne `on_count` votos en la ventana; se
+    mantiene hasta que baja a `off_count`. push() devuelve (etiqueta_confirmada, cambió),
+    donde cambió es True solo cuando se confirma una etiqueta distinta de la anterior.
+    """
+
+    def __init__(self, size: int, on_count: int, off_count: Optional[int] = None):
+        self.size = size
+        self.on_count = on_count
+        self.off_count = on_count - 1 if off_count is None else off_count
+        self._ring = [None] * size
+        self.reset()
+
+    def reset(self):
+        for i in range(self.size):
+            self._ring[i] = None
+        self._pos = 0
+        self._counts: Dict[Hashable, int] = {}
+        self.label: Optional[Hashable] = None
+
+    def push(self, label: Optional[Hashable]) -> Tuple[Optional[Hashable], bool]:
+        old = self._ring[self._pos]
+        if old is not None:
+            self._counts[old] -= 1
+        self._ring[self._pos] = label
+        self._pos = (self._pos + 1) % self.size
+        if label is not None:
+            self._counts[label] = self._counts.get(label, 0) + 1
+
+        previous = self.label
+        if previous is not None and self._counts.get(previous, 0) <= self.off_count:
+            self.label = None
+        if label is not None and label != self.label and self._counts[label] >= self.on_count:
+            self.label = label
+        return self.label, self.label is not None and self.label != previous
+
+
+class Hysteresis:
+    """
+    Umbral con histéresis para un valor escalar.
+
+    Si on < off se activa con valores bajos (valor <= on) y se suelta al subir
+    de off; si on > off es al revés. Ej.: mano arriba cuando center_y <= 0.35,
+    y no se suelta hasta center_y >= 0.40.
+    """
+
+    def __init__(self, on: float, off: float):
+        self.on = on
+        self.off = off
+        self.active = False
+
+    def reset(self):
+        self.active = False
+
+    def update(self, value: Optional[float]) -> bool:
+        if value is None:
+            self.active = False
+        elif self.on <= self.off:
+            if not self.active and value <= self.on:
+                self.active = True
+            elif self.active and value >= self.off:
+                self.active = False
+        else:
+            if not self.active and value >= self.on:
+                self.active = True
+            elif self.active and value <= self.off:
+                self.active = False
+        return self.active
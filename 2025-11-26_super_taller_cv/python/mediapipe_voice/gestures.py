@@ -1,99 +1,370 @@
 # gestures.py
 
 import time
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, List, Tuple
 
 import cv2
 import mediapipe as mp
+import numpy as np
 
 from config import (
     GESTURE_OPEN_NAME,
     GESTURE_FIST_NAME,
     GESTURE_THUMBS_UP_NAME,
+    GESTURE_TRACKING_MODE,
+    GESTURE_ROI_MARGIN,
+    GESTURE_ROI_SCALE,
+    GESTURE_STABILITY_THRESHOLD,
+    GESTURE_MAX_SKIP_FRAMES,
+    GESTURE_REDETECT_EVERY,
+    GESTURE_SMOOTHING,
+    GESTURE_FILTER_MIN_CUTOFF,
+    GESTURE_FILTER_BETA,
+    GESTURE_VOTE_WINDOW,
+    GESTURE_VOTE_ON,
+    GESTURE_VOTE_OFF,
+    GESTURE_QOS_ENABLED,
+    GESTURE_TARGET_FPS,
 )
+from gesture_filters import OneEuroFilter, LabelMajority
+from qos import QualityController, QualityLevel
+
+# Indices de landmarks (tips y PIP) de índice, medio, anular y meñique
+FINGER_TIPS = np.array([8, 12, 16, 20])
+FINGER_PIPS = np.array([6, 10, 14, 18])
+THUMB_TIP = 4
+THUMB_IP = 3
+THUMB_UP_TOLERANCE = 0.05
+
+# Código -> nombre de gesto (0 = sin gesto reconocido)
+_GESTURE_NAMES = (None, GESTURE_OPEN_NAME, GESTURE_THUMBS_UP_NAME, GESTURE_FIST_NAME)
+
+
+def landmarks_to_array(multi_hand_landmarks) -> np.ndarray:
+    """
+    Convierte los landmarks de MediaPipe (una vez por frame) en un array
+    (manos, 21, 3) con coordenadas normalizadas x, y, z.
+    """
+    return np.array(
+        [[(p.x, p.y, p.z) for p in hand.landmark] for hand in multi_hand_landmarks],
+        dtype=np.float32,
+    ).reshape(-1, 21, 3)
+
+
+def classify_gestures(landmarks: np.ndarray) -> List[Optional[str]]:
+    """
+    Clasifica todas las manos de un array (manos, 21, 3) en una sola pasada vectorizada.
+    Devuelve un nombre de gesto (o None) por mano.
+    """
+    y = landmarks[:, :, 1]
+    # En coordenadas de imagen, y crece hacia abajo. Dedo extendido => tip "más arriba" (y más pequeño).
+    num_extended = np.count_nonzero(y[:, FINGER_TIPS] < y[:, FINGER_PIPS], axis=1)
+    thumb_extended = np.abs(y[:, THUMB_TIP] - y[:, THUMB_IP]) < THUMB_UP_TOLERANCE
+
+    codes = np.select(
+        [num_extended == 4, (num_extended == 0) & thumb_extended, num_extended == 0],
+        [1, 2, 3],
+        default=0,
+    )
+    return [_GESTURE_NAMES[c] for c in codes.tolist()]
+
+
+# Lado mínimo (px) de la imagen que llega a MediaPipe cuando se infiere sobre la ROI
+ROI_MIN_SIZE = 32
+
+
+def landmarks_roi(landmarks: np.ndarray, width: int, height: int, margin: float) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Calcula un recorte cuadrado (x0, y0, x1, y1) en píxeles alrededor de todas las manos,
+    ampliado por `margin` y limitado al frame. Devuelve None si queda demasiado pequeño.
+    La reducción posterior del recorte se limita con roi_input_scale().
+    """
+    xy = landmarks[..., :2].reshape(-1, 2)
+    x_min, y_min = xy.min(axis=0)
+    x_max, y_max = xy.max(axis=0)
+    side = max((x_max - x_min) * width, (y_max - y_min) * height) * (1.0 + 2.0 * margin)
+    cx = (x_min + x_max) * 0.5 * width
+    cy = (y_min + y_max) * 0.5 * height
+
+    x0 = int(max(0, cx - side / 2))
+    y0 = int(max(0, cy - side / 2))
+    x1 = int(min(width, cx + side / 2))
+    y1 = int(min(height, cy + side / 2))
+    if x1 - x0 < ROI_MIN_SIZE or y1 - y0 < ROI_MIN_SIZE:
+        return None
+    return x0, y0, x1, y1
+
+
+def landmark_motion(landmarks: np.ndarray, previous: np.ndarray) -> float:
+    """
+    Desplazamiento medio (norma L2 en coords normalizadas) de cada landmark entre
+    dos detecciones; es la medida que se compara con el umbral de estabilidad.
+    """
+    return float(np.linalg.norm(landmarks[..., :2] - previous[..., :2], axis=-1).mean())
+
+
+def roi_input_scale(roi: Tuple[int, int, int, int], scale: float) -> float:
+    """
+    Escala de entrada para un recorte: `scale` (p.ej. GESTURE_ROI_SCALE * input_scale de QoS),
+    subida lo justo para que el lado menor no baje de ROI_MIN_SIZE píxeles.
+    """
+    x0, y0, x1, y1 = roi
+    return max(scale, ROI_MIN_SIZE / min(x1 - x0, y1 - y0))
 
 
 class GestureDetector:
-    def __init__(self, max_num_hands: int = 1, detection_confidence: float = 0.7, tracking_confidence: float = 0.6):
+    def __init__(
+        self,
+        max_num_hands: int = 1,
+        detection_confidence: float = 0.7,
+        tracking_confidence: float = 0.6,
+        tracking_mode: bool = GESTURE_TRACKING_MODE,
+        roi_margin: float = GESTURE_ROI_MARGIN,
+        roi_scale: float = GESTURE_ROI_SCALE,
+        stability_threshold: float = GESTURE_STABILITY_THRESHOLD,
+        max_skip_frames: int = GESTURE_MAX_SKIP_FRAMES,
+        redetect_every: int = GESTURE_REDETECT_EVERY,
+        smoothing: bool = GESTURE_SMOOTHING,
+        vote_window: int = GESTURE_VOTE_WINDOW,
+        vote_on: int = GESTURE_VOTE_ON,
+        vote_off: int = GESTURE_VOTE_OFF,
+        adaptive_quality: bool = GESTURE_QOS_ENABLED,
+        qos: Optional[QualityController] = None,
+    ):
         self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
+        self._hands_kwargs = dict(
             max_num_hands=max_num_hands,
             min_detection_confidence=detection_confidence,
             min_tracking_confidence=tracking_confidence,
         )
+        self.model_complexity = 1  # valor por defecto de MediaPipe Hands
+        self.input_scale = 1.0
+        self.detect_every = 1
+        self.hands = self.mp_hands.Hands(model_complexity=self.model_complexity, **self._hands_kwargs)
         self.mp_drawing = mp.solutions.drawing_utils
-        self.last_gesture_name: Optional[str] = None
-        self.last_event_time = 0.0
-        self.min_event_interval = 0.3  # segundos entre eventos para no spamear
+        # Filtrado temporal: suavizado de landmarks y votación con histéresis por mano
+        # (índice de detección); un evento sale solo cuando se confirma un gesto nuevo.
+        self.landmark_filter = OneEuroFilter(GESTURE_FILTER_MIN_CUTOFF, GESTURE_FILTER_BETA) if smoothing else None
+        self.vote_window = vote_window
+        self.vote_on = vote_on
+        self.vote_off = vote_off
+        self.votes: Dict[int, LabelMajority] = {}
 
-    def _finger_extended(self, landmarks, tip_id: int, pip_id: int) -> bool:
-        tip = landmarks[tip_id]
-        pip = landmarks[pip_id]
-        # En coordenadas de imagen, y crece hacia abajo. Dedo extendido => tip "más arriba" (y más pequeño).
-        return tip.y < pip.y
+        # Modo tracking: inferencia sobre el recorte de la mano anterior a resolución
+        # reducida y salto de frames mientras la mano está quieta.
+        self.tracking_mode = tracking_mode
+        self.roi_margin = roi_margin
+        self.roi_scale = roi_scale
+        self.stability_threshold = stability_threshold
+        self.max_skip_frames = max_skip_frames
+        self.redetect_every = redetect_every
+        self._roi: Optional[Tuple[int, int, int, int]] = None
+        self._prev_landmarks: Optional[np.ndarray] = None
+        self._cached = None  # (landmarks, gesture_names, multi_hand_landmarks, region)
+        self._skip_left = 0
+        self._frames_since_full = 0
+        self.inference_count = 0
+        self.skipped_frames = 0
+        self._since_inference = 0
+
+        # Calidad adaptativa: modelo, resolución y cadencia según el presupuesto por frame
+        if qos is None and adaptive_quality:
+            qos = QualityController(GESTURE_TARGET_FPS)
+        self.qos = qos
+        if qos is not None:
+            self.apply_quality(qos.level)
+            qos.on_change(lambda index, level: self.apply_quality(level))
+
+    def apply_quality(self, level: QualityLevel):
+        """
+        Aplica un nivel de calidad; cambiar de modelo recrea MediaPipe Hands.
+        """
+        if level.model_complexity != self.model_complexity:
+            self.hands.close()
+            self.model_complexity = level.model_complexity
+            self.hands = self.mp_hands.Hands(model_complexity=self.model_complexity, **self._hands_kwargs)
+            self.reset_tracking()
+        self.input_scale = level.input_scale
+        self.detect_every = level.detect_every
 
     def _classify_gesture(self, hand_landmarks) -> Optional[str]:
-        lm = hand_landmarks.landmark
-
-        # Indices PIP y tips
-        index_extended = self._finger_extended(lm, tip_id=8, pip_id=6)
-        middle_extended = self._finger_extended(lm, tip_id=12, pip_id=10)
-        ring_extended = self._finger_extended(lm, tip_id=16, pip_id=14)
-        pinky_extended = self._finger_extended(lm, tip_id=20, pip_id=18)
-
-        fingers_extended = [index_extended, middle_extended, ring_extended, pinky_extended]
-        num_extended = sum(fingers_extended)
-
-        # Clasificación heurística simple
-        if num_extended == 4:
-            return GESTURE_OPEN_NAME
-        if num_extended == 0:
-            # Posible puño o thumbs up; check pulgar
-            thumb_tip = lm[4]
-            thumb_ip = lm[3]
-            thumb_extended = abs(thumb_tip.y - thumb_ip.y) < 0.05
-            if thumb_extended:
-                return GESTURE_THUMBS_UP_NAME
-            return GESTURE_FIST_NAME
-
-        # Se puede extender con más patrones si quieres
-        return None
+        return classify_gestures(landmarks_to_array([hand_landmarks]))[0]
 
-    def process_frame(self, frame) -> Tuple[Optional[Dict], any]:
+    def reset_filters(self):
         """
-        Procesa un frame BGR de OpenCV, dibuja la mano y devuelve (evento, frame_dibujado).
-        Evento es un dict o None:
+        Olvida el suavizado y las votaciones (p.ej. al reiniciar una sesión grabada).
+        """
+        if self.landmark_filter is not None:
+            self.landmark_filter.reset()
+        self.votes.clear()
+
+    def _vote(self, hand: int, gesture_name: Optional[str]) -> Tuple[Optional[str], bool]:
+        majority = self.votes.get(hand)
+        if majority is None:
+            majority = self.votes[hand] = LabelMajority(self.vote_window, self.vote_on, self.vote_off)
+        return majority.push(gesture_name)
+
+    def reset_tracking(self):
+        """
+        Olvida la ROI y la caché; el siguiente frame hace detección en el frame completo.
+        """
+        self._roi = None
+        self._prev_landmarks = None
+        self._cached = None
+        self._skip_left = 0
+        self._frames_since_full = 0
+
+    def _detect(self, frame):
+        """
+        Ejecuta MediaPipe sobre el frame completo o sobre la ROI reducida.
+        Devuelve (landmarks en coords normalizadas del frame, multi_hand_landmarks, región) o None.
+        """
+        h, w = frame.shape[:2]
+        region = (0, 0, w, h)
+        image = frame
+        scale = self.input_scale
+        use_roi = self.tracking_mode and self._roi is not None and self._frames_since_full < self.redetect_every
+        if use_roi:
+            region = self._roi
+            x0, y0, x1, y1 = region
+            image = frame[y0:y1, x0:x1]
+            scale = roi_input_scale(region, scale * self.roi_scale)
+            self._frames_since_full += 1
+        else:
+            self._frames_since_full = 0
+        if scale < 1.0:
+            image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        results = self.hands.process(image_rgb)
+        self.inference_count += 1
+
+        if not results.multi_hand_landmarks:
+            if self.tracking_mode:
+                self.reset_tracking()
+            return None
+
+        landmarks = landmarks_to_array(results.multi_hand_landmarks)
+        if use_roi:
+            # Coordenadas del recorte -> coordenadas normalizadas del frame completo
+            x0, y0, x1, y1 = region
+            landmarks[..., 0] = (x0 + landmarks[..., 0] * (x1 - x0)) / w
+            landmarks[..., 1] = (y0 + landmarks[..., 1] * (y1 - y0)) / h
+        return landmarks, results.multi_hand_landmarks, region
+
+    def _update_tracking(self, landmarks, gesture_names, multi_hand_landmarks, region, width, height):
+        if self._prev_landmarks is not None and self._prev_landmarks.shape == landmarks.shape:
+            motion = landmark_motion(landmarks, self._prev_landmarks)
+            self._skip_left = self.max_skip_frames if motion < self.stability_threshold else 0
+        else:
+            self._skip_left = 0
+        self._prev_landmarks = landmarks
+        self._cached = (landmarks, gesture_names, multi_hand_landmarks, region)
+        self._roi = landmarks_roi(landmarks, width, height, self.roi_margin)
+
+    def process_frame_multi(self, frame, now: Optional[float] = None) -> Tuple[List[Dict], any]:
+        """
+        Procesa un frame BGR de OpenCV, dibuja todas las manos y devuelve (eventos, frame_dibujado).
+        `now` permite fijar el timestamp (p.ej. al reproducir una sesión grabada).
+        Hay como máximo un evento por mano, y solo cuando su votación confirma
+        un gesto distinto al anterior (ver gesture_filters.py):
         {
           "type": "gesture",
           "name": "GESTURE_OPEN_HAND",
+          "hand": 0,
           "timestamp": ...
         }
         """
-        image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(image_rgb)
+        if self.qos is None:
+            return self._process(frame, now)
+        t0 = time.perf_counter()
+        result = self._process(frame, now)
+        self.qos.observe(time.perf_counter() - t0)
+        return result
+
+    def _process(self, frame, now: Optional[float]):
+        events: List[Dict] = []
+        h, w = frame.shape[:2]
+        if now is None:
+            now = time.time()
 
-        event = None
-        if results.multi_hand_landmarks:
-            # Usamos solo la primera mano detectada
-            hand_landmarks = results.multi_hand_landmarks[0]
+        # Cadencia de la calidad adaptativa: inferir solo 1 de cada detect_every frames
+        cadence_skip = self._since_inference + 1 < self.detect_every
+        tracking_skip = (
+            self.tracking_mode
+            and self._cached is not None
+            and self._skip_left > 0
+            and self._frames_since_full < self.redetect_every
+        )
+        if cadence_skip and self._cached is None:
+            # Sin mano en la última inferencia: nada que reutilizar
+            self._since_inference += 1
+            self.skipped_frames += 1
+            return events, frame
+        if cadence_skip or tracking_skip:
+            # Mano estable (o frame fuera de cadencia): reutilizamos el último resultado sin inferir
+            if tracking_skip:
+                self._skip_left -= 1
+            self._frames_since_full += 1
+            self._since_inference += 1
+            self.skipped_frames += 1
+            _, gesture_names, multi_hand_landmarks, region = self._cached
+        else:
+            self._since_inference = 0
+            detection = self._detect(frame)
+            if detection is None:
+                self._cached = None
+                # Sin manos: cada votación recibe "nada" para poder soltar el gesto
+                if self.landmark_filter is not None:
+                    self.landmark_filter.reset()
+                for hand in self.votes:
+                    self._vote(hand, None)
+                return events, frame
+            landmarks, multi_hand_landmarks, region = detection
+            # Se clasifica sobre landmarks suavizados; la ROI sigue a los crudos
+            smoothed = self.landmark_filter(landmarks, now) if self.landmark_filter is not None else landmarks
+            gesture_names = classify_gestures(smoothed)
+            if self.tracking_mode:
+                self._update_tracking(landmarks, gesture_names, multi_hand_landmarks, region, w, h)
+            else:
+                self._cached = (landmarks, gesture_names, multi_hand_landmarks, region)
 
-            # Dibujar landmarks
+        # Dibujar landmarks sobre la región donde se infirieron (vista del frame)
+        x0, y0, x1, y1 = region
+        target = frame[y0:y1, x0:x1]
+        for hand_landmarks in multi_hand_landmarks:
             self.mp_drawing.draw_landmarks(
-                frame,
+                target,
                 hand_landmarks,
                 self.mp_hands.HAND_CONNECTIONS,
             )
 
-            gesture_name = self._classify_gesture(hand_landmarks)
-
-            now = time.time()
-            if gesture_name and (gesture_name != self.last_gesture_name or (now - self.last_event_time) > self.min_event_interval):
-                event = {
+        for hand, gesture_name in enumerate(gesture_names):
+            confirmed, changed = self._vote(hand, gesture_name)
+            if changed:
+                events.append({
                     "type": "gesture",
-                    "name": gesture_name,
+                    "name": confirmed,
+                    "hand": hand,
                     "timestamp": now,
-                }
-                self.last_gesture_name = gesture_name
-                self.last_event_time = now
+                })
+        for hand in self.votes:
+            if hand >= len(gesture_names):
+                self._vote(hand, None)
+
+        return events, frame
 
-        return event, frame
+    def process_frame(self, frame) -> Tuple[Optional[Dict], any]:
+        """
+        Procesa un frame BGR de OpenCV, dibuja la mano y devuelve (evento, frame_dibujado).
+        Evento es un dict o None:
+        {
+          "type": "gesture",
+          "name": "GESTURE_OPEN_HAND",
+          "timestamp": ...
+        }
+        Si hay varias manos devuelve el evento de la primera; usa process_frame_multi
+        para obtener uno por mano.
+        """
+        events, frame = self.process_frame_multi(frame)
+        return (events[0] if events else None), frame
@@ -0,0 +1,213 @@
+# kws.py
+
+import argparse
+import glob
+import os
+import time
+import wave
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+KWS_SAMPLE_RATE = 16000
+FRAME_LEN = 400        # 25 ms a 16 kHz
+FRAME_HOP = 160        # 10 ms
+N_FFT = 512
+N_MELS = 26
+N_MFCC = 13
+
+
+def _mel_filterbank(sample_rate: int, n_fft: int, n_mels: int) -> np.ndarray:
+    def hz_to_mel(f):
+        return 2595.0 * np.log10(1.0 + f / 700.0)
+
+    def mel_to_hz(m):
+        return 700.0 * (10.0 ** (m / 2595.0) - 1.0)
+
+    mels = np.linspace(hz_to_mel(0.0), hz_to_mel(sample_rate / 2.0), n_mels + 2)
+    bins = np.floor((n_fft + 1) * mel_to_hz(mels) / sample_rate).astype(int)
+    fb = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for m in range(1, n_mels + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        if center > left:
+            fb[m - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+        if right > center:
+            fb[m - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+    return fb
+
+
+def _dct_matrix(n_in: int, n_out: int) -> np.ndarray:
+    n = np.arange(n_in)
+    k = np.arange(n_out)[:, None]
+    return (np.cos(np.pi * k * (2 * n + 1) / (2 * n_in)) * np.sqrt(2.0 / n_in)).astype(np.float32)
+
+
+# Se calculan una sola vez al importar
+_WINDOW = np.hamming(FRAME_LEN).astype(np.float32)
+_MEL_FB = _mel_filterbank(KWS_SAMPLE_RATE, N_FFT, N_MELS)
+_DCT = _dct_matrix(N_MELS, N_MFCC)
+
+
+def _frames(samples: np.ndarray) -> np.ndarray:
+    if len(samples) < FRAME_LEN:
+        samples = np.pad(samples, (0, FRAME_LEN - len(samples)))
+    n = 1 + (len(samples) - FRAME_LEN) // FRAME_HOP
+    idx = np.arange(FRAME_LEN)[None, :] + FRAME_HOP * np.arange(n)[:, None]
+    return samples[idx]
+
+
+def trim_silence(samples: np.ndarray, floor_db: float = -50.0, range_db: float = 30.0, pad_frames: int = 3) -> np.ndarray:
+    """
+    Endpointing por energía: conserva el tramo entre la primera y la última trama
+    que superan max(floor_db, pico - range_db). Devuelve un array vacío si todo es silencio.
+    """
+    frames = _frames(samples)
+    energy_db = 10.0 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+    threshold = max(floor_db, float(energy_db.max()) - range_db)
+    active = np.nonzero(energy_db > threshold)[0]
+    if active.size == 0:
+        return samples[:0]
+    first = max(0, active[0] - pad_frames)
+    last = min(len(frames) - 1, active[-1] + pad_frames)
+    return samples[first * FRAME_HOP:last * FRAME_HOP + FRAME_LEN]
+
+
+def mfcc(samples: np.ndarray) -> np.ndarray:
+    """
+    MFCC (tramas x N_MFCC) con normalización de media por enunciado.
+    `samples` en float32, rango [-1, 1], a KWS_SAMPLE_RATE.
+    """
+    emphasized = np.append(samples[:1], samples[1:] - 0.97 * samples[:-1])
+    spectrum = np.abs(np.fft.rfft(_frames(emphasized) * _WINDOW, n=N_FFT)) ** 2
+    log_mel = np.log(spectrum @ _MEL_FB.T + 1e-8)
+    coeffs = log_mel @ _DCT.T
+    return (coeffs - coeffs.mean(axis=0)).astype(np.float32)
+
+
+def dtw_distance(a: np.ndarray, b: np.ndarray) -> float:
+    """
+    DTW con pendiente restringida a [1/2, 2] (pasos (1,1), (1,2), (2,1)).
+    Cada fila depende solo de las dos anteriores, así que se resuelve fila a
+    fila con operaciones vectorizadas. Devuelve la distancia normalizada por
+    la longitud de ambos caminos (inf si las longitudes son incompatibles).
+    """
+    n, m = len(a), len(b)
+    if n == 0 or m == 0 or n > 2 * m + 1 or m > 2 * n + 1:
+        return float("inf")
+    cost = np.sqrt(((a[:, None, :] - b[None, :, :]) ** 2).sum(axis=2))
+
+    inf = np.float32(np.inf)
+    prev2 = np.full(m + 2, inf, dtype=np.float32)
+    prev1 = np.full(m + 2, inf, dtype=np.float32)
+    # Columnas desplazadas en 2 para que j-1 y j-2 existan siempre
+    prev1[2] = cost[0, 0]
+    for i in range(1, n):
+        row = np.full(m + 2, inf, dtype=np.float32)
+        best = np.minimum(np.minimum(prev1[1:-1], prev1[:-2]), prev2[1:-1])
+        row[2:] = cost[i] + best
+        prev2, prev1 = prev1, row
+    return float(prev1[m + 1]) / (n + m)
+
+
+def read_wav(path: str) -> Tuple[np.ndarray, int]:
+    """
+    Lee un WAV PCM de 16 bits (mono o estéreo) como float32 mono en [-1, 1].
+    """
+    with wave.open(path, "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: solo se soporta PCM de 16 bits")
+        rate = wf.getframerate()
+        channels = wf.getnchannels()
+        data = np.frombuffer(wf.readframes(wf.getnframes()), dtype="<i2")
+    if channels > 1:
+        data = data.reshape(-1, channels).mean(axis=1)
+    return data.astype(np.float32) / 32768.0, rate
+
+
+def resample(samples: np.ndarray, rate: int, target: int = KWS_SAMPLE_RATE) -> np.ndarray:
+    if rate == target:
+        return samples
+    n_out = int(round(len(samples) * target / rate))
+    return np.interp(np.linspace(0, len(samples) - 1, n_out), np.arange(len(samples)), samples).astype(np.float32)
+
+
+class KeywordSpotter:
+    """
+    Reconocedor local para el vocabulario fijo de VOICE_KEYWORDS.
+
+    Compara el enunciado (recortado por energía) contra plantillas grabadas
+    de cada palabra mediante MFCC + DTW. Implementa la misma interfaz que los
+    backends de voice.py: transcribe(audio) -> texto o None.
+
+    Plantillas: un directorio con WAVs cuyo nombre empieza por la palabra,
+    p.ej. start_01.wav, start_02.wav, stop_01.wav ...
+    """
+
+    name = "kws"
+
+    def __init__(self, keywords, max_distance: float = 8.0):
+        self.keywords = list(keywords)
+        self.max_distance = max_distance
+        self.templates: Dict[str, List[np.ndarray]] = {k: [] for k in self.keywords}
+        self.last_latency = 0.0
+        self.last_distance = float("inf")
+
+    @classmethod
+    def from_wav_dir(cls, directory: str, keywords, max_distance: float = 8.0) -> "KeywordSpotter":
+        spotter = cls(keywords, max_distance=max_distance)
+        for keyword in spotter.keywords:
+            for path in sorted(glob.glob(os.path.join(directory, f"{keyword}*.wav"))):
+                spotter.add_template(keyword, *read_wav(path))
+        return spotter
+
+    def add_template(self, keyword: str, samples: np.ndarray, sample_rate: int):
+        voiced = trim_silence(resample(samples, sample_rate))
+        if voiced.size:
+            self.templates.setdefault(keyword, []).append(mfcc(voiced))
+
+    def has_templates(self) -> bool:
+        return any(self.templates.values())
+
+    def spot(self, samples: np.ndarray, sample_rate: int) -> Tuple[Optional[str], float]:
+        """
+        Devuelve (palabra, distancia) de la mejor plantilla, o (None, distancia)
+        si ninguna baja de max_distance.
+        """
+        t0 = time.perf_counter()
+        best_keyword, best = None, float("inf")
+        voiced = trim_silence(resample(samples, sample_rate))
+        if voiced.size:
+            features = mfcc(voiced)
+            for keyword, templates in self.templates.items():
+                for template in templates:
+                    d = dtw_distance(features, template)
+                    if d < best:
+                        best_keyword, best = keyword, d
+        self.last_latency = time.perf_counter() - t0
+        self.last_distance = best
+        if best > self.max_distance:
+            return None, best
+        return best_keyword, best
+
+    def transcribe(self, audio) -> Optional[str]:
+        """
+        Acepta un speech_recognition.AudioData (o cualquier objeto con get_raw_data).
+        """
+        raw = audio.get_raw_data(convert_rate=KWS_SAMPLE_RATE, convert_width=2)
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+        keyword, _ = self.spot(samples, KWS_SAMPLE_RATE)
+        return keyword
+
+
+if __name__ == "__main__":
+    from config import VOICE_KEYWORDS, VOICE_TEMPLATES_DIR, VOICE_KWS_MAX_DISTANCE
+
+    parser = argparse.ArgumentParser(description="Prueba el keyword spotter local con archivos WAV.")
+    parser.add_argument("wavs", nargs="+")
+    parser.add_argument("--templates", default=VOICE_TEMPLATES_DIR)
+    args = parser.parse_args()
+
+    kws = KeywordSpotter.from_wav_dir(args.templates, VOICE_KEYWORDS.keys(), max_distance=VOICE_KWS_MAX_DISTANCE)
+    for path in args.wavs:
+        keyword, distance = kws.spot(*read_wav(path))
+        print(f"{path}: {keyword or '---'}  (dist={distance:.2f}, {kws.last_latency * 1000:.1f} ms)")
@@ -1,24 +1,43 @@
 # main_multimodal.py
 
-import csv
+import argparse
+import queue
+import threading
 import time
+from typing import Optional
 
 import cv2
 
-from config import INITIAL_STATE, LOG_PATH
+from config import (
+    INITIAL_STATE,
+    LOG_PATH,
+    LOG_FORMAT,
+    LOG_BINARY_PATH,
+    LOG_QUEUE_SIZE,
+    LOG_BATCH_SIZE,
+    LOG_MAX_BYTES,
+    LOG_MAX_SECONDS,
+    PROFILE_WINDOW,
+    PROFILE_DUMP_INTERVAL,
+    PROFILE_PATH,
+)
 from gestures import GestureDetector
 from voice import VoiceCommandListener
 from eeg_sim import EEGSimulator
 from fusion import fuse_events
 from visualizer import draw_visualization
+from event_logger import EventLogger
+from profiler import StageProfiler
+from replay import SessionRecorder
+from pipeline import LatestFrameBuffer, CaptureStage, InferenceStage, LatencyMeter
 
 
-def log_event(writer: csv.writer, event_type: str, event_name: str, state: str, eeg_value: float):
-    now = time.time()
-    writer.writerow([now, event_type, event_name, state, f"{eeg_value:.3f}"])
+def log_event(logger: EventLogger, event_type: str, event_name: str, state: str, eeg_value: float):
+    # Solo encola; el formateo y la escritura ocurren en el hilo del logger
+    logger.log(event_type, event_name, state, eeg_value)
 
 
-def main():
+def main(record_path: Optional[str] = None):
     # Iniciar captura de webcam
     cap = cv2.VideoCapture(0)
     if not cap.isOpened():
@@ -35,10 +54,16 @@ def main():
     except Exception as e:
         print(f"No se pudo iniciar el listener de voz: {e}")
 
-    # Preparar logging
-    log_file = open(LOG_PATH, mode="w", newline="", encoding="utf-8")
-    writer = csv.writer(log_file)
-    writer.writerow(["timestamp", "event_type", "event_name", "state", "eeg_value"])
+    # Preparar logging (hilo en segundo plano con escritura por lotes)
+    logger = EventLogger(
+        LOG_BINARY_PATH if LOG_FORMAT == "binary" else LOG_PATH,
+        fmt=LOG_FORMAT,
+        queue_size=LOG_QUEUE_SIZE,
+        batch_size=LOG_BATCH_SIZE,
+        max_bytes=LOG_MAX_BYTES,
+        max_seconds=LOG_MAX_SECONDS,
+    )
+    logger.start()
 
     current_state = INITIAL_STATE
     prev_state = current_state
@@ -51,27 +76,73 @@ def main():
     print(" - Tecla 'q': salir")
     print(" - Tecla 'w': subir EEG (más alerta)")
     print(" - Tecla 's': bajar EEG (más calmado)")
+    print(" - Tecla 'p': mostrar/ocultar perfil por etapa")
+
+    # Pipeline por etapas: captura -> inferencia -> render (este hilo)
+    stop_event = threading.Event()
+    frames_buffer = LatestFrameBuffer(capacity=2)
+    results_buffer = LatestFrameBuffer(capacity=8)
+    # Los eventos de gesto viajan aparte: results_buffer puede descartar frames
+    gesture_queue: "queue.Queue[dict]" = queue.Queue()
+    profiler = StageProfiler(window=PROFILE_WINDOW, dump_path=PROFILE_PATH, dump_interval=PROFILE_DUMP_INTERVAL)
+    capture_stage = CaptureStage(cap, frames_buffer, stop_event, profiler=profiler)
+    inference_stage = InferenceStage(
+        gesture_detector.process_frame_multi,
+        frames_buffer,
+        results_buffer,
+        stop_event,
+        keep_raw=record_path is not None,
+        events=gesture_queue,
+    )
+    # Grabación opcional de la sesión para reproducirla con replay.py
+    recorder = SessionRecorder(record_path) if record_path else None
+    latency = LatencyMeter()
+    last_latency_report = time.time()
+    quality = gesture_detector.qos
+    if quality is not None:
+        quality.on_change(lambda index, level: print(
+            f"[qos] calidad -> {level.name} (modelo {level.model_complexity}, "
+            f"escala {level.input_scale}, 1 de cada {level.detect_every} frames)"
+        ))
+
+    capture_stage.start()
+    inference_stage.start()
 
     try:
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                print("No se pudo leer frame de la cámara.")
-                break
+        while not stop_event.is_set():
+            packets = results_buffer.drain(timeout=0.1)
+            if not packets:
+                if not inference_stage.is_alive():
+                    break
+                continue
 
-            # Procesar gesto
-            gesture_event, frame = gesture_detector.process_frame(frame)
-            if gesture_event:
-                last_gesture_event = gesture_event
+            # Los eventos salen de su propia cola: no se pierden aunque se salten frames al dibujar
+            gesture_events = []
+            while True:
+                try:
+                    gesture_events.append(gesture_queue.get_nowait())
+                except queue.Empty:
+                    break
+            if gesture_events:
+                last_gesture_event = gesture_events[-1]
+            packet = packets[-1]
+            frame = packet.frame
+            for p in packets:
+                profiler.add("process_frame", p.inference_time)
 
             # Obtener comando de voz (si hay uno nuevo en la cola)
+            t0 = time.perf_counter()
             voice_event = voice_listener.get_event()
             if voice_event:
                 last_voice_event = voice_event
+            t1 = time.perf_counter()
+            profiler.add("voice", t1 - t0)
 
             # Actualizar EEG (random walk cada frame)
             eeg_sim.random_walk()
             eeg_state = eeg_sim.get_state()
+            t2 = time.perf_counter()
+            profiler.add("eeg", t2 - t1)
 
             # Fusión de eventos con el estado actual
             fusion_output = fuse_events(
@@ -81,6 +152,8 @@ def main():
                 eeg_state=eeg_state,
             )
             current_state = fusion_output["state"]
+            t3 = time.perf_counter()
+            profiler.add("fusion", t3 - t2)
 
             # Dibujar HUD sobre el frame
             frame_viz = draw_visualization(
@@ -91,44 +164,104 @@ def main():
                 fusion_output,
             )
 
+            h = frame_viz.shape[0]
+            quality_text = f"  Q: {quality.level.name}" if quality is not None else ""
+            cv2.putText(
+                frame_viz,
+                f"Latency: {latency.mean() * 1000:.0f} ms (p95 {latency.percentile(95) * 1000:.0f} ms){quality_text}",
+                (10, h - 15),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.5,
+                (255, 255, 255),
+                1,
+                cv2.LINE_AA,
+            )
+            profiler.draw_hud(frame_viz)
+            t4 = time.perf_counter()
+            profiler.add("visualize", t4 - t3)
+
             cv2.imshow("Multimodal Control (Subsistema 2)", frame_viz)
+            t5 = time.perf_counter()
+
+            # Latencia real cámara -> HUD (desde la captura del frame mostrado)
+            latency.add(t5 - packet.capture_time)
+
+            if recorder is not None:
+                for p in packets:
+                    recorder.write(
+                        p.raw_frame,
+                        p.timestamp,
+                        voice_event if p is packet else None,
+                        eeg_state,
+                    )
+                profiler.add("record", time.perf_counter() - t5)
 
             # Logging de eventos relevantes
+            t6 = time.perf_counter()
             eeg_value = eeg_state["value"]
 
-            if gesture_event:
-                log_event(writer, "gesture", gesture_event["name"], current_state, eeg_value)
+            for event in gesture_events:
+                log_event(logger, "gesture", event["name"], current_state, eeg_value)
 
             if voice_event:
-                log_event(writer, "voice", voice_event["name"], current_state, eeg_value)
+                log_event(logger, "voice", voice_event["name"], current_state, eeg_value)
 
             if current_state != prev_state:
-                log_event(writer, "state_change", current_state, current_state, eeg_value)
+                log_event(logger, "state_change", current_state, current_state, eeg_value)
                 prev_state = current_state
 
             if eeg_state["label"] != last_eeg_label:
-                log_event(writer, "eeg_state", eeg_state["label"], current_state, eeg_value)
+                log_event(logger, "eeg_state", eeg_state["label"], current_state, eeg_value)
                 last_eeg_label = eeg_state["label"]
+            profiler.add("logging", time.perf_counter() - t6)
+
+            now = time.time()
+            if now - last_latency_report > 5.0:
+                print(
+                    f"[pipeline] latencia media {latency.mean() * 1000:.1f} ms, "
+                    f"p95 {latency.percentile(95) * 1000:.1f} ms, "
+                    f"frames descartados {frames_buffer.dropped} (captura) / {results_buffer.dropped} (render)"
+                )
+                last_latency_report = now
+            profiler.maybe_dump(now)
 
             # Teclas de control
+            t7 = time.perf_counter()
             key = cv2.waitKey(1) & 0xFF
+            # imshow + waitKey forman la etapa de presentación
+            profiler.add("display", (t5 - t4) + (time.perf_counter() - t7))
             if key == ord("q"):
                 break
             elif key == ord("w"):
                 eeg_sim.manual_adjust(+1)
             elif key == ord("s"):
                 eeg_sim.manual_adjust(-1)
+            elif key == ord("p"):
+                profiler.toggle_hud()
 
     finally:
+        stop_event.set()
+        capture_stage.join(timeout=1.0)
+        inference_stage.join(timeout=1.0)
         cap.release()
         cv2.destroyAllWindows()
         try:
             voice_listener.stop()
         except Exception:
             pass
-        log_file.close()
+        logger.close()
+        if logger.dropped or logger.truncated:
+            print(f"[logger] eventos descartados {logger.dropped}, con texto recortado {logger.truncated}")
+        if recorder is not None:
+            recorder.close()
+            print(f"Sesión grabada en {record_path} ({recorder.written} frames).")
+            if recorder.failed:
+                print(f"[replay] {recorder.failed} frames no se pudieron grabar.")
         print("Ejecución finalizada.")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Control multimodal: gestos + voz + EEG simulado.")
+    parser.add_argument("--record", metavar="PATH", help="grabar la sesión (frames, voz, EEG) para replay.py")
+    args = parser.parse_args()
+    main(record_path=args.record)
@@ -0,0 +1,257 @@
+# osc_sender.py
+
+import argparse
+import queue
+import socket
+import threading
+import time
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pythonosc import osc_bundle_builder, osc_message_builder, osc_packet
+
+Target = Tuple[str, int]
+
+_STOP = object()
+
+
+def build_message(address: str, args: Sequence, timestamp: Optional[float] = None):
+    """
+    Mensaje OSC con los argumentos dados y, si hay timestamp, el instante de la
+    decisión como último argumento (double, segundos epoch).
+    """
+    builder = osc_message_builder.OscMessageBuilder(address=address)
+    for arg in args:
+        builder.add_arg(arg)
+    if timestamp is not None:
+        builder.add_arg(timestamp, osc_message_builder.OscMessageBuilder.ARG_TYPE_DOUBLE)
+    return builder.build()
+
+
+class AsyncOscSender:
+    """
+    Envío OSC en segundo plano hacia uno o varios destinos (Processing, Unity...).
+
+    - send() solo encola (cola acotada; si está llena el mensaje se descarta y se cuenta).
+    - El hilo de envío junta lo que ya esté en cola (hasta max_bundle mensajes; con
+      linger > 0 espera además hasta `linger` segundos por más) en un único bundle OSC
+      y lo manda a cada destino con un solo socket UDP.
+    - Con stamp=True cada mensaje lleva el instante de la decisión como último argumento,
+      así el receptor puede medir la latencia extremo a extremo.
+
+    Uso:
+        osc = AsyncOscSender([("127.0.0.1", 12000)])
+        osc.start()
+        osc.send("/adelante", 1)
+        ...
+        osc.close()
+    """
+
+    def __init__(
+        self,
+        targets: Iterable[Target],
+        queue_size: int = 256,
+        max_bundle: int = 32,
+        linger: float = 0.0,
+        stamp: bool = True,
+    ):
+        self.targets: List[Target] = list(targets)
+        self.max_bundle = max_bundle
+        self.linger = linger
+        self.stamp = stamp
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setblocking(True)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self.dropped = 0
+        self.sent_messages = 0
+        self.sent_packets = 0
+        self.errors = 0
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def send(self, address: str, *args, timestamp: Optional[float] = None) -> bool:
+        """
+        Encola un mensaje sin bloquear. `timestamp` = instante de la decisión
+        (por defecto ahora). Devuelve False si la cola estaba llena.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        try:
+            self._queue.put_nowait((address, args, timestamp))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def close(self, timeout: float = 1.0):
+        """
+        Envía lo pendiente y detiene el hilo.
+        """
+        if self._thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+        self._sock.close()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            stop = False
+            deadline = time.perf_counter() + self.linger
+            while len(batch) < self.max_bundle:
+                try:
+                    remaining = deadline - time.perf_counter()
+                    nxt = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    stop = True
+                    break
+                batch.append(nxt)
+            self._send_batch(batch)
+            if stop:
+                return
+
+    def _send_batch(self, batch):
+        messages = [
+            build_message(address, args, timestamp if self.stamp else None)
+            for address, args, timestamp in batch
+        ]
+        if len(messages) == 1:
+            dgram = messages[0].dgram
+        else:
+            bundle = osc_bundle_builder.OscBundleBuilder(osc_bundle_builder.IMMEDIATELY)
+            for message in messages:
+                bundle.add_content(message)
+            dgram = bundle.build().dgram
+        for target in self.targets:
+            try:
+                self._sock.sendto(dgram, target)
+                self.sent_packets += 1
+            except OSError:
+                self.errors += 1
+        self.sent_messages += len(messages)
+
+
+class OscReceiver:
+    """
+    Receptor UDP local que hace de Processing/Unity en las pruebas: desempaqueta
+    mensajes y bundles y anota (dirección, instante de recepción, timestamp de decisión).
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        self._sock.bind((host, port))
+        self._sock.settimeout(0.1)
+        self.address: Target = self._sock.getsockname()
+        self.received: List[Tuple[str, float, Optional[float]]] = []
+        self.packets = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(1.0)
+        self._sock.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                data = self._sock.recv(65536)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            now = time.time()
+            self.packets += 1
+            try:
+                packet = osc_packet.OscPacket(data)
+            except Exception:
+                continue
+            for timed in packet.messages:
+                params = timed.message.params
+                stamp = params[-1] if params and isinstance(params[-1], float) else None
+                self.received.append((timed.message.address, now, stamp))
+
+    def latencies(self) -> np.ndarray:
+        """
+        Latencias (s) decisión -> recepción de los mensajes con timestamp.
+        """
+        return np.array([recv - stamp for _, recv, stamp in self.received if stamp is not None])
+
+
+class _SyncSender:
+    """
+    Referencia: el envío síncrono de antes (un send_message por destino en el hilo llamador).
+    """
+
+    def __init__(self, targets: Iterable[Target]):
+        from pythonosc import udp_client
+        self.clients = [udp_client.SimpleUDPClient(host, port) for host, port in targets]
+        self.dropped = 0
+
+    def send(self, address: str, *args, timestamp: Optional[float] = None):
+        message = build_message(address, args, time.time() if timestamp is None else timestamp)
+        for client in self.clients:
+            client.send(message)
+        return True
+
+    def close(self, timeout: float = 1.0):
+        pass
+
+
+def _bench(mode: str, n_messages: int, n_receivers: int, burst: int, interval: float):
+    receivers = [OscReceiver().start() for _ in range(n_receivers)]
+    targets = [r.address for r in receivers]
+    sender = _SyncSender(targets) if mode == "sync" else AsyncOscSender(targets, queue_size=4096).start()
+
+    call_times = []
+    t0 = time.perf_counter()
+    for i in range(n_messages):
+        c0 = time.perf_counter()
+        sender.send("/bench", i)
+        call_times.append(time.perf_counter() - c0)
+        if (i + 1) % burst == 0 and interval > 0:
+            time.sleep(interval)
+    sender.close()
+    time.sleep(0.2)  # deja llegar lo que falta
+    elapsed = time.perf_counter() - t0
+    for r in receivers:
+        r.close()
+
+    delivered = sum(len(r.received) for r in receivers)
+    latency = np.concatenate([r.latencies() for r in receivers]) * 1000.0
+    calls = np.array(call_times) * 1e6
+    print(f"\n[{mode}] {n_messages} mensajes x {n_receivers} receptores, ráfagas de {burst}")
+    print(f"  entregados: {delivered}/{n_messages * n_receivers}  ({delivered / elapsed:.0f} msg/s)  "
+          f"paquetes: {sum(r.packets for r in receivers)}  descartados: {sender.dropped}")
+    print(f"  coste de send() en el hilo llamador: p50 {np.percentile(calls, 50):.1f} us, "
+          f"p99 {np.percentile(calls, 99):.1f} us")
+    if latency.size:
+        print(f"  latencia decisión->recepción: p50 {np.percentile(latency, 50):.2f} ms, "
+              f"p95 {np.percentile(latency, 95):.2f} ms, p99 {np.percentile(latency, 99):.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de envío OSC: síncrono vs. asíncrono con bundles.")
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--receivers", type=int, default=4, help="consumidores OSC locales simulados")
+    parser.add_argument("--burst", type=int, default=10, help="mensajes por ráfaga")
+    parser.add_argument("--interval", type=float, default=0.005, help="pausa entre ráfagas (s)")
+    args = parser.parse_args()
+
+    for mode in ("sync", "async"):
+        _bench(mode, args.messages, args.receivers, args.burst, args.interval)
@@ -0,0 +1,188 @@
+# pipeline.py
+
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, List, Optional
+
+
+@dataclass
+class FramePacket:
+    """
+    Frame capturado junto con su marca de tiempo de captura.
+    - capture_time: time.perf_counter() al salir de cap.read() (para latencias).
+    - timestamp: time.time() equivalente (para logs).
+    - raw_frame: copia sin dibujar, solo si la inferencia se creó con keep_raw.
+    """
+    seq: int
+    frame: Any
+    capture_time: float
+    timestamp: float
+    gesture_events: List[dict] = field(default_factory=list)
+    inference_time: float = 0.0
+    raw_frame: Any = None
+
+
+class LatestFrameBuffer:
+    """
+    Buffer circular acotado y thread-safe entre etapas del pipeline.
+
+    Cuando está lleno descarta el elemento más viejo, así el consumidor
+    siempre trabaja con lo más reciente en vez de acumular retraso.
+    """
+
+    def __init__(self, capacity: int = 2):
+        self._items: Deque[FramePacket] = deque(maxlen=capacity)
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item: FramePacket):
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def _wait(self, timeout: Optional[float]) -> bool:
+        if not self._items and not self._closed:
+            self._cond.wait(timeout)
+        return bool(self._items)
+
+    def get_latest(self, timeout: Optional[float] = None) -> Optional[FramePacket]:
+        """
+        Devuelve el elemento más reciente y descarta los anteriores (frames viejos).
+        Devuelve None si se agotó el timeout o el buffer se cerró.
+        """
+        with self._cond:
+            if not self._wait(timeout):
+                return None
+            item = self._items.pop()
+            self.dropped += len(self._items)
+            self._items.clear()
+            return item
+
+    def drain(self, timeout: Optional[float] = None) -> List[FramePacket]:
+        """
+        Devuelve todos los elementos pendientes en orden (sin perder eventos).
+        """
+        with self._cond:
+            if not self._wait(timeout):
+                return []
+            items = list(self._items)
+            self._items.clear()
+            return items
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class CaptureStage(threading.Thread):
+    """
+    Hilo de captura: lee la cámara tan rápido como entrega frames y los
+    publica en un LatestFrameBuffer con su timestamp de captura.
+    """
+
+    def __init__(self, cap, output: LatestFrameBuffer, stop_event: threading.Event, profiler=None):
+        super().__init__(daemon=True)
+        self.cap = cap
+        self.output = output
+        self.stop_event = stop_event
+        self.profiler = profiler
+        self.frames_captured = 0
+
+    def run(self):
+        seq = 0
+        while not self.stop_event.is_set():
+            t0 = time.perf_counter()
+            ret, frame = self.cap.read()
+            if self.profiler is not None:
+                self.profiler.add("capture", time.perf_counter() - t0)
+            if not ret:
+                print("No se pudo leer frame de la cámara.")
+                self.stop_event.set()
+                break
+            packet = FramePacket(
+                seq=seq,
+                frame=frame,
+                capture_time=time.perf_counter(),
+                timestamp=time.time(),
+            )
+            self.output.put(packet)
+            seq += 1
+            self.frames_captured = seq
+        self.output.close()
+
+
+class InferenceStage(threading.Thread):
+    """
+    Hilo de inferencia: toma siempre el frame más reciente, ejecuta
+    process(frame) -> (eventos, frame_dibujado) y publica el resultado.
+
+    Los frames de salida pueden descartarse si el render va atrasado; por eso,
+    si se pasa `events`, cada evento de gesto se publica además en esa cola
+    sin límite, que nunca descarta.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[Any], tuple],
+        source: LatestFrameBuffer,
+        output: LatestFrameBuffer,
+        stop_event: threading.Event,
+        keep_raw: bool = False,
+        events: Optional["queue.Queue[dict]"] = None,
+    ):
+        super().__init__(daemon=True)
+        self.process = process
+        self.source = source
+        self.output = output
+        self.stop_event = stop_event
+        self.keep_raw = keep_raw
+        self.events = events
+
+    def run(self):
+        while not self.stop_event.is_set():
+            packet = self.source.get_latest(timeout=0.1)
+            if packet is None:
+                continue
+            if self.keep_raw:
+                packet.raw_frame = packet.frame.copy()
+            t0 = time.perf_counter()
+            events, frame = self.process(packet.frame)
+            packet.inference_time = time.perf_counter() - t0
+            packet.frame = frame
+            packet.gesture_events = events
+            if self.events is not None:
+                for event in events:
+                    self.events.put(event)
+            self.output.put(packet)
+        self.output.close()
+
+
+class LatencyMeter:
+    """
+    Ventana deslizante de latencias (segundos) para reportar glass-to-HUD.
+    """
+
+    def __init__(self, window: int = 120):
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def add(self, latency: float):
+        self.samples.append(latency)
+
+    def mean(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(self.samples) / len(self.samples)
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        idx = min(len(ordered) - 1, int(q / 100.0 * len(ordered)))
+        return ordered[idx]
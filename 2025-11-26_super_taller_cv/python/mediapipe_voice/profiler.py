@@ -0,0 +1,156 @@
+# profiler.py
+
+import json
+import math
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+# Buckets logarítmicos de 10 µs a 2 s (~7 % de resolución por bucket)
+HIST_MIN = 1e-5
+HIST_MAX = 2.0
+HIST_BINS = 180
+_LOG_MIN = math.log(HIST_MIN)
+_LOG_SPAN = math.log(HIST_MAX) - _LOG_MIN
+# Valor representativo de cada bucket (centro geométrico)
+_BIN_VALUES = np.exp(_LOG_MIN + (np.arange(HIST_BINS) + 0.5) * _LOG_SPAN / HIST_BINS)
+
+
+class RollingHistogram:
+    """
+    Histograma de las últimas `window` muestras.
+
+    Cada muestra se guarda solo como índice de bucket en un buffer circular:
+    añadir es O(1) (se resta el bucket que sale y se suma el que entra) y los
+    percentiles se leen de la suma acumulada de HIST_BINS contadores.
+    """
+
+    def __init__(self, window: int = 300):
+        self.window = window
+        self.counts = np.zeros(HIST_BINS, dtype=np.int64)
+        self._ring = np.full(window, -1, dtype=np.int32)
+        self._pos = 0
+        self.total = 0
+        self._sum = 0.0
+        self._values = np.zeros(window, dtype=np.float64)
+
+    def add(self, seconds: float):
+        if seconds <= HIST_MIN:
+            b = 0
+        else:
+            b = min(HIST_BINS - 1, int((math.log(seconds) - _LOG_MIN) / _LOG_SPAN * HIST_BINS))
+        old = self._ring[self._pos]
+        if old >= 0:
+            self.counts[old] -= 1
+            self._sum -= self._values[self._pos]
+        self._ring[self._pos] = b
+        self._values[self._pos] = seconds
+        self.counts[b] += 1
+        self._sum += seconds
+        self._pos = (self._pos + 1) % self.window
+        self.total += 1
+
+    def count(self) -> int:
+        return min(self.total, self.window)
+
+    def mean(self) -> float:
+        n = self.count()
+        return self._sum / n if n else 0.0
+
+    def percentiles(self, qs=(50, 95, 99)) -> List[float]:
+        n = self.count()
+        if not n:
+            return [0.0 for _ in qs]
+        cum = np.cumsum(self.counts)
+        idx = np.searchsorted(cum, [max(1, math.ceil(q / 100.0 * n)) for q in qs])
+        return [float(_BIN_VALUES[i]) for i in idx]
+
+
+class StageProfiler:
+    """
+    Instrumentación por etapa del loop de frames.
+
+    Uso:
+        prof = StageProfiler()
+        t0 = time.perf_counter()
+        ...
+        prof.add("fusion", time.perf_counter() - t0)
+        # o bien
+        with prof.measure("fusion"):
+            ...
+    """
+
+    def __init__(self, window: int = 300, dump_path: Optional[str] = None, dump_interval: float = 10.0):
+        self.window = window
+        self.stages: Dict[str, RollingHistogram] = {}
+        self.dump_path = dump_path
+        self.dump_interval = dump_interval
+        self._last_dump = time.time()
+        self.show_hud = False
+
+    def add(self, stage: str, seconds: float):
+        hist = self.stages.get(stage)
+        if hist is None:
+            hist = self.stages[stage] = RollingHistogram(self.window)
+        hist.add(seconds)
+
+    @contextmanager
+    def measure(self, stage: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - t0)
+
+    def summary(self) -> Dict:
+        """
+        {etapa: {"count", "mean_ms", "p50_ms", "p95_ms", "p99_ms"}} sobre la ventana actual.
+        """
+        result = {}
+        for name, hist in list(self.stages.items()):
+            p50, p95, p99 = hist.percentiles()
+            result[name] = {
+                "count": hist.count(),
+                "mean_ms": hist.mean() * 1000.0,
+                "p50_ms": p50 * 1000.0,
+                "p95_ms": p95 * 1000.0,
+                "p99_ms": p99 * 1000.0,
+            }
+        return result
+
+    def maybe_dump(self, now: Optional[float] = None):
+        """
+        Escribe el resumen en JSON cada `dump_interval` segundos (si hay dump_path).
+        """
+        if self.dump_path is None:
+            return
+        now = time.time() if now is None else now
+        if now - self._last_dump < self.dump_interval:
+            return
+        self._last_dump = now
+        tmp_path = self.dump_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"timestamp": now, "window": self.window, "stages": self.summary()}, f, indent=2)
+        os.replace(tmp_path, self.dump_path)
+
+    def toggle_hud(self):
+        self.show_hud = not self.show_hud
+
+    def draw_hud(self, frame, origin=(10, 140)):
+        """
+        Superpone p50/p95/p99 por etapa (en ms) si el overlay está activo.
+        """
+        if not self.show_hud:
+            return frame
+        x, y = origin
+        font = cv2.FONT_HERSHEY_SIMPLEX
+        cv2.putText(frame, "stage        p50    p95    p99 ms", (x, y), font, 0.45, (0, 255, 255), 1, cv2.LINE_AA)
+        for name, s in self.summary().items():
+            y += 18
+            text = f"{name:<11}{s['p50_ms']:>6.1f} {s['p95_ms']:>6.1f} {s['p99_ms']:>6.1f}"
+            cv2.putText(frame, text, (x, y), font, 0.45, (0, 255, 255), 1, cv2.LINE_AA)
+        return frame
@@ -0,0 +1,136 @@
+# qos.py
+
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence
+
+
+@dataclass(frozen=True)
+class QualityLevel:
+    """
+    Un nivel de calidad del tracking de manos.
+    - model_complexity: modelo de MediaPipe Hands (0 = ligero, 1 = completo).
+    - input_scale: escala del frame antes de inferir (1.0 = resolución de cámara).
+    - detect_every: inferir 1 de cada N frames (en los demás se reutiliza el último resultado).
+    """
+    name: str
+    model_complexity: int
+    input_scale: float
+    detect_every: int
+
+
+# De menor a mayor coste
+QUALITY_LEVELS: Sequence[QualityLevel] = (
+    QualityLevel("minimo", 0, 0.5, 3),
+    QualityLevel("bajo", 0, 0.5, 2),
+    QualityLevel("medio", 0, 0.75, 1),
+    QualityLevel("alto", 0, 1.0, 1),
+    QualityLevel("maximo", 1, 1.0, 1),
+)
+
+
+class QualityController:
+    """
+    Control adaptativo de calidad según el presupuesto por frame (1 / target_fps).
+
+    observe() recibe el tiempo de procesamiento de cada frame (incluidos los que
+    reutilizan resultado, que cuestan ~0) y mantiene una media móvil exponencial.
+    - Si la media supera down_ratio * presupuesto durante `patience` frames, baja un nivel.
+    - Si queda por debajo de up_ratio * presupuesto durante `patience` frames, sube uno.
+    Entre ambos umbrales no cambia nada (histéresis), y tras cada cambio se esperan
+    `cooldown` frames para que la media refleje el nuevo nivel. Volver a subir a un
+    nivel del que ya se bajó por lento exige el doble de paciencia cada vez (hasta
+    max_backoff veces), así no se oscila entre dos niveles vecinos. Ese castigo se
+    reduce a la mitad por cada `stable_frames` frames seguidos que el nivel se
+    mantiene sin bajar, así unos picos al principio no lo dejan fijo toda la sesión.
+
+    El nivel actual se publica llamando a los callbacks de on_change(level_index, level).
+    """
+
+    def __init__(
+        self,
+        target_fps: float = 30.0,
+        levels: Sequence[QualityLevel] = QUALITY_LEVELS,
+        start_level: Optional[int] = None,
+        down_ratio: float = 0.9,
+        up_ratio: float = 0.5,
+        patience: int = 15,
+        cooldown: int = 60,
+        alpha: float = 0.1,
+        max_backoff: int = 16,
+        stable_frames: int = 900,
+    ):
+        self.budget = 1.0 / target_fps
+        self.levels = list(levels)
+        self.index = len(self.levels) - 1 if start_level is None else start_level
+        self.down_ratio = down_ratio
+        self.up_ratio = up_ratio
+        self.patience = patience
+        self.cooldown = cooldown
+        self.alpha = alpha
+        self.max_backoff = max_backoff
+        self.stable_frames = stable_frames
+        self._backoff = [1] * len(self.levels)
+        self._stable = 0
+        self.mean_cost: Optional[float] = None
+        self._over = 0
+        self._under = 0
+        self._wait = cooldown
+        self.changes = 0
+        self._listeners: List[Callable[[int, QualityLevel], None]] = []
+
+    @property
+    def level(self) -> QualityLevel:
+        return self.levels[self.index]
+
+    def on_change(self, callback: Callable[[int, QualityLevel], None]):
+        self._listeners.append(callback)
+
+    def observe(self, frame_seconds: float) -> QualityLevel:
+        if self.mean_cost is None:
+            self.mean_cost = frame_seconds
+        else:
+            self.mean_cost += self.alpha * (frame_seconds - self.mean_cost)
+
+        if self._wait > 0:
+            self._wait -= 1
+            return self.level
+
+        # Nivel estable: se le perdona la mitad del castigo acumulado
+        self._stable += 1
+        if self._stable >= self.stable_frames:
+            self._stable = 0
+            self._backoff[self.index] = max(1, self._backoff[self.index] // 2)
+
+        load = self.mean_cost / self.budget
+        self._over = self._over + 1 if load > self.down_ratio else 0
+        self._under = self._under + 1 if load < self.up_ratio else 0
+
+        if self._over >= self.patience and self.index > 0:
+            self._backoff[self.index] = min(self._backoff[self.index] * 2, self.max_backoff)
+            self._set(self.index - 1)
+        elif self.index < len(self.levels) - 1 and self._under >= self.patience * self._backoff[self.index + 1]:
+            self._set(self.index + 1)
+        return self.level
+
+    def _set(self, index: int):
+        self.index = index
+        self._over = self._under = self._stable = 0
+        self._wait = self.cooldown
+        self.mean_cost = None
+        self.changes += 1
+        for callback in self._listeners:
+            callback(index, self.level)
+
+    def state(self) -> dict:
+        """
+        Estado publicable: {"level", "name", "load", "model_complexity", "input_scale", "detect_every"}.
+        """
+        level = self.level
+        return {
+            "level": self.index,
+            "name": level.name,
+            "load": (self.mean_cost or 0.0) / self.budget,
+            "model_complexity": level.model_complexity,
+            "input_scale": level.input_scale,
+            "detect_every": level.detect_every,
+        }
@@ -0,0 +1,251 @@
+# replay.py
+
+import argparse
+import json
+import queue
+import struct
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config import INITIAL_STATE
+
+SESSION_MAGIC = b"MMSESS01"
+_LEN = struct.Struct("<I")
+
+
+class SessionRecorder:
+    """
+    Graba una sesión de main_multimodal (frames de cámara + eventos de voz + EEG)
+    en un único archivo para poder reproducirla sin cámara ni micrófono.
+
+    Formato: SESSION_MAGIC seguido de registros
+        [len(meta) u32][meta JSON][len(imagen) u32][imagen codificada]
+
+    write() solo serializa los metadatos y encola el frame; un hilo en segundo
+    plano codifica la imagen y escribe en disco. La cola es acotada: si el disco
+    no da abasto, write() espera en vez de descartar, porque un replay con
+    huecos ya no reproduce la sesión.
+    """
+
+    def __init__(self, path: str, image_ext: str = ".png", queue_size: int = 32):
+        # .png es sin pérdida (replay idéntico); .jpg ocupa mucho menos
+        self.path = path
+        self.image_ext = image_ext
+        self.frames = 0      # frames encolados
+        self.written = 0     # frames ya escritos en disco
+        self.failed = 0      # frames que no se pudieron codificar/escribir
+        self._queue: "queue.Queue[Optional[Tuple[np.ndarray, bytes]]]" = queue.Queue(maxsize=queue_size)
+        self._file = open(path, "wb")
+        self._file.write(SESSION_MAGIC)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, frame, timestamp: float, voice_event: Optional[Dict], eeg_state: Dict):
+        """
+        Encola un frame (debe ser una copia que nadie más modifique). Los
+        metadatos se serializan aquí para fijar su valor en este instante.
+        """
+        meta = json.dumps({
+            "seq": self.frames,
+            "timestamp": timestamp,
+            "voice_event": voice_event,
+            "eeg_state": eeg_state,
+        }).encode("utf-8")
+        self._queue.put((frame, meta))
+        self.frames += 1
+
+    def close(self, timeout: float = 10.0):
+        """
+        Espera a que se escriban los frames pendientes y cierra el archivo.
+        """
+        if self._thread is None:
+            return
+        if self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                print("[replay] La grabación no se vació a tiempo; se pierden los frames pendientes")
+            self._thread.join(timeout)
+        if not self._thread.is_alive() and not self._file.closed:
+            self._file.close()
+        self._thread = None
+
+    # ---------------- Hilo escritor ----------------
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            frame, meta = item
+            try:
+                ok, encoded = cv2.imencode(self.image_ext, frame)
+                if not ok:
+                    self.failed += 1
+                    continue
+                data = encoded.tobytes()
+                self._file.write(_LEN.pack(len(meta)))
+                self._file.write(meta)
+                self._file.write(_LEN.pack(len(data)))
+                self._file.write(data)
+                self.written += 1
+            except Exception as e:
+                # Un fallo de disco no debe tumbar el render; se pierde este frame
+                self.failed += 1
+                print(f"[replay] Error grabando frame: {e}")
+        self._file.close()
+
+
+def _read_exact(f, size: int) -> Optional[bytes]:
+    """
+    Lee exactamente `size` bytes, o None si el archivo se acaba antes.
+    """
+    data = f.read(size)
+    return data if len(data) == size else None
+
+
+def read_session(path: str) -> Iterator[Tuple[Dict, bytes]]:
+    """
+    Itera los registros de una sesión grabada devolviendo (meta, imagen_codificada).
+    Una sesión cortada (crash o kill durante la grabación) deja un último registro
+    incompleto: se avisa y se termina con los registros completos anteriores.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(SESSION_MAGIC)) != SESSION_MAGIC:
+            raise ValueError(f"{path} no es una sesión grabada")
+        records = 0
+        while True:
+            header = f.read(_LEN.size)
+            if not header:
+                return
+            meta_bytes = data_header = data = None
+            if len(header) == _LEN.size:
+                meta_bytes = _read_exact(f, _LEN.unpack(header)[0])
+            if meta_bytes is not None:
+                data_header = _read_exact(f, _LEN.size)
+            if data_header is not None:
+                data = _read_exact(f, _LEN.unpack(data_header)[0])
+            try:
+                meta = json.loads(meta_bytes) if data is not None else None
+            except ValueError:
+                meta = None
+            if meta is None:
+                print(f"[replay] {path}: último registro incompleto tras {records} frames; se ignora")
+                return
+            records += 1
+            yield meta, data
+
+
+def _summary(samples: List[float]) -> Dict:
+    if not samples:
+        return {"count": 0}
+    arr = np.asarray(samples) * 1000.0
+    total = float(np.sum(samples))
+    return {
+        "count": len(samples),
+        "throughput_fps": len(samples) / total if total > 0 else float("inf"),
+        "mean_ms": float(arr.mean()),
+        "p50_ms": float(np.percentile(arr, 50)),
+        "p95_ms": float(np.percentile(arr, 95)),
+        "p99_ms": float(np.percentile(arr, 99)),
+        "max_ms": float(arr.max()),
+    }
+
+
+def replay_session(path: str, detector=None, loops: int = 1) -> Dict:
+    """
+    Reproduce una sesión grabada sin ventana lo más rápido posible a través de
+    GestureDetector -> fuse_events -> draw_visualization y devuelve métricas por etapa.
+
+    Los eventos de voz y el EEG salen de la grabación y el debounce de gestos usa
+    los timestamps grabados, así dos corridas sobre la misma sesión producen la
+    misma secuencia de estados.
+    """
+    from fusion import fuse_events
+    from visualizer import draw_visualization
+
+    if detector is None:
+        from gestures import GestureDetector
+        # Sin calidad adaptativa: depende del tiempo y haría la corrida no reproducible
+        detector = GestureDetector(adaptive_quality=False)
+
+    stages: Dict[str, List[float]] = {"decode": [], "gestures": [], "fusion": [], "visualization": [], "total": []}
+    states: List[str] = []
+    gesture_count = 0
+    wall_start = time.perf_counter()
+
+    for _ in range(loops):
+        detector.reset_tracking()
+        detector.reset_filters()
+        current_state = INITIAL_STATE
+        last_gesture_event = None
+        last_voice_event = None
+
+        for meta, data in read_session(path):
+            t0 = time.perf_counter()
+            frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            t1 = time.perf_counter()
+            events, frame = detector.process_frame_multi(frame, now=meta["timestamp"])
+            t2 = time.perf_counter()
+            if events:
+                last_gesture_event = events[-1]
+                gesture_count += len(events)
+            if meta["voice_event"]:
+                last_voice_event = meta["voice_event"]
+            fusion_output = fuse_events(
+                current_state=current_state,
+                gesture_event=last_gesture_event,
+                voice_event=last_voice_event,
+                eeg_state=meta["eeg_state"],
+            )
+            current_state = fusion_output["state"]
+            t3 = time.perf_counter()
+            draw_visualization(frame, last_gesture_event, last_voice_event, meta["eeg_state"], fusion_output)
+            t4 = time.perf_counter()
+
+            stages["decode"].append(t1 - t0)
+            stages["gestures"].append(t2 - t1)
+            stages["fusion"].append(t3 - t2)
+            stages["visualization"].append(t4 - t3)
+            stages["total"].append(t4 - t0)
+            states.append(current_state)
+
+    wall = time.perf_counter() - wall_start
+    return {
+        "session": path,
+        "frames": len(states),
+        "loops": loops,
+        "wall_seconds": wall,
+        "wall_fps": len(states) / wall if wall > 0 else 0.0,
+        "gesture_events": gesture_count,
+        "final_state": states[-1] if states else INITIAL_STATE,
+        "stages": {name: _summary(samples) for name, samples in stages.items()},
+    }
+
+
+def _print_report(report: Dict):
+    print(f"Sesión: {report['session']}  frames={report['frames']}  loops={report['loops']}")
+    print(f"Tiempo total: {report['wall_seconds']:.2f} s  ({report['wall_fps']:.1f} fps)")
+    print(f"{'etapa':<14}{'fps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, s in report["stages"].items():
+        if not s["count"]:
+            continue
+        print(f"{name:<14}{s['throughput_fps']:>10.1f}{s['p50_ms']:>10.2f}{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reproduce una sesión grabada sin cámara y mide cada etapa.")
+    parser.add_argument("session", help="archivo grabado con main_multimodal.py --record")
+    parser.add_argument("--loops", type=int, default=1, help="veces que se repite la sesión")
+    parser.add_argument("--json", dest="json_out", help="guardar el reporte en JSON")
+    args = parser.parse_args()
+
+    report = replay_session(args.session, loops=args.loops)
+    _print_report(report)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
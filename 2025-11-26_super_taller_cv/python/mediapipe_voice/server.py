@@ -0,0 +1,357 @@
+# server.py
+
+import argparse
+import glob
+import json
+import multiprocessing as mp
+import os
+import queue as queue_mod
+import sys
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import cv2
+
+from config import (
+    INITIAL_STATE,
+    SERVER_WORKERS,
+    SERVER_QUEUE_SIZE,
+    SERVER_POLL_INTERVAL,
+    SERVER_EXIT_GRACE,
+)
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+@dataclass
+class SessionSpec:
+    """
+    Una sesión independiente: una fuente de video con su propio
+    GestureDetector, EEGSimulator y estado de fusión.
+
+    source puede ser un archivo de video, un directorio de imágenes,
+    una URL (rtsp://, http://, udp://...) o el índice de una cámara ("0").
+    Sin seed, los archivos y directorios usan una semilla derivada de
+    session_id y source (ver session_seed), así el EEG también se repite.
+    """
+    session_id: str
+    source: str
+    seed: Optional[int] = None
+    realtime: bool = False     # respetar los fps de la fuente al leer archivos
+    loop: bool = False         # volver a empezar al terminar un archivo / directorio
+    every_frame: bool = False  # emitir todos los frames y no solo los cambios
+
+
+def _is_live(source: str) -> bool:
+    return source.isdigit() or "://" in source
+
+
+def _is_unbounded(spec: SessionSpec) -> bool:
+    """Sesiones que no terminan solas (cámara / stream en vivo, o archivo en bucle)."""
+    return spec.loop or _is_live(spec.source)
+
+
+def session_seed(spec: SessionSpec) -> Optional[int]:
+    """
+    Semilla del EEG de la sesión: la de spec o, en fuentes finitas, un hash
+    estable (crc32, no hash() que cambia entre procesos) de session_id y source.
+    En vivo sin semilla se deja aleatoria.
+    """
+    if spec.seed is not None or _is_live(spec.source):
+        return spec.seed
+    return zlib.crc32(f"{spec.session_id}:{spec.source}".encode("utf-8"))
+
+
+def iter_frames(source: str, realtime: bool = False) -> Iterator[Tuple[int, float, any]]:
+    """
+    Itera (seq, timestamp, frame_bgr) de una fuente.
+
+    En archivos y directorios el timestamp es el tiempo de la fuente
+    (posición en el video o índice / fps); junto con session_seed, dos corridas
+    de la misma sesión sobre el mismo archivo producen los mismos eventos.
+    En fuentes en vivo es time.time().
+    """
+    if os.path.isdir(source):
+        paths = sorted(
+            p for p in glob.glob(os.path.join(source, "*"))
+            if p.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        fps = 30.0
+        start = time.perf_counter()
+        for seq, path in enumerate(paths):
+            frame = cv2.imread(path, cv2.IMREAD_COLOR)
+            if frame is None:
+                continue
+            timestamp = seq / fps
+            if realtime:
+                delay = timestamp - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            yield seq, timestamp, frame
+        return
+
+    live = _is_live(source)
+    cap = cv2.VideoCapture(int(source) if source.isdigit() else source)
+    if not cap.isOpened():
+        raise IOError(f"No se pudo abrir la fuente {source}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    start = time.perf_counter()
+    seq = 0
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                return
+            if live:
+                timestamp = time.time()
+            else:
+                pos_ms = cap.get(cv2.CAP_PROP_POS_MSEC)
+                timestamp = pos_ms / 1000.0 if pos_ms > 0 else seq / fps
+                if realtime:
+                    delay = timestamp - (time.perf_counter() - start)
+                    if delay > 0:
+                        time.sleep(delay)
+            yield seq, timestamp, frame
+            seq += 1
+    finally:
+        cap.release()
+
+
+class HeadlessSession:
+    """
+    Loop de main_multimodal sin ventana ni voz: gestos -> EEG -> fusión.
+    Devuelve un registro por frame con el estado fusionado.
+    """
+
+    def __init__(self, spec: SessionSpec, detector=None):
+        from gestures import GestureDetector
+        from eeg_sim import EEGSimulator
+
+        self.spec = spec
+        if detector is None:
+            # Archivos y directorios deben dar los mismos eventos en cada corrida: la
+            # calidad adaptativa (que depende del tiempo real por frame) solo en vivo
+            detector = GestureDetector(adaptive_quality=_is_live(spec.source))
+        self.detector = detector
+        self.eeg_sim = EEGSimulator(seed=session_seed(spec))
+        self.state = INITIAL_STATE
+        self.alert = False
+        self.last_gesture_event = None
+        self.frames = 0
+
+    def step(self, seq: int, timestamp: float, frame) -> Optional[Dict]:
+        """
+        Procesa un frame. Devuelve el registro a emitir, o None si nada cambió
+        (salvo que la sesión tenga every_frame).
+        """
+        from fusion import fuse_events
+
+        events, _ = self.detector.process_frame_multi(frame, now=timestamp)
+        if events:
+            self.last_gesture_event = events[-1]
+
+        self.eeg_sim.random_walk()
+        eeg_state = self.eeg_sim.get_state()
+        fusion_output = fuse_events(
+            current_state=self.state,
+            gesture_event=self.last_gesture_event,
+            voice_event=None,
+            eeg_state=eeg_state,
+        )
+        changed = fusion_output["state"] != self.state or fusion_output["alert"] != self.alert
+        self.state = fusion_output["state"]
+        self.alert = fusion_output["alert"]
+        self.frames += 1
+
+        if not (events or changed or self.spec.every_frame):
+            return None
+        return {
+            "type": "state",
+            "session": self.spec.session_id,
+            "seq": seq,
+            "timestamp": timestamp,
+            "state": self.state,
+            "actions": list(fusion_output["actions"]),
+            "alert": self.alert,
+            "gestures": [e["name"] for e in events],
+            "eeg": eeg_state["value"],
+            "eeg_label": eeg_state["label"],
+            "quality": self.detector.qos.level.name if self.detector.qos is not None else None,
+        }
+
+
+def _session_main(spec: SessionSpec, queue):
+    # Un hilo de OpenCV por proceso: el paralelismo lo dan los procesos
+    cv2.setNumThreads(1)
+    run_session(spec, queue)
+
+
+def run_session(spec: SessionSpec, output) -> Dict:
+    """
+    Ejecuta una sesión completa y publica sus registros y el resumen final
+    con output.put() (la cola compartida en serve(), o cualquier queue.Queue
+    si se llama directamente). Devuelve el resumen.
+    """
+    session = None
+    t0 = time.perf_counter()
+    error = None
+    try:
+        session = HeadlessSession(spec)
+        while True:
+            for seq, timestamp, frame in iter_frames(spec.source, spec.realtime):
+                record = session.step(seq, timestamp, frame)
+                if record is not None:
+                    output.put(record)
+            if not spec.loop or _is_live(spec.source):
+                break
+    except Exception as e:
+        # El resumen se publica siempre: serve() lo espera para dar la sesión por terminada
+        error = f"{type(e).__name__}: {e}"
+    elapsed = time.perf_counter() - t0
+    frames = session.frames if session else 0
+    summary = {
+        "type": "summary",
+        "session": spec.session_id,
+        "source": spec.source,
+        "frames": frames,
+        "seconds": elapsed,
+        "fps": frames / elapsed if elapsed > 0 else 0.0,
+        "inferences": session.detector.inference_count if session else 0,
+        "quality": session.detector.qos.state() if session and session.detector.qos else None,
+        "final_state": session.state if session else INITIAL_STATE,
+        "error": error,
+    }
+    output.put(summary)
+    return summary
+
+
+def _lost_summary(spec: SessionSpec, exitcode: Optional[int]) -> Dict:
+    return {
+        "type": "summary",
+        "session": spec.session_id,
+        "source": spec.source,
+        "frames": 0,
+        "seconds": 0.0,
+        "fps": 0.0,
+        "inferences": 0,
+        "quality": None,
+        "final_state": None,
+        "error": f"el proceso de la sesión terminó sin resumen (exitcode={exitcode})",
+    }
+
+
+def serve(specs: List[SessionSpec], workers: int = SERVER_WORKERS, queue_size: int = SERVER_QUEUE_SIZE) -> Iterator[Dict]:
+    """
+    Ejecuta cada sesión en su propio proceso y va entregando los registros
+    (estados fusionados y, al final de cada sesión, su resumen) a medida que llegan.
+
+    - Las sesiones en vivo o en bucle no terminan nunca: arrancan todas a la vez,
+      cada una en su proceso, sin ocupar plaza de `workers`.
+    - Las sesiones de archivo se ejecutan como mucho `workers` a la vez.
+    - Si un proceso muere sin publicar su resumen (segfault en código nativo, OOM...)
+      se emite un resumen con error en su lugar, así serve() nunca se queda esperando.
+
+    Termina cuando todas las sesiones terminaron.
+    """
+    ctx = mp.get_context("spawn")  # MediaPipe no es seguro tras fork
+    queue = ctx.Queue(maxsize=queue_size)
+    waiting = [spec for spec in specs if not _is_unbounded(spec)]
+    workers = max(1, workers)
+    running: Dict[str, Tuple[SessionSpec, mp.Process]] = {}
+    dead_since: Dict[str, float] = {}
+
+    def start(spec: SessionSpec):
+        proc = ctx.Process(target=_session_main, args=(spec, queue), daemon=True,
+                           name=f"session-{spec.session_id}")
+        proc.start()
+        running[spec.session_id] = (spec, proc)
+
+    def bounded_running() -> int:
+        return sum(1 for spec, _ in running.values() if not _is_unbounded(spec))
+
+    try:
+        for spec in specs:
+            if _is_unbounded(spec):
+                start(spec)
+        while running or waiting:
+            while waiting and bounded_running() < workers:
+                start(waiting.pop(0))
+            try:
+                record = queue.get(timeout=SERVER_POLL_INTERVAL)
+            except queue_mod.Empty:
+                record = None
+            if record is not None:
+                if record["type"] == "summary":
+                    entry = running.pop(record["session"], None)
+                    dead_since.pop(record["session"], None)
+                    if entry is not None:
+                        entry[1].join(timeout=1.0)
+                yield record
+                continue
+            # Cola vacía: ¿algún proceso murió sin resumen? (se da un margen para que
+            # el resumen ya enviado termine de llegar por la cola)
+            now = time.monotonic()
+            for session_id, (spec, proc) in list(running.items()):
+                if proc.exitcode is None:
+                    continue
+                first_seen = dead_since.setdefault(session_id, now)
+                if now - first_seen >= SERVER_EXIT_GRACE:
+                    del running[session_id]
+                    del dead_since[session_id]
+                    yield _lost_summary(spec, proc.exitcode)
+    finally:
+        for _, proc in running.values():
+            if proc.is_alive():
+                proc.terminate()
+            proc.join(timeout=1.0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Servidor headless: gestos + EEG + fusión para varias fuentes en paralelo."
+    )
+    parser.add_argument("sources", nargs="+", help="videos, directorios de imágenes, URLs rtsp:// o índices de cámara")
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS,
+                        help="sesiones de archivo simultáneas (las en vivo / en bucle van aparte)")
+    parser.add_argument("--out", help="archivo JSONL de salida (por defecto stdout)")
+    parser.add_argument("--realtime", action="store_true", help="leer archivos a los fps de la fuente")
+    parser.add_argument("--loop", action="store_true", help="repetir archivos y directorios indefinidamente")
+    parser.add_argument("--every-frame", action="store_true", help="emitir todos los frames y no solo los cambios")
+    parser.add_argument("--seed", type=int, help="semilla base del EEG (sesión i usa seed + i; sin ella, los archivos derivan una fija)")
+    args = parser.parse_args()
+
+    specs = [
+        SessionSpec(
+            session_id=f"s{i}",
+            source=source,
+            seed=None if args.seed is None else args.seed + i,
+            realtime=args.realtime,
+            loop=args.loop,
+            every_frame=args.every_frame,
+        )
+        for i, source in enumerate(args.sources)
+    ]
+
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    t0 = time.perf_counter()
+    total_frames = 0
+    try:
+        for record in serve(specs, workers=args.workers):
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            if record["type"] == "summary":
+                total_frames += record["frames"]
+                print(
+                    f"[server] {record['session']} ({record['source']}): {record['frames']} frames, "
+                    f"{record['fps']:.1f} fps" + (f", error: {record['error']}" if record["error"] else ""),
+                    file=sys.stderr,
+                )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - t0
+    print(f"[server] {len(specs)} sesiones, {total_frames / elapsed:.1f} frames/s en total", file=sys.stderr)
@@ -21,15 +21,95 @@ def _state_color(state: str, alert: bool) -> Tuple[int, int, int]:
     return (255, 255, 255)  # blanco por defecto
 
 
+# Layout del panel superior
+PANEL_HEIGHT = 121  # filas 0..120, igual que el rectángulo (0, 0)-(w, 120)
+PANEL_DARKEN = 0.6  # equivale a mezclar un rectángulo negro al 40 %
+TEXT_X = 10
+TEXT_BASELINES = (30, 55, 80, 105)
+TEXT_FONT = cv2.FONT_HERSHEY_SIMPLEX
+TEXT_SCALE = 0.6
+TEXT_THICKNESS = 1
+
+
+class HudCompositor:
+    """
+    Compositor del HUD que trabaja solo sobre la región del panel.
+
+    - Oscurece in-place la franja superior (sin copiar el frame completo).
+    - Mantiene una máscara alfa con el texto ya rasterizado y solo vuelve a
+      dibujar la línea cuyo contenido cambió (gesto, voz, EEG o estado).
+
+    No es idéntico pixel a pixel a addWeighted + putText sobre el frame: donde dos
+    trazos antialiased se solapan, putText mezcla el píxel dos veces y redondea en
+    cada paso, mientras que aquí se mezcla una sola vez con el alfa acumulado.
+    La diferencia es de ±1 nivel en un par de píxeles de borde por frame.
+    """
+
+    def __init__(self):
+        self._width = None
+        self._mask = None        # alfa del texto (PANEL_HEIGHT x ancho), uint8
+        self._mask_bgr = None    # misma máscara en 3 canales para cv2.multiply
+        self._lines = [None] * len(TEXT_BASELINES)
+        self._line_widths = [0] * len(TEXT_BASELINES)
+        self._text_width = 0
+
+    def _reset(self, width: int):
+        self._width = width
+        self._mask = np.zeros((PANEL_HEIGHT, width), dtype=np.uint8)
+        self._mask_bgr = np.zeros((PANEL_HEIGHT, width, 3), dtype=np.uint8)
+        self._lines = [None] * len(TEXT_BASELINES)
+        self._line_widths = [0] * len(TEXT_BASELINES)
+        self._text_width = 0
+
+    def _update_line(self, i: int, text: str):
+        if self._lines[i] == text:
+            return
+        y = TEXT_BASELINES[i]
+        top, bottom = max(0, y - 19), min(PANEL_HEIGHT, y + 6)
+        band = self._mask[top:bottom]
+        band[:] = 0
+        cv2.putText(self._mask, text, (TEXT_X, y), TEXT_FONT, TEXT_SCALE, 255, TEXT_THICKNESS, cv2.LINE_AA)
+        cv2.merge([band, band, band], dst=self._mask_bgr[top:bottom])
+        (tw, _), _ = cv2.getTextSize(text, TEXT_FONT, TEXT_SCALE, TEXT_THICKNESS)
+        self._lines[i] = text
+        self._line_widths[i] = TEXT_X + tw + 2
+        self._text_width = min(self._width, max(self._line_widths))
+
+    def compose_panel(self, frame, texts):
+        """
+        Oscurece la franja del panel y superpone el texto cacheado, todo in-place.
+        """
+        h, w = frame.shape[:2]
+        if w != self._width:
+            self._reset(w)
+        for i, text in enumerate(texts):
+            self._update_line(i, text)
+
+        panel = frame[:min(PANEL_HEIGHT, h)]
+        cv2.convertScaleAbs(panel, dst=panel, alpha=PANEL_DARKEN)
+
+        # Texto blanco antialiased: panel += (255 - panel) * alfa
+        tw = self._text_width
+        if tw > 0:
+            region = panel[:, :tw]
+            alpha = self._mask_bgr[:region.shape[0], :tw]
+            headroom = cv2.subtract(255, region)
+            cv2.add(region, cv2.multiply(headroom, alpha, scale=1.0 / 255), dst=region)
+
+
+_hud = HudCompositor()
+
+
 def draw_visualization(
     frame,
     gesture_event: Optional[Dict],
     voice_event: Optional[Dict],
     eeg_state: Dict,
     fusion_output: Dict,
+    hud: Optional[HudCompositor] = None,
 ):
     """
-    Dibuja sobre el frame:
+    Dibuja sobre el frame (in-place, también lo devuelve):
     - Información de gesto, voz, EEG.
     - Estado global del sistema.
     - Un círculo que cambia de color/tamaño según el estado y modo alerta.
@@ -37,11 +117,6 @@ def draw_visualization(
 
     h, w, _ = frame.shape
 
-    # Panel semitransparente arriba
-    overlay = frame.copy()
-    cv2.rectangle(overlay, (0, 0), (w, 120), (0, 0, 0), thickness=-1)
-    frame = cv2.addWeighted(overlay, 0.4, frame, 0.6, 0)
-
     # Texto básico
     gesture_text = gesture_event["name"] if gesture_event else "---"
     voice_text = voice_event["name"] if voice_event else "---"
@@ -50,14 +125,13 @@ def draw_visualization(
     state = fusion_output.get("state", "IDLE")
     alert = fusion_output.get("alert", False)
 
-    font = cv2.FONT_HERSHEY_SIMPLEX
-    scale = 0.6
-    thickness = 1
-
-    cv2.putText(frame, f"Gesture: {gesture_text}", (10, 30), font, scale, (255, 255, 255), thickness, cv2.LINE_AA)
-    cv2.putText(frame, f"Voice: {voice_text}", (10, 55), font, scale, (255, 255, 255), thickness, cv2.LINE_AA)
-    cv2.putText(frame, f"EEG: {eeg_value:.2f} ({eeg_label})", (10, 80), font, scale, (255, 255, 255), thickness, cv2.LINE_AA)
-    cv2.putText(frame, f"State: {state}", (10, 105), font, scale, (255, 255, 255), thickness, cv2.LINE_AA)
+    # Panel semitransparente arriba + texto cacheado (solo se re-rasteriza lo que cambia)
+    (hud or _hud).compose_panel(frame, (
+        f"Gesture: {gesture_text}",
+        f"Voice: {voice_text}",
+        f"EEG: {eeg_value:.2f} ({eeg_label})",
+        f"State: {state}",
+    ))
 
     # Círculo de estado
     circle_color = _state_color(state, alert)
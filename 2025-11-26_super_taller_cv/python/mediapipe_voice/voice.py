@@ -3,11 +3,66 @@
 import threading
 import time
 import queue
-from typing import Optional, Dict
+from typing import Optional, Dict, Protocol
 
 import speech_recognition as sr
 
-from config import VOICE_KEYWORDS
+from command_grammar import CommandGrammar
+from config import VOICE_KEYWORDS, VOICE_BACKEND, VOICE_TEMPLATES_DIR, VOICE_KWS_MAX_DISTANCE, VOICE_FUZZY_EDITS
+
+
+class RecognizerBackend(Protocol):
+    """
+    Interfaz de los backends de reconocimiento: transcribe(audio) recibe un
+    sr.AudioData y devuelve el texto reconocido o None si no hubo resultado.
+    Los errores se manejan dentro del backend. Es estructural: basta con tener
+    `name` y `transcribe` (p.ej. kws.KeywordSpotter no hereda de aquí).
+    """
+
+    name: str
+
+    def transcribe(self, audio: sr.AudioData) -> Optional[str]:
+        ...
+
+
+class GoogleBackend:
+    """
+    Reconocimiento en línea con la API de Google (requiere red).
+    """
+
+    name = "google"
+
+    def __init__(self, recognizer: sr.Recognizer, language: str = "en-US"):
+        self.recognizer = recognizer
+        self.language = language
+
+    def transcribe(self, audio: sr.AudioData) -> Optional[str]:
+        try:
+            return self.recognizer.recognize_google(audio, language=self.language)
+        except sr.UnknownValueError:
+            print("[voice] No se entendió el audio.")
+        except sr.RequestError as e:
+            print(f"[voice] Error con el servicio de reconocimiento: {e}")
+        return None
+
+
+def make_backend(name: str, recognizer: sr.Recognizer) -> RecognizerBackend:
+    """
+    Crea el backend configurado. "kws" usa el keyword spotter local (kws.py)
+    con las plantillas de VOICE_TEMPLATES_DIR.
+    """
+    if name == "google":
+        return GoogleBackend(recognizer)
+    if name == "kws":
+        from kws import KeywordSpotter
+
+        spotter = KeywordSpotter.from_wav_dir(
+            VOICE_TEMPLATES_DIR, VOICE_KEYWORDS.keys(), max_distance=VOICE_KWS_MAX_DISTANCE
+        )
+        if not spotter.has_templates():
+            print(f"[voice] Sin plantillas en {VOICE_TEMPLATES_DIR}; el keyword spotter no reconocerá nada.")
+        return spotter
+    raise ValueError(f"Backend de voz desconocido: {name}")
 
 
 class VoiceCommandListener:
@@ -23,8 +78,15 @@ class VoiceCommandListener:
         listener.stop()
     """
 
-    def __init__(self, phrase_time_limit: float = 3.0, energy_threshold: Optional[int] = None):
+    def __init__(
+        self,
+        phrase_time_limit: float = 3.0,
+        energy_threshold: Optional[int] = None,
+        backend: Optional[RecognizerBackend] = None,
+    ):
         self.recognizer = sr.Recognizer()
+        self.backend = backend if backend is not None else make_backend(VOICE_BACKEND, self.recognizer)
+        self.grammar = CommandGrammar(VOICE_KEYWORDS, max_edits=VOICE_FUZZY_EDITS)
         self.microphone = sr.Microphone()
         self.phrase_time_limit = phrase_time_limit
         self.energy_threshold = energy_threshold
@@ -44,11 +106,7 @@ class VoiceCommandListener:
         # No hacemos join aquí para no bloquear en cierre.
 
     def _map_text_to_command(self, text: str) -> Optional[str]:
-        text_lower = text.lower()
-        for keyword, cmd_name in VOICE_KEYWORDS.items():
-            if keyword in text_lower:
-                return cmd_name
-        return None
+        return self.grammar.first(text)
 
     def _run(self):
         # Configurar micrófono y ruido ambiente
@@ -75,28 +133,25 @@ class VoiceCommandListener:
                     print(f"[voice] Error al escuchar: {e}")
                     continue
 
-                try:
-                    # Idioma en-US para palabras "start", "stop", etc.
-                    text = self.recognizer.recognize_google(audio, language="en-US")
-                    print(f"[voice] Reconocido: {text}")
-                except sr.UnknownValueError:
-                    print("[voice] No se entendió el audio.")
-                    continue
-                except sr.RequestError as e:
-                    print(f"[voice] Error con el servicio de reconocimiento: {e}")
+                text = self.backend.transcribe(audio)
+                if not text:
                     continue
+                print(f"[voice] Reconocido ({self.backend.name}): {text}")
 
-                cmd_name = self._map_text_to_command(text)
-                if cmd_name:
+                # Una frase puede traer varios comandos ("start ... faster"): se encolan en orden
+                matches = self.grammar.parse(text)
+                if not matches:
+                    print("[voice] Texto reconocido pero sin comando conocido.")
+                    continue
+                now = time.time()
+                for match in matches:
                     event = {
                         "type": "voice",
-                        "name": cmd_name,
+                        "name": match.command,
                         "raw_text": text,
-                        "timestamp": time.time(),
+                        "timestamp": now,
                     }
                     self._queue.put(event)
-                else:
-                    print("[voice] Texto reconocido pero sin comando conocido.")
 
     def get_event(self) -> Optional[Dict]:
         """